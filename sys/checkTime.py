@@ -1,7 +1,9 @@
 #!/usr/bin/env python3
 import sys
+import sqlite3
 import subprocess
 from datetime import datetime, timedelta
+import tempHistory
 
 # Usage: sudo python3 checkTime.py "Jan 14 01:24:31" [minutes_before] [minutes_after]
 
@@ -37,6 +39,45 @@ def parse_input_time(t_str):
             
     return None
 
+def print_thermal_context(target_dt, start_dt, end_dt):
+    """CPU / GPU edge temperature and fan around the event, from temperatureWarn's history."""
+    print(f"\n=== THERMAL CONTEXT ({tempHistory.DB_PATH}) ===")
+    try:
+        history = tempHistory.open_readonly()
+        if history is None:
+            print("No temperature history recorded (is temperature-warn running?)")
+            return
+        try:
+            rows = history.range(start_dt.timestamp(), end_dt.timestamp(), ("cpu", "edge", "cpu_fan"))
+        finally:
+            history.close()
+    except sqlite3.Error as e:
+        print(f"Temperature history unreadable: {e}")
+        return
+    if not rows:
+        print("No temperature samples in this window.")
+        return
+
+    def fmt(values, unit):
+        low, avg, high = values
+        if avg is None:
+            return "N/A".rjust(17)
+        if low == high:
+            return f"{avg:.0f}{unit}".rjust(17)
+        return f"{low:.0f}/{avg:.0f}/{high:.0f}{unit}".rjust(17)
+
+    print(f"{'time':8}  {'cpu min/avg/max':>17}  {'edge':>17}  {'cpu fan':>17}")
+    target = target_dt.timestamp()
+    event = max((ts for ts, _ in rows if ts <= target), default=rows[0][0])
+    peak = max(rows, key=lambda row: row[1]["cpu"][2] or 0)
+    for ts, values in rows:
+        prefix = "**" if ts == peak[0] else ">>" if ts == event else "  "
+        print(f"{prefix}{datetime.fromtimestamp(ts).strftime('%H:%M:%S')}  "
+              f"{fmt(values['cpu'], '°C')}  {fmt(values['edge'], '°C')}  {fmt(values['cpu_fan'], 'rpm')}")
+    if peak[1]["cpu"][2] is not None:
+        print(f"Peak CPU {peak[1]['cpu'][2]:.1f}°C at {datetime.fromtimestamp(peak[0]).strftime('%H:%M:%S')} (**), "
+              f"event at >>")
+
 def main():
     if len(sys.argv) < 2:
         print("Usage: checkTime.py \"<timestamp>\" [minutes_before] [minutes_after]")
@@ -87,6 +128,7 @@ def main():
             print(f"{prefix} {line}")
 
     print("---------------------------------------------------------------")
+    print_thermal_context(target_dt, start_dt, end_dt)
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,45 @@
+#!/usr/bin/env bash
+set -euo pipefail
+
+SERVICE_NAME="mem-track.service"
+SERVICE_FILE="/etc/systemd/system/${SERVICE_NAME}"
+INTERVAL="${1:-60}"
+COMMIT_EVERY="${2:-300}"
+KEEP_DAYS="${3:-30}"
+SCRIPT_DIR="$(cd "$(dirname "${BASH_SOURCE[0]}")" && pwd)"
+PYTHON_SCRIPT="${SCRIPT_DIR}/memTrack.py"
+SERVICE_USER="${SUDO_USER:-$USER}"
+
+if [[ ! -f "${PYTHON_SCRIPT}" ]]; then
+  echo "Memory tracker script not found at ${PYTHON_SCRIPT}" >&2
+  exit 1
+fi
+
+cat <<UNIT | sudo tee "${SERVICE_FILE}" > /dev/null
+[Unit]
+Description=Memory usage tracker (sample every ${INTERVAL}s, commit every ${COMMIT_EVERY}s, keep ${KEEP_DAYS} days)
+After=multi-user.target
+
+[Service]
+Type=simple
+User=${SERVICE_USER}
+ExecStart=/usr/bin/env python3 "${PYTHON_SCRIPT}" --daemon --interval ${INTERVAL} --commit-every ${COMMIT_EVERY} --keep-days ${KEEP_DAYS}
+# SIGTERM flushes the open batch; give it time before SIGKILL
+KillSignal=SIGTERM
+TimeoutStopSec=30
+Restart=always
+RestartSec=10
+Nice=10
+WorkingDirectory=${SCRIPT_DIR}
+
+[Install]
+WantedBy=multi-user.target
+UNIT
+
+sudo chmod 644 "${SERVICE_FILE}"
+sudo systemctl daemon-reload
+sudo systemctl enable --now "${SERVICE_NAME}"
+
+echo "Service ${SERVICE_NAME} installed and started. Check status via:"
+echo "  sudo systemctl status ${SERVICE_NAME}"
+echo "If memTrack.py was run from cron before, remove that crontab line."
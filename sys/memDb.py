@@ -0,0 +1,480 @@
+#!/usr/bin/env python3
+# sel2in.com tgkprog@gmail.com
+"""Schema and indexed lookups for mem_stats.db (memTrack.py, meman.py).
+
+memory_log originally stored only the text `timestamp`. Lookups then did
+ORDER BY ABS(strftime('%s', timestamp) - ...) and scanned the whole
+table. migrate() brings any database up to date, in place and
+idempotently, using PRAGMA user_version:
+
+    1  integer epoch column `ts`, backfilled from `timestamp` (local
+       time, as memTrack writes it), an index on it, and a trigger that
+       fills `ts` for rows written by older memTrack copies
+    2  normalized v2 schema: one `snapshots` row per sample time (id,
+       ts, system totals), `samples` keyed by (snapshot_id, pid) with RSS
+       in integer KiB and %MEM in tenths, user and command names interned
+       in `users` / `commands`. memory_log becomes a view with the old
+       columns, so existing SQL keeps working.
+    3  per-sample pss_kib, uss_kib, swap_kib (smaps_rollup, see memProc)
+       and the process start time, so a recycled pid is a new process
+    4  per-application totals (memProc.Sampler.apps) in `app_samples`,
+       one row per app per snapshot with names interned in `apps`, and
+       the `app_log` view
+    5  `hourly` per-command min/avg/max rollups that memRetain.py keeps
+       once the detail rows are gone, and the `hourly_log` view
+    6  `leaks`, the growth memLeak.py has flagged per process, and `meta`,
+       a key/value table for state such as its watermark
+    7  `pressure`, one row per snapshot with system-wide context
+       (memProc.read_pressure): meminfo fields, PSI avg10/avg60 in
+       hundredths of a percent plus totals, and vmstat counters; the
+       `pressure_log` view converts the units
+
+`python3 memDb.py [db]` runs the migrations and then VACUUMs, which is
+the step that actually shrinks an old file. It also switches the file to
+auto_vacuum=INCREMENTAL (new files start that way), so the pages that
+memRetain frees can be returned a few at a time.
+
+Every lookup below is one or two index seeks on ts, so its cost does not
+grow with the size of the history:
+
+    nearest(conn, epoch)       closest snapshot, one <= and one >= probe
+    at_or_before(conn, epoch)  latest snapshot not after epoch
+    snapshots(conn, start, end)
+    top(conn, ts, limit)       the processes recorded in one snapshot
+    top_apps(conn, ts, limit)  the applications recorded in one snapshot
+"""
+import argparse
+import os
+import sqlite3
+import sys
+from datetime import datetime
+
+DB_PATH = "/home/ubuntu/code/gt/tgk/ubu/sys/mem_stats.db"
+
+
+def _v1_epoch_index(conn):
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS memory_log (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            timestamp DATETIME,
+            pid INTEGER,
+            user TEXT,
+            command TEXT,
+            rss_mb REAL,
+            pmem REAL
+        )
+    """)
+    columns = {row[1] for row in conn.execute("PRAGMA table_info(memory_log)")}
+    if "ts" not in columns:
+        conn.execute("ALTER TABLE memory_log ADD COLUMN ts INTEGER")
+    conn.execute("UPDATE memory_log SET ts = CAST(strftime('%s', timestamp, 'utc') AS INTEGER) WHERE ts IS NULL")
+    conn.execute("CREATE INDEX IF NOT EXISTS memory_log_ts ON memory_log(ts)")
+    conn.execute("""
+        CREATE TRIGGER IF NOT EXISTS memory_log_fill_ts AFTER INSERT ON memory_log
+        WHEN NEW.ts IS NULL BEGIN
+            UPDATE memory_log SET ts = CAST(strftime('%s', NEW.timestamp, 'utc') AS INTEGER) WHERE id = NEW.id;
+        END
+    """)
+
+
+V2_TABLES = """
+    CREATE TABLE users (id INTEGER PRIMARY KEY, name TEXT NOT NULL UNIQUE);
+    CREATE TABLE commands (id INTEGER PRIMARY KEY, name TEXT NOT NULL UNIQUE);
+    CREATE TABLE snapshots (
+        id INTEGER PRIMARY KEY,
+        ts INTEGER NOT NULL,
+        mem_total_kib INTEGER,
+        procs INTEGER
+    );
+    CREATE INDEX snapshots_ts ON snapshots(ts);
+    CREATE TABLE samples (
+        snapshot_id INTEGER NOT NULL REFERENCES snapshots(id),
+        pid INTEGER NOT NULL,
+        user_id INTEGER NOT NULL REFERENCES users(id),
+        command_id INTEGER NOT NULL REFERENCES commands(id),
+        rss_kib INTEGER NOT NULL,
+        pmem_tenths INTEGER,
+        PRIMARY KEY (snapshot_id, pid)
+    ) WITHOUT ROWID;
+    CREATE VIEW memory_log AS
+        SELECT sn.id AS snapshot_id,
+               datetime(sn.ts, 'unixepoch', 'localtime') AS timestamp,
+               sa.pid AS pid,
+               u.name AS user,
+               c.name AS command,
+               sa.rss_kib / 1024.0 AS rss_mb,
+               sa.pmem_tenths / 10.0 AS pmem,
+               sn.ts AS ts
+        FROM samples sa
+        JOIN snapshots sn ON sn.id = sa.snapshot_id
+        JOIN users u ON u.id = sa.user_id
+        JOIN commands c ON c.id = sa.command_id;
+"""
+
+
+def _v2_normalize(conn):
+    conn.execute("ALTER TABLE memory_log RENAME TO memory_log_v1")
+    for statement in V2_TABLES.split(";"):
+        if statement.strip():
+            conn.execute(statement)
+    conn.execute("INSERT INTO users (name) SELECT DISTINCT IFNULL(user, '?') FROM memory_log_v1")
+    conn.execute("INSERT INTO commands (name) SELECT DISTINCT IFNULL(command, '?') FROM memory_log_v1")
+    conn.execute("INSERT INTO snapshots (ts) SELECT DISTINCT ts FROM memory_log_v1 ORDER BY ts")
+    # v1 never stored MemTotal; the biggest process's rss / %mem gives it within ~0.5%
+    conn.execute("""
+        UPDATE snapshots SET mem_total_kib = (
+            SELECT CAST(rss_mb * 1024 * 100 / pmem AS INTEGER) FROM memory_log_v1
+            WHERE memory_log_v1.ts = snapshots.ts AND pmem > 0 ORDER BY pmem DESC LIMIT 1)
+    """)
+    conn.execute("""
+        INSERT OR IGNORE INTO samples
+        SELECT sn.id, v.pid, u.id, c.id, CAST(round(v.rss_mb * 1024) AS INTEGER), CAST(round(v.pmem * 10) AS INTEGER)
+        FROM memory_log_v1 v
+        JOIN snapshots sn ON sn.ts = v.ts
+        JOIN users u ON u.name = IFNULL(v.user, '?')
+        JOIN commands c ON c.name = IFNULL(v.command, '?')
+    """)
+    conn.execute("DROP TABLE memory_log_v1")
+
+
+MEMORY_LOG_V3 = """
+    CREATE VIEW memory_log AS
+        SELECT sn.id AS snapshot_id,
+               datetime(sn.ts, 'unixepoch', 'localtime') AS timestamp,
+               sa.pid AS pid,
+               u.name AS user,
+               c.name AS command,
+               sa.rss_kib / 1024.0 AS rss_mb,
+               sa.pmem_tenths / 10.0 AS pmem,
+               sn.ts AS ts,
+               sa.pss_kib / 1024.0 AS pss_mb,
+               sa.uss_kib / 1024.0 AS uss_mb,
+               sa.swap_kib / 1024.0 AS swap_mb,
+               sa.start AS start
+        FROM samples sa
+        JOIN snapshots sn ON sn.id = sa.snapshot_id
+        JOIN users u ON u.id = sa.user_id
+        JOIN commands c ON c.id = sa.command_id
+"""
+
+
+def _v3_pss(conn):
+    for column in ("pss_kib", "uss_kib", "swap_kib", "start"):
+        conn.execute(f"ALTER TABLE samples ADD COLUMN {column} INTEGER")
+    conn.execute("DROP VIEW memory_log")
+    conn.execute(MEMORY_LOG_V3)
+
+
+V4_TABLES = """
+    CREATE TABLE apps (id INTEGER PRIMARY KEY, name TEXT NOT NULL UNIQUE);
+    CREATE TABLE app_samples (
+        snapshot_id INTEGER NOT NULL REFERENCES snapshots(id),
+        app_id INTEGER NOT NULL REFERENCES apps(id),
+        procs INTEGER NOT NULL,
+        rss_kib INTEGER NOT NULL,
+        pss_kib INTEGER,
+        uss_kib INTEGER,
+        swap_kib INTEGER,
+        PRIMARY KEY (snapshot_id, app_id)
+    ) WITHOUT ROWID;
+    CREATE VIEW app_log AS
+        SELECT sn.id AS snapshot_id,
+               datetime(sn.ts, 'unixepoch', 'localtime') AS timestamp,
+               a.name AS app,
+               s.procs AS procs,
+               s.rss_kib / 1024.0 AS rss_mb,
+               s.pss_kib / 1024.0 AS pss_mb,
+               s.uss_kib / 1024.0 AS uss_mb,
+               s.swap_kib / 1024.0 AS swap_mb,
+               sn.ts AS ts
+        FROM app_samples s
+        JOIN snapshots sn ON sn.id = s.snapshot_id
+        JOIN apps a ON a.id = s.app_id
+"""
+
+
+def _v4_apps(conn):
+    for statement in V4_TABLES.split(";"):
+        if statement.strip():
+            conn.execute(statement)
+
+
+V5_TABLES = """
+    CREATE TABLE hourly (
+        hour INTEGER NOT NULL,
+        command_id INTEGER NOT NULL REFERENCES commands(id),
+        snapshots INTEGER NOT NULL,
+        rss_min_kib INTEGER,
+        rss_avg_kib INTEGER,
+        rss_max_kib INTEGER,
+        pss_min_kib INTEGER,
+        pss_avg_kib INTEGER,
+        pss_max_kib INTEGER,
+        PRIMARY KEY (hour, command_id)
+    ) WITHOUT ROWID;
+    CREATE VIEW hourly_log AS
+        SELECT datetime(h.hour, 'unixepoch', 'localtime') AS timestamp,
+               c.name AS command,
+               h.snapshots AS snapshots,
+               h.rss_min_kib / 1024.0 AS rss_min_mb,
+               h.rss_avg_kib / 1024.0 AS rss_avg_mb,
+               h.rss_max_kib / 1024.0 AS rss_max_mb,
+               h.pss_min_kib / 1024.0 AS pss_min_mb,
+               h.pss_avg_kib / 1024.0 AS pss_avg_mb,
+               h.pss_max_kib / 1024.0 AS pss_max_mb,
+               h.hour AS ts
+        FROM hourly h
+        JOIN commands c ON c.id = h.command_id
+"""
+
+
+def _v5_hourly(conn):
+    for statement in V5_TABLES.split(";"):
+        if statement.strip():
+            conn.execute(statement)
+
+
+V6_TABLES = """
+    CREATE TABLE meta (key TEXT PRIMARY KEY, value) WITHOUT ROWID;
+    CREATE TABLE leaks (
+        pid INTEGER NOT NULL,
+        start INTEGER NOT NULL,
+        command_id INTEGER NOT NULL REFERENCES commands(id),
+        first_ts INTEGER NOT NULL,
+        last_ts INTEGER NOT NULL,
+        rate_kib_h INTEGER NOT NULL,
+        r2 REAL NOT NULL,
+        rss_kib INTEGER NOT NULL,
+        oom_hours REAL,
+        PRIMARY KEY (pid, start, command_id)
+    ) WITHOUT ROWID;
+"""
+
+
+def _v6_leaks(conn):
+    for statement in V6_TABLES.split(";"):
+        if statement.strip():
+            conn.execute(statement)
+
+
+PRESSURE_COLUMNS = (
+    "mem_available_kib", "mem_free_kib", "cached_kib", "buffers_kib", "shmem_kib", "dirty_kib",
+    "swap_total_kib", "swap_free_kib",
+    "mem_some_avg10", "mem_some_avg60", "mem_some_total",
+    "mem_full_avg10", "mem_full_avg60", "mem_full_total",
+    "cpu_some_avg10", "cpu_some_avg60", "cpu_some_total",
+    "pgmajfault", "pswpin", "pswpout", "oom_kill",
+)
+
+
+V7_TABLES = """
+    CREATE TABLE pressure (
+        snapshot_id INTEGER PRIMARY KEY REFERENCES snapshots(id),
+        mem_available_kib INTEGER,
+        mem_free_kib INTEGER,
+        cached_kib INTEGER,
+        buffers_kib INTEGER,
+        shmem_kib INTEGER,
+        dirty_kib INTEGER,
+        swap_total_kib INTEGER,
+        swap_free_kib INTEGER,
+        mem_some_avg10 INTEGER,
+        mem_some_avg60 INTEGER,
+        mem_some_total INTEGER,
+        mem_full_avg10 INTEGER,
+        mem_full_avg60 INTEGER,
+        mem_full_total INTEGER,
+        cpu_some_avg10 INTEGER,
+        cpu_some_avg60 INTEGER,
+        cpu_some_total INTEGER,
+        pgmajfault INTEGER,
+        pswpin INTEGER,
+        pswpout INTEGER,
+        oom_kill INTEGER
+    );
+    CREATE VIEW pressure_log AS
+        SELECT sn.id AS snapshot_id,
+               datetime(sn.ts, 'unixepoch', 'localtime') AS timestamp,
+               p.mem_available_kib / 1024.0 AS mem_available_mb,
+               p.mem_free_kib / 1024.0 AS mem_free_mb,
+               p.cached_kib / 1024.0 AS cached_mb,
+               p.buffers_kib / 1024.0 AS buffers_mb,
+               p.shmem_kib / 1024.0 AS shmem_mb,
+               p.dirty_kib / 1024.0 AS dirty_mb,
+               p.swap_total_kib / 1024.0 AS swap_total_mb,
+               p.swap_free_kib / 1024.0 AS swap_free_mb,
+               p.mem_some_avg10 / 100.0 AS mem_some_avg10,
+               p.mem_some_avg60 / 100.0 AS mem_some_avg60,
+               p.mem_some_total AS mem_some_total,
+               p.mem_full_avg10 / 100.0 AS mem_full_avg10,
+               p.mem_full_avg60 / 100.0 AS mem_full_avg60,
+               p.mem_full_total AS mem_full_total,
+               p.cpu_some_avg10 / 100.0 AS cpu_some_avg10,
+               p.cpu_some_avg60 / 100.0 AS cpu_some_avg60,
+               p.cpu_some_total AS cpu_some_total,
+               p.pgmajfault AS pgmajfault,
+               p.pswpin AS pswpin,
+               p.pswpout AS pswpout,
+               p.oom_kill AS oom_kill,
+               sn.ts AS ts
+        FROM pressure p
+        JOIN snapshots sn ON sn.id = p.snapshot_id
+"""
+
+
+def _v7_pressure(conn):
+    for statement in V7_TABLES.split(";"):
+        if statement.strip():
+            conn.execute(statement)
+
+
+MIGRATIONS = [_v1_epoch_index, _v2_normalize, _v3_pss, _v4_apps, _v5_hourly, _v6_leaks, _v7_pressure]
+VERSION = len(MIGRATIONS)
+
+
+def migrate(conn):
+    """Apply the migrations this database has not seen yet; each one is a
+    single transaction, so an interrupted run is simply repeated."""
+    version = conn.execute("PRAGMA user_version").fetchone()[0]
+    if version == 0 and conn.execute("SELECT count(*) FROM sqlite_master").fetchone()[0] == 0:
+        conn.execute("PRAGMA auto_vacuum = INCREMENTAL")  # only takes effect before the first table
+    for number, step in enumerate(MIGRATIONS[version:], version + 1):
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            step(conn)
+            conn.execute(f"PRAGMA user_version = {number}")
+            conn.commit()
+        except BaseException:
+            conn.rollback()
+            raise
+    return max(version, VERSION)
+
+
+def connect(path=None, create=False, timeout=5.0):
+    """Open (and migrate) the database. Exits when it does not exist,
+    unless create is set. timeout is how long a write waits for another
+    writer's lock."""
+    path = path or DB_PATH
+    if not create and not os.path.exists(path):
+        print(f"Error: Database not found at {path}")
+        sys.exit(1)
+    conn = sqlite3.connect(path, timeout=timeout)
+    try:
+        migrate(conn)
+    except sqlite3.OperationalError as e:
+        # e.g. a read-only copy: lookups need the ts column
+        print(f"Error: could not update {path} to schema {VERSION}: {e}")
+        sys.exit(1)
+    return conn
+
+
+def to_epoch(dt):
+    """Naive local datetime -> epoch seconds, matching the ts column."""
+    return int(dt.timestamp())
+
+
+def from_epoch(ts):
+    return datetime.fromtimestamp(ts)
+
+
+def at_or_before(conn, epoch):
+    row = conn.execute("SELECT ts FROM snapshots WHERE ts <= ? ORDER BY ts DESC LIMIT 1", (epoch,)).fetchone()
+    return row and row[0]
+
+
+def at_or_after(conn, epoch):
+    row = conn.execute("SELECT ts FROM snapshots WHERE ts >= ? ORDER BY ts LIMIT 1", (epoch,)).fetchone()
+    return row and row[0]
+
+
+def nearest(conn, epoch):
+    """ts of the snapshot closest to epoch, or None for an empty log."""
+    found = [ts for ts in (at_or_before(conn, epoch), at_or_after(conn, epoch)) if ts is not None]
+    return min(found, key=lambda ts: abs(ts - epoch)) if found else None
+
+
+def snapshots(conn, start, end):
+    """ts of every snapshot with start <= ts <= end, oldest first."""
+    return [row[0] for row in conn.execute(
+        "SELECT DISTINCT ts FROM snapshots WHERE ts BETWEEN ? AND ? ORDER BY ts", (start, end))]
+
+
+def top(conn, ts, limit=10):
+    """[(pid, user, command, rss_mb, pmem)] of one snapshot, largest first."""
+    return conn.execute(
+        "SELECT pid, user, command, rss_mb, pmem FROM memory_log WHERE ts = ? ORDER BY rss_mb DESC LIMIT ?",
+        (ts, limit)).fetchall()
+
+
+def top_apps(conn, ts, limit=10):
+    """[(app, procs, rss_mb, pss_mb)] of one snapshot, largest PSS first."""
+    return conn.execute(
+        "SELECT app, procs, rss_mb, pss_mb FROM app_log WHERE ts = ? ORDER BY pss_mb DESC LIMIT ?",
+        (ts, limit)).fetchall()
+
+
+def get_meta(conn, key, default=None):
+    row = conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+    return default if row is None else row[0]
+
+
+def set_meta(conn, key, value):
+    conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, value))
+
+
+def intern(conn, table, name, cache=None):
+    """id of name in the users, commands or apps dictionary, adding it if new."""
+    if cache is not None and name in cache:
+        return cache[name]
+    conn.execute(f"INSERT OR IGNORE INTO {table} (name) VALUES (?)", (name,))
+    row_id = conn.execute(f"SELECT id FROM {table} WHERE name = ?", (name,)).fetchone()[0]
+    if cache is not None:
+        cache[name] = row_id
+    return row_id
+
+
+def add_snapshot(conn, ts, processes, mem_total_kib=None, procs=None, caches=None, apps=(), pressure=None):
+    """Store one snapshot of [(pid, user, command, rss_kib, pmem[, pss_kib,
+    uss_kib, swap_kib, start])], its [(app, procs, rss_kib, pss_kib,
+    uss_kib, swap_kib)] totals and its pressure ({column: value} as
+    memProc.read_pressure returns it); returns its id.
+    caches ({"users": {}, "commands": {}, "apps": {}}) lets a long-running
+    writer skip the dictionary lookups. The caller commits."""
+    caches = caches or {}
+    snapshot_id = conn.execute("INSERT INTO snapshots (ts, mem_total_kib, procs) VALUES (?, ?, ?)",
+                               (ts, mem_total_kib, procs)).lastrowid
+    conn.executemany(
+        "INSERT OR REPLACE INTO samples VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+        [(snapshot_id, pid, intern(conn, "users", user, caches.get("users")),
+          intern(conn, "commands", command, caches.get("commands")),
+          rss_kib, None if pmem is None else round(pmem * 10), *extra, *(None,) * (4 - len(extra)))
+         for pid, user, command, rss_kib, pmem, *extra in processes],
+    )
+    conn.executemany(
+        "INSERT OR REPLACE INTO app_samples VALUES (?, ?, ?, ?, ?, ?, ?)",
+        [(snapshot_id, intern(conn, "apps", app, caches.get("apps")), *totals) for app, *totals in apps],
+    )
+    if pressure:
+        values = [pressure.get(name) for name in PRESSURE_COLUMNS]
+        values = [round(v * 100) if v is not None and name.endswith(("avg10", "avg60")) else v
+                  for name, v in zip(PRESSURE_COLUMNS, values)]
+        conn.execute(f"INSERT OR REPLACE INTO pressure (snapshot_id, {', '.join(PRESSURE_COLUMNS)}) "
+                     f"VALUES ({', '.join('?' * (len(PRESSURE_COLUMNS) + 1))})", (snapshot_id, *values))
+    return snapshot_id
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bring mem_stats.db to the current schema and compact it")
+    parser.add_argument("db", nargs="?", default=DB_PATH, help=f"database (default: {DB_PATH})")
+    args = parser.parse_args()
+    before = os.path.getsize(args.db) if os.path.exists(args.db) else 0
+    conn = connect(args.db)
+    conn.execute("PRAGMA auto_vacuum = INCREMENTAL")  # applied by the VACUUM below
+    conn.execute("VACUUM")
+    conn.close()
+    after = os.path.getsize(args.db)
+    print(f"{args.db}: schema {VERSION}, {before / 1024:.0f} KiB -> {after / 1024:.0f} KiB")
+
+
+if __name__ == "__main__":
+    main()
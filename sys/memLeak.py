@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+# sel2in.com tgkprog@gmail.com
+"""Find processes whose memory keeps growing in mem_stats.db.
+
+Each process is keyed by (pid, start time, command), so a recycled pid is
+a new series. Snapshots from before schema 3 have no start time; for them
+the key falls back to pid and command. For every sample, SQLite window
+functions fit a least-squares line through that process's RSS over the
+preceding --window-hours:
+
+    slope = (n Sxy - Sx Sy) / (n Sxx - Sx^2)      MiB per hour
+    r2    = (n Sxy - Sx Sy)^2 / ((n Sxx - Sx^2)(n Syy - Sy^2))
+
+The sums are SUM() OVER a RANGE frame on ts, so the whole fit is a single
+pass inside SQLite with no per-row Python. A window is flagged when it
+spans most of --window-hours with enough points, grows at least
+--min-rate MiB/h, and has r2 >= --min-r2 (steady growth rather than a
+spike). Time to OOM is the snapshot's headroom (MemTotal minus the RSS of
+the recorded processes) divided by the rate. Only the top N processes are
+recorded, so that headroom is an upper bound.
+
+Flagged processes are kept in `leaks` (schema 6). The last snapshot
+analysed is stored in meta as leak_watermark, so a run only fits windows
+ending after it. It reads back one window of older samples for context.
+--full clears both and starts over.
+"""
+import argparse
+import sqlite3
+import sys
+import time
+
+import memDb
+import memQuery
+
+WINDOW_HOURS = 3
+MIN_POINTS = 6
+MIN_SPAN = 0.75     # fraction of the window the points must cover
+MIN_RATE_MB_H = 20  # MiB per hour
+MIN_R2 = 0.8
+WATERMARK = "leak_watermark"
+BUSY_TIMEOUT = 30  # seconds to wait for memTrack or memRetain to finish a write
+
+FIT_SQL = """
+    WITH points AS (
+        SELECT sa.pid AS pid, IFNULL(sa.start, 0) AS start, sa.command_id AS command_id,
+               sn.id AS snapshot_id, sn.ts AS ts, sn.mem_total_kib AS mem_total_kib,
+               (sn.ts - :origin) / 3600.0 AS x, sa.rss_kib / 1024.0 AS y
+        FROM snapshots sn
+        CROSS JOIN samples sa ON sa.snapshot_id = sn.id  -- keep the ts range as the outer loop
+        WHERE sn.ts > :context AND sn.ts <= :until
+    ),
+    sums AS (
+        SELECT *, count(*) OVER w AS n, min(ts) OVER w AS first,
+               sum(x) OVER w AS sx, sum(y) OVER w AS sy,
+               sum(x * x) OVER w AS sxx, sum(x * y) OVER w AS sxy, sum(y * y) OVER w AS syy
+        FROM points
+        WINDOW w AS (PARTITION BY pid, start, command_id ORDER BY ts
+                     RANGE BETWEEN {window} PRECEDING AND CURRENT ROW)
+    ),
+    fits AS (
+        SELECT pid, start, command_id, snapshot_id, ts, mem_total_kib, y,
+               (n * sxy - sx * sy) / (n * sxx - sx * sx) AS slope,
+               (n * sxy - sx * sy) * (n * sxy - sx * sy) / ((n * sxx - sx * sx) * (n * syy - sy * sy)) AS r2
+        FROM sums
+        WHERE ts > :watermark AND n >= :min_points AND ts - first >= :min_span
+              AND n * sxx - sx * sx > 0 AND n * syy - sy * sy > 0
+    ),
+    flagged AS (
+        SELECT *, min(ts) OVER key AS since, row_number() OVER (key ORDER BY ts DESC) AS latest
+        FROM fits
+        WHERE slope >= :min_rate AND r2 >= :min_r2
+        WINDOW key AS (PARTITION BY pid, start, command_id)
+    )
+    INSERT INTO leaks
+    SELECT pid, start, command_id, since, ts, CAST(round(slope * 1024) AS INTEGER), r2,
+           CAST(round(y * 1024) AS INTEGER),
+           (mem_total_kib - (SELECT SUM(rss_kib) FROM samples WHERE snapshot_id = flagged.snapshot_id))
+               / 1024.0 / slope
+    FROM flagged WHERE latest = 1
+    ON CONFLICT (pid, start, command_id) DO UPDATE SET
+        first_ts = min(first_ts, excluded.first_ts),
+        last_ts = excluded.last_ts,
+        rate_kib_h = excluded.rate_kib_h,
+        r2 = excluded.r2,
+        rss_kib = excluded.rss_kib,
+        oom_hours = excluded.oom_hours
+"""
+
+REPORT_SQL = """
+    SELECT l.pid AS pid, c.name AS command,
+           datetime(l.first_ts, 'unixepoch', 'localtime') AS since,
+           datetime(l.last_ts, 'unixepoch', 'localtime') AS last_seen,
+           l.rate_kib_h / 1024.0 AS rate_mb_h,
+           round(l.r2, 3) AS r2,
+           l.rss_kib / 1024.0 AS rss_mb,
+           round(l.oom_hours, 1) AS oom_hours
+    FROM leaks l JOIN commands c ON c.id = l.command_id
+    ORDER BY l.last_ts DESC, l.rate_kib_h DESC
+    LIMIT ?
+"""
+
+
+def analyze(conn, window_hours=WINDOW_HOURS, min_rate=MIN_RATE_MB_H, min_r2=MIN_R2,
+            min_points=MIN_POINTS, full=False):
+    """Fit the snapshots added since the watermark and upsert what grows
+    into `leaks`. Returns (previous watermark, new watermark, processes
+    flagged by this run)."""
+    window = int(window_hours * 3600)
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        if full:
+            conn.execute("DELETE FROM leaks")
+            memDb.set_meta(conn, WATERMARK, 0)
+        watermark = memDb.get_meta(conn, WATERMARK, 0)
+        until = conn.execute("SELECT max(ts) FROM snapshots").fetchone()[0]
+        flagged = 0
+        if until is not None and until > watermark:
+            before = conn.total_changes  # rowcount is -1 for a WITH ... INSERT
+            conn.execute(FIT_SQL.format(window=window), {
+                "origin": until, "context": watermark - window, "until": until, "watermark": watermark,
+                "min_points": min_points, "min_span": int(window * MIN_SPAN),
+                "min_rate": min_rate, "min_r2": min_r2,
+            })
+            flagged = conn.total_changes - before
+            memDb.set_meta(conn, WATERMARK, until)
+        conn.commit()
+    except BaseException:
+        conn.rollback()
+        raise
+    return watermark, max(watermark, until or 0), flagged
+
+
+def report(conn, limit=20):
+    """Cursor over the flagged processes, most recently seen first."""
+    return conn.execute(REPORT_SQL, (limit,))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Flag processes whose RSS grows steadily (memory leaks)")
+    parser.add_argument("--db", default=memDb.DB_PATH, help=f"database (default: {memDb.DB_PATH})")
+    parser.add_argument("--window-hours", type=float, default=WINDOW_HOURS,
+                        help=f"Sliding window for each fit (default: {WINDOW_HOURS})")
+    parser.add_argument("--min-rate", type=float, default=MIN_RATE_MB_H,
+                        help=f"MiB per hour to count as growth (default: {MIN_RATE_MB_H})")
+    parser.add_argument("--min-r2", type=float, default=MIN_R2,
+                        help=f"How straight the growth must be, 0..1 (default: {MIN_R2})")
+    parser.add_argument("--full", action="store_true", help="Forget the watermark and re-analyse everything")
+    parser.add_argument("--format", choices=memQuery.FORMATS, default="table", help="output format (default: table)")
+    parser.add_argument("-n", "--top", type=int, default=20, help="rows to show (default: 20)")
+    args = parser.parse_args()
+    if args.window_hours <= 0:
+        parser.error("--window-hours must be positive")
+
+    conn = memDb.connect(args.db, timeout=BUSY_TIMEOUT)
+    start = time.perf_counter()
+    try:
+        previous, watermark, flagged = analyze(conn, args.window_hours, args.min_rate, args.min_r2, full=args.full)
+    except sqlite3.Error as e:
+        print(f"Error analysing {args.db}: {e}", file=sys.stderr)
+        conn.close()
+        return 1
+    if args.format == "table":
+        span = "nothing new" if watermark == previous else \
+            f"snapshots after {memDb.from_epoch(previous) if previous else 'the start'}"
+        print(f"Analysed {span} up to {memDb.from_epoch(watermark) if watermark else '-'}: "
+              f"{flagged} growing in {(time.perf_counter() - start) * 1000:.0f} ms")
+    try:
+        if memQuery.RENDERERS[args.format](report(conn, args.top)) == 0 and args.format == "table":
+            print("No steady growth found")
+    except BrokenPipeError:
+        pass
+    conn.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
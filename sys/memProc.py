@@ -0,0 +1,303 @@
+#!/usr/bin/env python3
+# sel2in.com tgkprog@gmail.com
+"""In-process memory sampler for memTrack.py (replaces `ps --sort=-rss`).
+
+One pass over /proc reads each process's stat file: comm, start time and
+resident pages, the same number statm reports. heapq.nlargest picks the
+top CANDIDATES * n by RSS. Only those pay for smaps_rollup, which gives:
+
+    Pss   shared pages split between the processes mapping them, so 30
+          chrome renderers no longer count the same libraries 30 times
+    Uss   Private_Clean + Private_Dirty: what exiting would give back
+    Swap
+
+The final top n is ranked by PSS (RSS where smaps_rollup is unreadable,
+e.g. other users' processes without root). uid -> user name lookups are
+cached for the life of the Sampler.
+
+apps() rolls every process of the last scan up into applications, so 40
+chrome processes show as one row. A process belongs to, in order:
+
+    the first APP_RULES entry one of whose names is a whole word of its
+      comm (code and code-insiders are "code", encoder is not)
+    its parent's application, if that came from a rule or from its own
+      parent (a VS Code language server counts as "code")
+    its systemd app scope or service (app-gnome-org.gnome.Nautilus-42.scope
+      -> org.gnome.Nautilus, snap.spotify.spotify-<uuid>.scope -> spotify,
+      docker.service -> docker)
+    its comm
+
+Summing PSS needs smaps_rollup for every process, not just the top
+candidates; at about 0.1 ms per process that is still well under a
+second for a desktop once a minute.
+
+read_pressure() collects the system-wide context for a snapshot: key
+/proc/meminfo fields, PSI some/full avg10/avg60/total for memory and
+some for cpu (/proc/pressure, missing on kernels without PSI), and the
+cumulative /proc/vmstat counters in VMSTAT_FIELDS.
+"""
+import heapq
+import os
+import pwd
+import re
+
+PAGE_KIB = os.sysconf("SC_PAGE_SIZE") // 1024
+CANDIDATES = 3  # smaps_rollup is read for this many times n processes
+
+# application -> names matched as whole words of comm, case-insensitively
+APP_RULES = {
+    "chrome": {"chrome", "chromium"},
+    "firefox": {"firefox", "web content", "isolated web", "webextensions", "rdd process",
+                "socket process", "utility process", "privileged cont"},
+    "brave": {"brave"},
+    "code": {"code"},
+    "slack": {"slack"},
+    "discord": {"discord"},
+    "spotify": {"spotify"},
+    "thunderbird": {"thunderbird"},
+    "libreoffice": {"soffice", "libreoffice"},
+    "docker": {"dockerd", "containerd"},
+}
+MEMINFO_FIELDS = {
+    "MemAvailable": "mem_available_kib",
+    "MemFree": "mem_free_kib",
+    "Cached": "cached_kib",
+    "Buffers": "buffers_kib",
+    "Shmem": "shmem_kib",
+    "Dirty": "dirty_kib",
+    "SwapTotal": "swap_total_kib",
+    "SwapFree": "swap_free_kib",
+}
+PSI_FIELDS = (("memory", "some"), ("memory", "full"), ("cpu", "some"))
+VMSTAT_FIELDS = ("pgmajfault", "pswpin", "pswpout", "oom_kill")
+
+# scopes that say how a process was started, not what it is
+_GENERIC_UNITS = ("session-", "vte-spawn-", "user@", "init.scope", "tmux-spawn-")
+_UNIT_RE = re.compile(r"^(?:app-(?:gnome-|kde-|flatpak-)?)?(?:snap\.)?(.+?)(?:[-.@][0-9a-f-]{6,}|-\d+)?\.(?:scope|service)$")
+
+
+def read_stat(pid, proc="/proc"):
+    """(comm, ppid, starttime, rss_kib) from /proc/pid/stat, or None."""
+    try:
+        with open(f"{proc}/{pid}/stat", "rb") as f:
+            data = f.read()
+    except OSError:
+        return None
+    # comm may contain spaces and parentheses; it ends at the last ')'
+    left = data.find(b"(")
+    right = data.rfind(b")")
+    fields = data[right + 2:].split()
+    # fields[0] is state (field 3); ppid is field 4, starttime 22, rss (pages) 24
+    try:
+        return (data[left + 1:right].decode(errors="replace"), int(fields[1]), int(fields[19]),
+                int(fields[21]) * PAGE_KIB)
+    except (IndexError, ValueError):
+        return None
+
+
+def read_rollup(pid, proc="/proc"):
+    """(pss_kib, uss_kib, swap_kib) from smaps_rollup, or None if unreadable."""
+    try:
+        with open(f"{proc}/{pid}/smaps_rollup", "rb") as f:
+            data = f.read()
+    except OSError:
+        return None
+    values = {}
+    for line in data.splitlines()[1:]:
+        key, _, rest = line.partition(b":")
+        if key in (b"Pss", b"Private_Clean", b"Private_Dirty", b"Swap"):
+            values[key] = int(rest.split()[0])
+    if b"Pss" not in values:
+        return None  # kernel threads have an empty rollup
+    return values[b"Pss"], values.get(b"Private_Clean", 0) + values.get(b"Private_Dirty", 0), values.get(b"Swap", 0)
+
+
+def read_unit(pid, proc="/proc"):
+    """Application named by the process's systemd scope or service, or None."""
+    try:
+        with open(f"{proc}/{pid}/cgroup") as f:
+            data = f.read()
+    except OSError:
+        return None
+    for line in data.splitlines():
+        if line.startswith("0::"):  # cgroup v2
+            unit = line.rsplit("/", 1)[-1]
+            if unit.startswith(_GENERIC_UNITS):
+                return None
+            m = _UNIT_RE.match(unit)
+            if m is None:
+                return None
+            # snap.<snap>.<app>-<uuid>.scope
+            return m.group(1).split(".")[0] if unit.startswith("snap.") else m.group(1)
+    return None
+
+
+def read_mem_total_kib(proc="/proc"):
+    try:
+        with open(f"{proc}/meminfo") as f:
+            for line in f:
+                if line.startswith("MemTotal:"):
+                    return int(line.split()[1])
+    except (OSError, ValueError, IndexError):
+        pass
+    return None
+
+
+def _psi_key(resource, kind, field):
+    return f"{'mem' if resource == 'memory' else resource}_{kind}_{field}"
+
+
+def read_pressure(proc="/proc"):
+    """{column: value} for MEMINFO_FIELDS (KiB), PSI_FIELDS (avg10 / avg60
+    in %, total in microseconds) and VMSTAT_FIELDS; unreadable ones are None."""
+    values = dict.fromkeys(MEMINFO_FIELDS.values())
+    values.update((_psi_key(r, k, f), None) for r, k in PSI_FIELDS for f in ("avg10", "avg60", "total"))
+    values.update(dict.fromkeys(VMSTAT_FIELDS))
+    try:
+        with open(f"{proc}/meminfo") as f:
+            for line in f:
+                key, _, rest = line.partition(":")
+                if key in MEMINFO_FIELDS:
+                    values[MEMINFO_FIELDS[key]] = int(rest.split()[0])
+    except (OSError, ValueError, IndexError):
+        pass
+    for resource in {r for r, _ in PSI_FIELDS}:
+        try:
+            with open(f"{proc}/pressure/{resource}") as f:
+                lines = f.read().splitlines()
+        except OSError:
+            continue  # no PSI (CONFIG_PSI off or psi=0)
+        for line in lines:
+            kind, *pairs = line.split()
+            if (resource, kind) not in PSI_FIELDS:
+                continue
+            for pair in pairs:
+                field, _, value = pair.partition("=")
+                if field in ("avg10", "avg60"):
+                    values[_psi_key(resource, kind, field)] = float(value)
+                elif field == "total":
+                    values[_psi_key(resource, kind, field)] = int(value)
+    try:
+        with open(f"{proc}/vmstat") as f:
+            for line in f:
+                key, _, value = line.partition(" ")
+                if key in VMSTAT_FIELDS:
+                    values[key] = int(value)
+    except (OSError, ValueError):
+        pass
+    return values
+
+
+def _word_re(names):
+    """Matches any of names not preceded or followed by a letter or digit."""
+    alternatives = "|".join(re.escape(name) for name in sorted(names, key=len, reverse=True))
+    return re.compile(rf"(?<![a-z0-9])(?:{alternatives})(?![a-z0-9])", re.IGNORECASE)
+
+
+class Sampler:
+    """Scans /proc for the top memory users; keeps the uid -> user table."""
+
+    def __init__(self, proc="/proc", candidates=CANDIDATES, rules=APP_RULES):
+        self.proc = proc
+        self.candidates = candidates
+        self.rules = [(app, _word_re(names)) for app, names in rules.items()]
+        self.users = {}
+        self.processes = []  # the last scan
+        self.rollups = {}    # pid -> smaps_rollup values, for the last scan
+        self.count = 0       # processes seen by the last scan
+        self.mem_total_kib = read_mem_total_kib(proc)
+
+    def pressure(self):
+        return read_pressure(self.proc)
+
+    def user(self, uid):
+        name = self.users.get(uid)
+        if name is None:
+            try:
+                name = pwd.getpwuid(uid).pw_name
+            except KeyError:
+                name = str(uid)
+            self.users[uid] = name
+        return name
+
+    def scan(self):
+        """[(rss_kib, pid, comm, start, ppid)] for every process."""
+        out = []
+        for entry in os.listdir(self.proc):
+            if not entry.isdigit():
+                continue
+            stat = read_stat(entry, self.proc)
+            if stat is not None:
+                comm, ppid, start, rss_kib = stat
+                out.append((rss_kib, int(entry), comm, start, ppid))
+        self.processes = out
+        self.rollups = {}
+        self.count = len(out)
+        return out
+
+    def rollup(self, pid):
+        if pid not in self.rollups:
+            self.rollups[pid] = read_rollup(pid, self.proc)
+        return self.rollups[pid]
+
+    def top(self, n=10, processes=None):
+        """[(pid, user, command, rss_kib, pmem, pss_kib, uss_kib, swap_kib, start)],
+        the n largest by PSS (RSS where PSS is unreadable)."""
+        processes = self.scan() if processes is None else processes
+        rows = []
+        for rss_kib, pid, comm, start, _ in heapq.nlargest(n * self.candidates, processes):
+            try:
+                uid = os.stat(f"{self.proc}/{pid}").st_uid
+            except OSError:
+                continue  # exited since the scan
+            pss, uss, swap = self.rollup(pid) or (None, None, None)
+            pmem = round(rss_kib * 100 / self.mem_total_kib, 1) if self.mem_total_kib else None
+            rows.append((pid, self.user(uid), comm, rss_kib, pmem, pss, uss, swap, start))
+        return heapq.nlargest(n, rows, key=lambda r: r[5] if r[5] is not None else r[3])
+
+    def app_of(self, comm):
+        for app, pattern in self.rules:
+            if pattern.search(comm):
+                return app
+        return None
+
+    def apps(self, processes=None):
+        """[(app, procs, rss_kib, pss_kib, uss_kib, swap_kib)] over every
+        process with memory, largest PSS first. PSS falls back to RSS (and
+        USS / swap to 0) for processes whose smaps_rollup is unreadable."""
+        processes = self.processes if processes is None else processes
+        by_pid = {pid: (comm, ppid) for _, pid, comm, _, ppid in processes}
+        resolved = {}  # pid -> (app, inheritable)
+
+        def resolve(pid):
+            chain = []
+            while pid in by_pid and pid not in resolved:
+                comm, ppid = by_pid[pid]
+                app = self.app_of(comm)
+                if app is not None:
+                    resolved[pid] = (app, True)
+                    break
+                chain.append(pid)
+                pid = ppid
+            parent = resolved.get(pid)
+            for child in reversed(chain):
+                if parent is not None and parent[1]:
+                    resolved[child] = parent
+                else:
+                    resolved[child] = (read_unit(child, self.proc) or by_pid[child][0], False)
+                parent = resolved[child]
+            return resolved[chain[0]] if chain else resolved.get(pid)
+
+        totals = {}
+        for rss_kib, pid, comm, start, ppid in processes:
+            if not rss_kib:
+                continue  # kernel threads
+            app = resolve(pid)[0]
+            pss, uss, swap = self.rollup(pid) or (rss_kib, 0, 0)
+            row = totals.setdefault(app, [app, 0, 0, 0, 0, 0])
+            row[1] += 1
+            row[2] += rss_kib
+            row[3] += pss
+            row[4] += uss
+            row[5] += swap
+        return sorted((tuple(row) for row in totals.values()), key=lambda r: r[3], reverse=True)
@@ -0,0 +1,277 @@
+#!/usr/bin/env python3
+# sel2in.com tgkprog@gmail.com
+"""Query mem_stats.db from the command line (b/memtrack, b/topm, read1.py).
+
+    memQuery.py top                        latest snapshot
+    memQuery.py nearest "2026-01-16 18:15" snapshot closest to a time
+    memQuery.py before 40m                 latest snapshot at or before a time
+    memQuery.py range 2026-01-16 "2026-01-16 19:00"
+                                           snapshots in a time range
+    memQuery.py history chrome --since 7d  command RSS/PSS over time, using
+                                           hourly rollups once the detail
+                                           has been retained away
+
+Times are "YYYY-MM-DD[ HH:MM[:SS]]" (local), "now", or how long ago, like
+90m, 2h, 3d (a leading "-" is accepted too, after "--"). --apps shows
+per-application totals instead of processes and -n limits the rows.
+--format table|csv|json picks the renderer.
+
+Each lookup returns a cursor, and the renderers write rows as they come
+off it, so a long history never sits in memory. Every query starts with
+a seek on snapshots_ts (or the hour of hourly's primary key) and reaches
+samples through its (snapshot_id, pid) key, so the cost follows the time
+range asked for, not the size of the file. There is deliberately no
+command index on samples; it would grow the file by half.
+"""
+import argparse
+import csv
+import json
+import re
+import sys
+import time
+from datetime import datetime
+
+import memDb
+
+TOP_N = 10
+FORMATS = ("table", "csv", "json")
+TIME_FORMATS = ("%Y-%m-%d %H:%M:%S", "%Y-%m-%d %H:%M", "%Y-%m-%d")
+_RELATIVE_RE = re.compile(r"^-?(\d+(?:\.\d+)?)([smhd])$")
+_UNIT_SECONDS = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+TEXT_WIDTHS = {"command": 24, "app": 24, "largest": 24, "timestamp": 19, "since": 19, "last_seen": 19}
+
+
+def parse_time(text, now=None):
+    """Epoch seconds for a local time, "now" or N[smhd] ago; ValueError otherwise."""
+    now = time.time() if now is None else now
+    text = text.strip()
+    if text == "now":
+        return int(now)
+    m = _RELATIVE_RE.match(text)
+    if m:
+        return int(now - float(m.group(1)) * _UNIT_SECONDS[m.group(2)])
+    for fmt in TIME_FORMATS:
+        try:
+            return memDb.to_epoch(datetime.strptime(text, fmt))
+        except ValueError:
+            pass
+    raise ValueError(f"unrecognized time {text!r} (use YYYY-MM-DD[ HH:MM[:SS]], now or N[smhd] ago)")
+
+
+def find(conn, epoch, mode="nearest"):
+    """ts of the snapshot nearest to (or at or before) epoch, or None."""
+    return memDb.nearest(conn, epoch) if mode == "nearest" else memDb.at_or_before(conn, epoch)
+
+
+def top(conn, ts, limit=TOP_N):
+    """Cursor over one snapshot's processes, largest RSS first."""
+    return conn.execute(
+        "SELECT pid, user, command, rss_mb, pss_mb, uss_mb, swap_mb, pmem FROM memory_log "
+        "WHERE ts = ? ORDER BY rss_mb DESC LIMIT ?", (ts, limit))
+
+
+def top_apps(conn, ts, limit=TOP_N):
+    """Cursor over one snapshot's application totals, largest PSS first."""
+    return conn.execute(
+        "SELECT app, procs, rss_mb, pss_mb, uss_mb, swap_mb FROM app_log "
+        "WHERE ts = ? ORDER BY pss_mb DESC LIMIT ?", (ts, limit))
+
+
+def snapshot_range(conn, start, end):
+    """Cursor over the snapshots with start <= ts <= end, oldest first."""
+    return conn.execute("""
+        SELECT datetime(sn.ts, 'unixepoch', 'localtime') AS timestamp,
+               sn.procs AS procs,
+               sn.mem_total_kib / 1024.0 AS mem_total_mb,
+               p.mem_available_kib / 1024.0 AS available_mb,
+               p.mem_some_avg10 / 100.0 AS psi_mem_avg10,
+               (SELECT SUM(rss_kib) FROM samples WHERE snapshot_id = sn.id) / 1024.0 AS top_rss_mb,
+               (SELECT c.name FROM samples sa JOIN commands c ON c.id = sa.command_id
+                WHERE sa.snapshot_id = sn.id ORDER BY sa.rss_kib DESC LIMIT 1) AS largest
+        FROM snapshots sn
+        LEFT JOIN pressure p ON p.snapshot_id = sn.id
+        WHERE sn.ts BETWEEN ? AND ?
+        ORDER BY sn.ts
+    """, (start, end))
+
+
+def pressure(conn, ts):
+    """Cursor over the system-wide pressure of the snapshot at ts (no row
+    before schema 7). The vmstat counters are cumulative since boot, so
+    *_delta is the change since the previous snapshot (None without one,
+    the raw count after a reboot)."""
+    return conn.execute("""
+        SELECT cur.*,
+               CASE WHEN prev.pgmajfault IS NULL THEN NULL
+                    WHEN cur.pgmajfault >= prev.pgmajfault THEN cur.pgmajfault - prev.pgmajfault
+                    ELSE cur.pgmajfault END AS pgmajfault_delta,
+               CASE WHEN prev.pswpin IS NULL THEN NULL
+                    WHEN cur.pswpin >= prev.pswpin THEN cur.pswpin - prev.pswpin
+                    ELSE cur.pswpin END AS pswpin_delta,
+               CASE WHEN prev.oom_kill IS NULL THEN NULL
+                    WHEN cur.oom_kill >= prev.oom_kill THEN cur.oom_kill - prev.oom_kill
+                    ELSE cur.oom_kill END AS oom_kill_delta
+        FROM pressure_log cur
+        LEFT JOIN pressure prev ON prev.snapshot_id = (
+            SELECT id FROM snapshots WHERE ts < cur.ts ORDER BY ts DESC LIMIT 1)
+        WHERE cur.ts = ?
+    """, (ts,))
+
+
+def history(conn, command, start, end):
+    """Cursor over one command's memory between start and end, oldest
+    first: per-snapshot totals (all its pids summed) while the detail is
+    kept, hourly averages and maxima (procs unknown) after that."""
+    return conn.execute("""
+        SELECT timestamp, resolution, snapshots, procs, rss_mb, rss_max_mb, pss_mb FROM (
+            SELECT sn.ts AS ts,
+                   datetime(sn.ts, 'unixepoch', 'localtime') AS timestamp,
+                   'snapshot' AS resolution,
+                   1 AS snapshots,
+                   count(*) AS procs,
+                   SUM(sa.rss_kib) / 1024.0 AS rss_mb,
+                   SUM(sa.rss_kib) / 1024.0 AS rss_max_mb,
+                   SUM(sa.pss_kib) / 1024.0 AS pss_mb
+            FROM snapshots sn
+            CROSS JOIN samples sa ON sa.snapshot_id = sn.id  -- keep the ts range as the outer loop
+            WHERE sn.ts BETWEEN ?2 AND ?3 AND sa.command_id = (SELECT id FROM commands WHERE name = ?1)
+            GROUP BY sn.ts, sn.id
+            UNION ALL
+            SELECT h.hour, datetime(h.hour, 'unixepoch', 'localtime'), 'hour', h.snapshots, NULL,
+                   h.rss_avg_kib / 1024.0, h.rss_max_kib / 1024.0, h.pss_avg_kib / 1024.0
+            FROM hourly h
+            WHERE h.hour BETWEEN ?2 AND ?3 AND h.command_id = (SELECT id FROM commands WHERE name = ?1)
+        )
+        ORDER BY ts
+    """, (command, start, end))
+
+
+def _cell(value, width):
+    if value is None:
+        text = "-"
+    elif isinstance(value, float):
+        text = f"{value:.2f}"
+    else:
+        text = str(value)
+    if len(text) > width:
+        text = text[:width - 2] + ".."
+    return f"{text:<{width}}"
+
+
+def render_table(cursor, out=None):
+    """Fixed-width columns (TEXT_WIDTHS, the rest 11) so rows print as
+    they are read; returns the row count."""
+    out = out or sys.stdout
+    columns = [d[0] for d in cursor.description]
+    widths = [TEXT_WIDTHS.get(name, max(11, len(name) + 1)) for name in columns]
+    out.write(" ".join(f"{name:<{w}}" for name, w in zip(columns, widths)).rstrip() + "\n")
+    out.write("-" * (sum(widths) + len(widths) - 1) + "\n")
+    count = 0
+    for row in cursor:
+        out.write(" ".join(_cell(value, w) for value, w in zip(row, widths)).rstrip() + "\n")
+        count += 1
+    return count
+
+
+def render_csv(cursor, out=None):
+    writer = csv.writer(out or sys.stdout)
+    writer.writerow([d[0] for d in cursor.description])
+    count = 0
+    for row in cursor:
+        writer.writerow(row)
+        count += 1
+    return count
+
+
+def render_json(cursor, out=None):
+    """A JSON array of objects, one per line, written as rows arrive."""
+    out = out or sys.stdout
+    columns = [d[0] for d in cursor.description]
+    count = 0
+    out.write("[")
+    for row in cursor:
+        out.write(",\n " if count else "\n ")
+        out.write(json.dumps(dict(zip(columns, row))))
+        count += 1
+    out.write("\n]\n" if count else "]\n")
+    return count
+
+
+RENDERERS = {"table": render_table, "csv": render_csv, "json": render_json}
+
+
+def _common_options(suppress=False):
+    """The options accepted before and after the query name. The copy on
+    the subcommands has no defaults, or it would reset options given first."""
+    def default(value):
+        return argparse.SUPPRESS if suppress else value
+
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument("--db", default=default(memDb.DB_PATH), help=f"database (default: {memDb.DB_PATH})")
+    common.add_argument("--format", choices=FORMATS, default=default("table"), help="output format (default: table)")
+    common.add_argument("-n", "--top", type=int, default=default(TOP_N), help=f"rows per snapshot (default: {TOP_N})")
+    common.add_argument("--apps", action="store_true", default=default(False),
+                        help="per-application totals instead of processes")
+    return common
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Query the memory history in mem_stats.db",
+                                     parents=[_common_options()])
+    common = _common_options(suppress=True)
+    commands = parser.add_subparsers(dest="query", required=True)
+    commands.add_parser("top", parents=[common], help="latest snapshot")
+    for name, text in (("nearest", "snapshot closest to TIME"), ("before", "latest snapshot at or before TIME")):
+        sub = commands.add_parser(name, parents=[common], help=text)
+        sub.add_argument("time", help='"YYYY-MM-DD HH:MM[:SS]", now or N[smhd] ago')
+    sub = commands.add_parser("range", parents=[common], help="snapshots between START and END")
+    sub.add_argument("start")
+    sub.add_argument("end", nargs="?", default="now")
+    sub = commands.add_parser("history", parents=[common], help="one command's memory over time")
+    sub.add_argument("command", help="command name as stored (ps comm)")
+    sub.add_argument("--since", default="1d", help="start time (default: 1d ago)")
+    sub.add_argument("--until", default="now", help="end time (default: now)")
+    return parser
+
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    render = RENDERERS[args.format]
+    try:
+        if args.query in ("top", "nearest", "before"):
+            target = parse_time("now" if args.query == "top" else args.time)
+        elif args.query == "range":
+            start, end = parse_time(args.start), parse_time(args.end)
+        else:
+            start, end = parse_time(args.since), parse_time(args.until)
+    except ValueError as e:
+        parser.error(str(e))
+
+    conn = memDb.connect(args.db)
+    try:
+        if args.query in ("top", "nearest", "before"):
+            ts = find(conn, target, "before" if args.query == "top" else args.query)
+            if ts is None:
+                print(f"No snapshot {'near' if args.query == 'nearest' else 'at or before'} "
+                      f"{memDb.from_epoch(target)}", file=sys.stderr)
+                return 1
+            if args.format == "table":
+                away = abs(ts - target) / 60
+                print(f"Snapshot: {memDb.from_epoch(ts)}" + (f" ({away:.1f} mins from target)" if away >= 1 else ""))
+            cursor = (top_apps if args.apps else top)(conn, ts, args.top)
+        elif args.query == "range":
+            cursor = snapshot_range(conn, start, end)
+        else:
+            cursor = history(conn, args.command, start, end)
+        if render(cursor) == 0 and args.format == "table":
+            print("No rows" + (" (no per-app totals before schema 4)" if args.apps else ""))
+    except BrokenPipeError:
+        pass  # e.g. piped into head
+    finally:
+        conn.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+# sel2in.com tgkprog@gmail.com
+"""Retention for mem_stats.db: hourly rollups, batched deletes, incremental vacuum.
+
+Snapshots older than keep_days are collapsed into `hourly` (schema 5):
+one row per local hour and command, holding how many snapshots the
+command was in and the min / avg / max of its total RSS and PSS across
+them (all of a command's pids in a snapshot are summed first). Each batch
+covers batch_hours whole hours, is rolled up and deleted (samples,
+app_samples, pressure, snapshots) in one transaction, so an interrupted
+run leaves no half-rolled hour, and is followed by PRAGMA
+incremental_vacuum of up to vacuum_pages pages. The write lock is held
+for one batch at a time and the file shrinks as it goes.
+
+memTrack.py runs a bounded pass (max_batches) after each commit, so a
+long backlog drains over several windows without stalling sampling.
+`python3 memRetain.py` runs it to completion by hand.
+
+Files created before auto_vacuum=INCREMENTAL keep their free pages until
+`python3 memDb.py` VACUUMs them once.
+"""
+import argparse
+import time
+
+import memDb
+
+KEEP_DAYS = 30      # full detail for this long; 0 keeps everything
+BATCH_HOURS = 6     # hours of snapshots rolled up and deleted per transaction
+VACUUM_PAGES = 512  # pages returned to the filesystem after each batch
+MAX_BATCHES = 12    # per pass from the sampler
+
+# local hour start of a snapshot; matches _hour_start for offsets like +05:30
+HOUR_SQL = "CAST(strftime('%s', strftime('%Y-%m-%d %H:00:00', sn.ts, 'unixepoch', 'localtime'), 'utc') AS INTEGER)"
+
+ROLLUP_SQL = f"""
+    WITH per AS (
+        SELECT {HOUR_SQL} AS hour, sa.command_id AS command_id,
+               SUM(sa.rss_kib) AS rss, SUM(sa.pss_kib) AS pss
+        FROM snapshots sn JOIN samples sa ON sa.snapshot_id = sn.id
+        WHERE sn.ts >= ? AND sn.ts < ?
+        GROUP BY sn.id, sa.command_id
+    )
+    INSERT INTO hourly
+    SELECT hour, command_id, count(*),
+           min(rss), CAST(round(avg(rss)) AS INTEGER), max(rss),
+           min(pss), CAST(round(avg(pss)) AS INTEGER), max(pss)
+    FROM per WHERE true
+    GROUP BY hour, command_id
+    ON CONFLICT (hour, command_id) DO UPDATE SET
+        snapshots = snapshots + excluded.snapshots,
+        rss_min_kib = min(rss_min_kib, excluded.rss_min_kib),
+        rss_avg_kib = (rss_avg_kib * snapshots + excluded.rss_avg_kib * excluded.snapshots)
+                      / (snapshots + excluded.snapshots),
+        rss_max_kib = max(rss_max_kib, excluded.rss_max_kib),
+        pss_min_kib = min(IFNULL(pss_min_kib, excluded.pss_min_kib), IFNULL(excluded.pss_min_kib, pss_min_kib)),
+        pss_avg_kib = IFNULL((pss_avg_kib * snapshots + excluded.pss_avg_kib * excluded.snapshots)
+                             / (snapshots + excluded.snapshots), IFNULL(pss_avg_kib, excluded.pss_avg_kib)),
+        pss_max_kib = max(IFNULL(pss_max_kib, excluded.pss_max_kib), IFNULL(excluded.pss_max_kib, pss_max_kib))
+"""
+
+IN_RANGE = "(SELECT id FROM snapshots WHERE ts >= ? AND ts < ?)"
+
+
+def _hour_start(epoch):
+    return memDb.to_epoch(memDb.from_epoch(epoch).replace(minute=0, second=0, microsecond=0))
+
+
+def retain(conn, keep_days=KEEP_DAYS, batch_hours=BATCH_HOURS, vacuum_pages=VACUUM_PAGES,
+           max_batches=None, now=None):
+    """Roll up and delete snapshots older than keep_days, oldest first.
+    Returns (batches, snapshots deleted, pages freed). The connection must
+    not have a transaction open."""
+    if keep_days <= 0:
+        return 0, 0, 0
+    cutoff = _hour_start((time.time() if now is None else now) - keep_days * 86400)
+    incremental = conn.execute("PRAGMA auto_vacuum").fetchone()[0] == 2
+    batches = deleted = freed = 0
+    while max_batches is None or batches < max_batches:
+        oldest = conn.execute("SELECT min(ts) FROM snapshots").fetchone()[0]
+        if oldest is None or oldest >= cutoff:
+            break
+        start = _hour_start(oldest)
+        end = min(start + batch_hours * 3600, cutoff)
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute(ROLLUP_SQL, (start, end))
+            conn.execute(f"DELETE FROM samples WHERE snapshot_id IN {IN_RANGE}", (start, end))
+            conn.execute(f"DELETE FROM app_samples WHERE snapshot_id IN {IN_RANGE}", (start, end))
+            conn.execute(f"DELETE FROM pressure WHERE snapshot_id IN {IN_RANGE}", (start, end))
+            deleted += conn.execute("DELETE FROM snapshots WHERE ts >= ? AND ts < ?", (start, end)).rowcount
+            conn.commit()
+        except BaseException:
+            conn.rollback()
+            raise
+        batches += 1
+        if incremental and vacuum_pages:
+            before = conn.execute("PRAGMA freelist_count").fetchone()[0]
+            conn.execute(f"PRAGMA incremental_vacuum({int(vacuum_pages)})").fetchall()
+            freed += before - conn.execute("PRAGMA freelist_count").fetchone()[0]
+    return batches, deleted, freed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Roll old mem_stats.db snapshots up into hourly rows")
+    parser.add_argument("db", nargs="?", default=memDb.DB_PATH, help=f"database (default: {memDb.DB_PATH})")
+    parser.add_argument("--keep-days", type=float, default=KEEP_DAYS,
+                        help=f"Days of full detail to keep (default: {KEEP_DAYS})")
+    parser.add_argument("--batch-hours", type=int, default=BATCH_HOURS,
+                        help=f"Hours rolled up per transaction (default: {BATCH_HOURS})")
+    parser.add_argument("--vacuum-pages", type=int, default=VACUUM_PAGES,
+                        help=f"Pages freed after each batch (default: {VACUUM_PAGES})")
+    args = parser.parse_args()
+    if args.batch_hours <= 0:
+        parser.error("--batch-hours must be positive")
+    conn = memDb.connect(args.db)
+    start = time.perf_counter()
+    batches, deleted, freed = retain(conn, args.keep_days, args.batch_hours, args.vacuum_pages)
+    conn.close()
+    print(f"{args.db}: {deleted} snapshots rolled up in {batches} batches, {freed} pages freed "
+          f"in {time.perf_counter() - start:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,81 +1,170 @@
 #!/usr/bin/env python3
+import argparse
 import sqlite3
-import subprocess
+import signal
 import datetime
 import os
 import sys
+import threading
+import time
+
+import memDb
+import memProc
+import memRetain
 
 # Configuration
-DB_PATH = "/home/ubuntu/code/gt/tgk/ubu/sys/mem_stats.db"
+DB_PATH = memDb.DB_PATH
+INTERVAL = 60        # seconds between samples in --daemon mode
+COMMIT_EVERY = 300   # seconds of samples --daemon may lose on a crash
+TOP_N = 10
+KEEP_DAYS = memRetain.KEEP_DAYS  # older snapshots become hourly rollups; 0 keeps all
 
 def init_db():
     conn = sqlite3.connect(DB_PATH)
-    c = conn.cursor()
-    c.execute('''
-        CREATE TABLE IF NOT EXISTS memory_log (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            timestamp DATETIME,
-            pid INTEGER,
-            user TEXT,
-            command TEXT,
-            rss_mb REAL,
-            pmem REAL
-        )
-    ''')
-    conn.commit()
+    memDb.migrate(conn)  # creates memory_log on first run
     return conn
 
+_SAMPLER = None
+
+def _sampler():
+    global _SAMPLER
+    if _SAMPLER is None:
+        _SAMPLER = memProc.Sampler()  # keeps its uid -> user table between samples
+    return _SAMPLER
+
 def get_top_memory_processes(limit=10):
-    # ps -eo pid,user,rss,%mem,comm --sort=-rss
-    cmd = ["ps", "-eo", "pid,user,rss,%mem,comm", "--sort=-rss"]
+    """Top processes by PSS, read from /proc in-process (see memProc.py)."""
     try:
-        out = subprocess.run(cmd, stdout=subprocess.PIPE, text=True, check=True).stdout
-    except Exception as e:
-        print(f"Error running ps: {e}")
+        return _sampler().top(limit)
+    except OSError as e:
+        print(f"Error reading /proc: {e}")
         return []
 
-    processes = []
-    lines = out.strip().split("\n")[1:] # Skip header
-    
-    for line in lines[:limit]:
-        parts = line.split(maxsplit=4)
-        if len(parts) < 5: continue
-        
-        try:
-            pid = int(parts[0])
-            user = parts[1]
-            rss_kb = float(parts[2])
-            pmem = float(parts[3])
-            comm = parts[4]
-            
-            rss_mb = rss_kb / 1024.0
-            processes.append((pid, user, comm, rss_mb, pmem))
-        except ValueError:
-            continue
-            
-    return processes
-
-def log_to_db(conn, processes):
-    c = conn.cursor()
-    ts = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    
-    for p in processes:
-        pid, user, comm, rss_mb, pmem = p
-        c.execute('''
-            INSERT INTO memory_log (timestamp, pid, user, command, rss_mb, pmem)
-            VALUES (?, ?, ?, ?, ?, ?)
-        ''', (ts, pid, user, comm, rss_mb, pmem))
-    
-    conn.commit()
-    print(f"Logged {len(processes)} processes at {ts}")
+def get_app_totals():
+    """Per-application totals over every process of the last scan."""
+    try:
+        return _sampler().apps()
+    except OSError as e:
+        print(f"Error reading /proc: {e}")
+        return []
+
+def take_snapshot(limit=TOP_N):
+    """One sample, held in memory until write_snapshots stores it."""
+    processes = get_top_memory_processes(limit)
+    sampler = _sampler()
+    return (memDb.to_epoch(datetime.datetime.now().replace(microsecond=0)), processes,
+            sampler.mem_total_kib, sampler.count, get_app_totals(), sampler.pressure())
+
+def write_snapshots(conn, snapshots, caches=None):
+    """Store buffered snapshots in one short BEGIN IMMEDIATE ... COMMIT,
+    so other writers (memRetain, memLeak, a one-shot memTrack) only wait
+    for the write itself."""
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        for ts, processes, mem_total_kib, count, apps, pressure in snapshots:
+            memDb.add_snapshot(conn, ts, processes, mem_total_kib, count, caches, apps, pressure)
+        conn.commit()
+    except BaseException:
+        conn.rollback()
+        raise
+
+def log_to_db(conn, snapshot):
+    ts, processes, _, _, apps, _ = snapshot
+    write_snapshots(conn, [snapshot])
+    print(f"Logged {len(processes)} processes and {len(apps)} apps at {memDb.from_epoch(ts)}")
+
+def apply_retention(conn, keep_days=KEEP_DAYS, vacuum_pages=memRetain.VACUUM_PAGES):
+    """One bounded retention pass (see memRetain.py); call with no open transaction."""
+    try:
+        batches, deleted, freed = memRetain.retain(conn, keep_days, vacuum_pages=vacuum_pages,
+                                                   max_batches=memRetain.MAX_BATCHES)
+    except sqlite3.Error as e:
+        print(f"Error applying retention: {e}")
+        return
+    if batches:
+        print(f"Retention: rolled up {deleted} snapshots older than {keep_days} days, freed {freed} pages")
+
+def flush(conn, pending, caches):
+    """Write and clear the buffered snapshots; on a busy or failing
+    database keep them for the next window."""
+    if not pending:
+        return
+    try:
+        write_snapshots(conn, pending, caches)
+    except sqlite3.Error as e:
+        print(f"Error writing {len(pending)} snapshots, will retry: {e}")
+        for cache in caches.values():
+            cache.clear()  # ids interned in the rolled-back transaction are gone
+        return
+    pending.clear()
+
+def run_daemon(interval=INTERVAL, commit_every=COMMIT_EVERY, limit=TOP_N, keep_days=KEEP_DAYS,
+               vacuum_pages=memRetain.VACUUM_PAGES):
+    """Sample every interval seconds on one connection until SIGTERM/SIGINT.
+    Snapshots are buffered in memory and written together every
+    commit_every seconds (and on shutdown) in one short transaction, so the
+    fsync cost is paid once per window instead of once per row and the
+    write lock is only held while they are stored. Each write is followed
+    by a bounded retention pass."""
+    stop = threading.Event()
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        signal.signal(sig, lambda signum, frame: stop.set())
+
+    conn = init_db()
+    conn.execute("PRAGMA journal_mode=WAL")  # readers (meman, read1) never wait for a write
+    conn.execute("PRAGMA synchronous=NORMAL")
+    caches = {"users": {}, "commands": {}, "apps": {}}
+    print(f"memTrack daemon: every {interval}s, commit every {commit_every}s, db {DB_PATH}")
+    pending = []
+    last_commit = next_sample = time.monotonic()
+    apply_retention(conn, keep_days, vacuum_pages)
+    try:
+        while not stop.is_set():
+            pending.append(take_snapshot(limit))
+            now = time.monotonic()
+            if now - last_commit >= commit_every:
+                flush(conn, pending, caches)
+                last_commit = now
+                apply_retention(conn, keep_days, vacuum_pages)
+            next_sample += interval
+            stop.wait(max(0.0, next_sample - time.monotonic()))
+    finally:
+        count = len(pending)
+        flush(conn, pending, caches)
+        conn.close()
+        print(f"memTrack daemon stopped, flushed {count - len(pending)} pending snapshots")
 
 def main():
+    global DB_PATH
+    parser = argparse.ArgumentParser(description="Log the top memory users to mem_stats.db")
+    parser.add_argument("--db", default=DB_PATH, help=f"database (default: {DB_PATH})")
+    parser.add_argument("--daemon", action="store_true", help="Keep running and sample every --interval")
+    parser.add_argument("--interval", type=float, default=INTERVAL,
+                        help=f"Seconds between samples with --daemon (default: {INTERVAL})")
+    parser.add_argument("--commit-every", type=float, default=COMMIT_EVERY,
+                        help=f"Seconds between commits with --daemon, i.e. how much a crash can lose "
+                             f"(default: {COMMIT_EVERY}, 0 = every sample)")
+    parser.add_argument("-n", "--top", type=int, default=TOP_N, help=f"Processes per snapshot (default: {TOP_N})")
+    parser.add_argument("--keep-days", type=float, default=KEEP_DAYS,
+                        help=f"Days of full detail; older snapshots are rolled up hourly per command "
+                             f"(default: {KEEP_DAYS}, 0 = keep everything)")
+    parser.add_argument("--vacuum-pages", type=int, default=memRetain.VACUUM_PAGES,
+                        help=f"Pages returned to the filesystem after each retention batch "
+                             f"(default: {memRetain.VACUUM_PAGES})")
+    args = parser.parse_args()
+    if args.interval <= 0:
+        parser.error("--interval must be positive")
+    DB_PATH = args.db
+
     # Ensure directory exists
-    os.makedirs(os.path.dirname(DB_PATH), exist_ok=True)
+    os.makedirs(os.path.dirname(os.path.abspath(DB_PATH)), exist_ok=True)
     
+    if args.daemon:
+        run_daemon(args.interval, args.commit_every, args.top, args.keep_days, args.vacuum_pages)
+        return
     conn = init_db()
-    top_procs = get_top_memory_processes(10)
-    log_to_db(conn, top_procs)
+    log_to_db(conn, take_snapshot(args.top))
+    apply_retention(conn, args.keep_days, args.vacuum_pages)
     conn.close()
 
 if __name__ == "__main__":
@@ -1,18 +1,18 @@
 #!/usr/bin/env python3
-import sqlite3
+import argparse
 import subprocess
 import os
 import sys
 from datetime import datetime, timedelta
 
+import memDb
+import memQuery
+
 # Configuration
-DB_PATH = "/home/ubuntu/code/gt/tgk/ubu/sys/mem_stats.db"
+DB_PATH = memDb.DB_PATH
 
 def get_db_connection():
-    if not os.path.exists(DB_PATH):
-        print(f"Error: Database not found at {DB_PATH}")
-        sys.exit(1)
-    return sqlite3.connect(DB_PATH)
+    return memDb.connect(DB_PATH)
 
 def get_last_logout_time():
     user = os.environ.get('SUDO_USER') or os.environ.get('USER')
@@ -58,38 +58,20 @@ def get_last_logout_time():
 
     return None
 
-def get_memory_stats(conn, target_time):
-    # Find the closest snapshot to target_time
-    # We look for a record with the smallest time difference
-    
-    target_str = target_time.strftime("%Y-%m-%d %H:%M:%S")
-    c = conn.cursor()
-    
-    # First, find the closest distinct timestamp
-    c.execute("""
-        SELECT timestamp 
-        FROM memory_log 
-        ORDER BY ABS(strftime('%s', timestamp) - strftime('%s', ?)) ASC 
-        LIMIT 1
-    """, (target_str,))
-    
-    row = c.fetchone()
-    if not row:
+def get_memory_stats(conn, target_time, apps=False):
+    # Find the closest snapshot to target_time: one index probe either side
+    ts = memQuery.find(conn, memDb.to_epoch(target_time), "nearest")
+    if ts is None:
         return None, []
     
-    actual_time_str = row[0]
-    
-    # Now fetch the top 10 processes for that timestamp
-    c.execute("""
-        SELECT pid, command, rss_mb, pmem 
-        FROM memory_log 
-        WHERE timestamp = ? 
-        ORDER BY rss_mb DESC 
-        LIMIT 10
-    """, (actual_time_str,))
-    
-    data = c.fetchall()
-    return datetime.strptime(actual_time_str, "%Y-%m-%d %H:%M:%S"), data
+    if apps:
+        # Per-application totals (empty for snapshots taken before schema 4)
+        data = [(app, procs, rss_mb, pss_mb) for app, procs, rss_mb, pss_mb, _, _ in memQuery.top_apps(conn, ts, 10)]
+        return memDb.from_epoch(ts), data
+
+    # Now fetch the top 10 processes for that snapshot
+    data = [(row[0], row[2], row[3], row[7]) for row in memQuery.top(conn, ts, 10)]
+    return memDb.from_epoch(ts), data
 
 def print_table(title, data, timestamp):
     print(f"\n{title} (Snapshot: {timestamp})")
@@ -101,7 +83,52 @@ def print_table(title, data, timestamp):
         name_disp = (name[:22] + '..') if len(name) > 22 else name
         print(f"{pid:<8} {name_disp:<25} {rss:<12.2f} {pmem:<8.1f}")
 
+def get_pressure(conn, timestamp):
+    """System-wide pressure of the snapshot at timestamp as a dict, or None
+    (snapshots taken before schema 7)."""
+    cursor = memQuery.pressure(conn, memDb.to_epoch(timestamp))
+    row = cursor.fetchone()
+    return dict(zip([d[0] for d in cursor.description], row)) if row else None
+
+def print_pressure(p):
+    if p is None:
+        print("Pressure: not recorded for this snapshot (memTrack older than schema 7)")
+        return
+    def mb(value):
+        return "?" if value is None else f"{value:.0f}"
+    def pct(avg10, avg60):
+        return "n/a" if avg10 is None else f"{avg10:.2f}/{avg60:.2f}"
+    swap_used = None if p["swap_total_mb"] is None else p["swap_total_mb"] - p["swap_free_mb"]
+    print(f"Memory:   available {mb(p['mem_available_mb'])} MB, free {mb(p['mem_free_mb'])} MB, "
+          f"cache {mb(p['cached_mb'])} MB, buffers {mb(p['buffers_mb'])} MB, "
+          f"swap used {mb(swap_used)} of {mb(p['swap_total_mb'])} MB")
+    print(f"PSI %:    memory some {pct(p['mem_some_avg10'], p['mem_some_avg60'])}, "
+          f"full {pct(p['mem_full_avg10'], p['mem_full_avg60'])}, "
+          f"cpu some {pct(p['cpu_some_avg10'], p['cpu_some_avg60'])} (avg10/avg60)")
+    def delta(name):
+        return "?" if p[f"{name}_delta"] is None else p[f"{name}_delta"]
+    print(f"Since previous snapshot: {delta('pgmajfault')} major faults, {delta('pswpin')} pages swapped in, "
+          f"{delta('oom_kill')} OOM kills")
+
+def print_apps_table(title, data, timestamp):
+    print(f"\n{title} (Snapshot: {timestamp})")
+    if not data:
+        print("No per-app totals recorded for this snapshot (memTrack older than schema 4)")
+        return
+    print(f"{'App':<25} {'Procs':<7} {'PSS (MB)':<12} {'RSS (MB)':<12}")
+    print("-" * 58)
+
+    for app, procs, rss, pss in data:
+        name_disp = (app[:22] + '..') if len(app) > 22 else app
+        print(f"{name_disp:<25} {procs:<7} {pss:<12.2f} {rss:<12.2f}")
+
 def main():
+    parser = argparse.ArgumentParser(description="Top memory users around the last logout")
+    parser.add_argument("--apps", action="store_true",
+                        help="Show per-application totals (all processes of an app summed) instead of PIDs")
+    args = parser.parse_args()
+    show = print_apps_table if args.apps else print_table
+
     print(" Analyzing memory usage around last logout...")
     
     logout_time = get_last_logout_time()
@@ -115,18 +142,19 @@ def main():
     
     
     # Time 1: Logout time
-    ts1, data1 = get_memory_stats(conn, logout_time)
+    ts1, data1 = get_memory_stats(conn, logout_time, args.apps)
     
     # Time 2: 40 minutes before logout
     target_time_pre = logout_time - timedelta(minutes=40)
-    ts2, data2 = get_memory_stats(conn, target_time_pre)
+    ts2, data2 = get_memory_stats(conn, target_time_pre, args.apps)
     
     if ts1:
         delta = abs((ts1 - logout_time).total_seconds()) / 60
         warning = ""
         if delta > 5:
             warning = f" [WARNING: Data is {delta:.1f} mins away from target]"
-        print_table(f"TOP 10 APPS AT LOGOUT{warning}", data1, ts1)
+        show(f"TOP 10 APPS AT LOGOUT{warning}", data1, ts1)
+        print_pressure(get_pressure(conn, ts1))
     else:
         print(f"\nNo data found near logout time ({logout_time})")
         
@@ -135,7 +163,8 @@ def main():
         warning = ""
         if delta > 5:
             warning = f" [WARNING: Data is {delta:.1f} mins away from target]"
-        print_table(f"TOP 10 APPS 40 MINS PRIOR{warning}", data2, ts2)
+        show(f"TOP 10 APPS 40 MINS PRIOR{warning}", data2, ts2)
+        print_pressure(get_pressure(conn, ts2))
     else:
         print(f"\nNo data found near 40 mins prior ({target_time_pre})")
 
@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+# sel2in.com tgkprog@gmail.com
+"""Per-process heat attribution for temperatureWarn.py.
+
+Each monitor tick reads utime+stime from /proc/[pid]/stat for every
+process, turns the delta since the previous tick into CPU cores used, and
+keeps a time-weighted moving average per process ("heat"). Processes are
+keyed by (pid, starttime) so a recycled PID starts a fresh series.
+
+The ranking is sampled on the same tick as the temperature, so it can be
+stored with the snapshot and shows which workload caused a spike. The
+mitigation ladder takes its targets from here instead of a name list;
+kernel threads, ALLOW_NAMES and the monitor's own process tree are never
+targeted.
+"""
+import math
+import os
+
+CLK_TCK = os.sysconf("SC_CLK_TCK")
+TAU = 30.0        # seconds; time constant of the heat average
+MIN_HEAT = 0.05   # cores; below this a process is not worth throttling
+
+# never throttled, stopped or killed
+ALLOW_NAMES = {
+    "systemd", "init", "kthreadd", "Xorg", "Xwayland", "gnome-shell", "kwin_x11",
+    "kwin_wayland", "sshd", "dbus-daemon", "pipewire", "pulseaudio", "wireplumber",
+    "gdm", "gdm3", "lightdm", "sddm", "login", "systemd-journal", "systemd-logind",
+    "NetworkManager", "Xvnc", "sudo", "temperatureWarn",
+}
+
+
+def read_stat(pid, proc="/proc"):
+    """(comm, ppid, cpu_ticks, starttime) from /proc/pid/stat, or None."""
+    try:
+        with open(f"{proc}/{pid}/stat", "rb") as f:
+            data = f.read()
+    except OSError:
+        return None
+    # comm may contain spaces and parentheses; it ends at the last ')'
+    left = data.find(b"(")
+    right = data.rfind(b")")
+    comm = data[left + 1:right].decode(errors="replace")
+    fields = data[right + 2:].split()
+    # fields[0] is state (field 3); utime/stime are fields 14/15, starttime 22
+    return comm, int(fields[1]), int(fields[11]) + int(fields[12]), int(fields[19])
+
+
+def _ancestors(pid, proc="/proc"):
+    seen = set()
+    while pid > 1 and pid not in seen:
+        seen.add(pid)
+        stat = read_stat(pid, proc)
+        if stat is None:
+            break
+        pid = stat[1]
+    return seen
+
+
+class HeatTracker:
+    """Rolling CPU 'heat' per process, sampled once per monitor tick."""
+
+    def __init__(self, proc="/proc", tau=TAU, allow_names=ALLOW_NAMES):
+        self.proc = proc
+        self.tau = tau
+        self.allow_names = set(allow_names)
+        self.allow_pids = _ancestors(os.getpid(), proc)
+        self.last_time = None
+        self.ticks = {}  # (pid, starttime) -> cpu ticks at last sample
+        self.heat = {}   # (pid, starttime) -> cores, moving average
+        self.comm = {}   # (pid, starttime) -> comm
+        self.ppid = {}   # (pid, starttime) -> parent pid
+
+    def sample(self, now):
+        """Scan /proc once; `now` is a monotonic time in seconds."""
+        elapsed = None if self.last_time is None else now - self.last_time
+        self.last_time = now
+        weight = 1.0 if not elapsed else 1.0 - math.exp(-elapsed / self.tau)
+        ticks = {}
+        for entry in os.listdir(self.proc):
+            if not entry.isdigit():
+                continue
+            stat = read_stat(entry, self.proc)
+            if stat is None:
+                continue
+            comm, ppid, cpu, start = stat
+            key = (int(entry), start)
+            ticks[key] = cpu
+            self.comm[key] = comm
+            self.ppid[key] = ppid
+            if elapsed and key in self.ticks:
+                cores = (cpu - self.ticks[key]) / CLK_TCK / elapsed
+                old = self.heat.get(key, cores)
+                self.heat[key] = old + weight * (cores - old)
+        for key in list(self.heat):
+            if key not in ticks:
+                del self.heat[key]
+        self.comm = {key: self.comm[key] for key in ticks}
+        self.ppid = {key: self.ppid[key] for key in ticks}
+        self.ticks = ticks
+
+    def top(self, n=3):
+        """[(pid, comm, heat in cores)] hottest first, allowlisted included."""
+        ranked = sorted(self.heat.items(), key=lambda item: item[1], reverse=True)
+        return [(key[0], self.comm[key], heat) for key, heat in ranked[:n]]
+
+    def allowed(self, pid, comm):
+        return pid in self.allow_pids or comm in self.allow_names
+
+    def kernel_thread(self, pid, ppid):
+        """kthreadd, its children (kworker, ksoftirqd, ...) or no cmdline."""
+        if pid == 2 or ppid == 2:
+            return True
+        try:
+            with open(f"{self.proc}/{pid}/cmdline", "rb") as f:
+                return not f.read(1)
+        except OSError:
+            return True  # gone
+
+    def targets(self, n=10, min_heat=MIN_HEAT):
+        """Mitigation targets [(pid, starttime, label)], hottest first,
+        kernel threads and allowlist removed. starttime lets a rung tell
+        the ranked process from a later one that reused its PID."""
+        out = []
+        for key, heat in sorted(self.heat.items(), key=lambda item: item[1], reverse=True):
+            if heat < min_heat or len(out) >= n:
+                break
+            pid, comm = key[0], self.comm[key]
+            if self.allowed(pid, comm) or self.kernel_thread(pid, self.ppid[key]):
+                continue
+            out.append((pid, key[1], f"{comm} {heat * 100:.0f}%"))
+        return out
+
+
+def format_top(top):
+    """'chrome(1234) 85%, node(2222) 40%' for a top() list."""
+    return ", ".join(f"{comm}({pid}) {heat * 100:.0f}%" for pid, comm, heat in top)
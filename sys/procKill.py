@@ -0,0 +1,294 @@
+#!/usr/bin/env python3
+# sel2in.com tgkprog@gmail.com
+"""Find processes by command line and terminate them without forking.
+
+Shared by temperatureWarn.py (kill rung, antigravity cleanup), b/killp and
+b/killantig. Instead of `ps` + one `kill` per PID:
+
+    scan        walk /proc once, match each cmdline against one precompiled
+                pattern (bytes, no decoding of non-matches)
+    terminate   signal through a pidfd, poll all pidfds for exit and SIGKILL
+                whatever is left the moment the grace period runs out
+
+A process is identified by (pid, starttime). The pidfd is opened and the
+starttime re-checked before the first signal, so a PID recycled since the
+scan is never touched. Signals refused with EPERM are retried in one
+batched `sudo kill` when sudo=True; that goes by bare PID, so every
+starttime is checked again just before it. Without pidfd support
+(kernel < 5.3) it falls back to os.kill and polling /proc.
+
+    python3 procKill.py [-s SIGNAL] [-g GRACE] [--sudo] [-n] pattern...
+"""
+import argparse
+import os
+import re
+import select
+import signal
+import subprocess
+import sys
+import time
+
+GRACE = 5.0          # seconds between the first signal and SIGKILL
+KILL_WAIT = 2.0      # seconds to wait for SIGKILL to take effect
+FALLBACK_POLL = 0.05 # seconds between /proc checks without pidfds
+SUDO_TIMEOUT = 10.0  # seconds before a `sudo kill` waiting on a password is killed
+
+
+class Proc:
+    """A process as found by scan(): pid, starttime (clock ticks) and cmdline."""
+    __slots__ = ("pid", "start", "cmdline")
+
+    def __init__(self, pid, start, cmdline=""):
+        self.pid = pid
+        self.start = start
+        self.cmdline = cmdline
+
+    def __repr__(self):
+        return f"Proc({self.pid}, {self.cmdline[:40]!r})"
+
+
+def _stat(pid, proc="/proc"):
+    """(state, ppid, starttime) from /proc/pid/stat, or None if gone."""
+    try:
+        with open(f"{proc}/{pid}/stat", "rb") as f:
+            data = f.read()
+    except OSError:
+        return None
+    fields = data[data.rfind(b")") + 2:].split()
+    return fields[0].decode(), int(fields[1]), int(fields[19])
+
+
+def alive(p, proc="/proc"):
+    """True while the process scanned as p still runs (not reaped, not reused)."""
+    stat = _stat(p.pid, proc)
+    return stat is not None and stat[2] == p.start and stat[0] != "Z"
+
+
+def own_tree(proc="/proc"):
+    """PIDs of this process and its ancestors (sudo, shell, service manager)."""
+    pids = set()
+    pid = os.getpid()
+    while pid > 1 and pid not in pids:
+        pids.add(pid)
+        stat = _stat(pid, proc)
+        if stat is None:
+            break
+        pid = stat[1]
+    return pids
+
+
+def compile_patterns(patterns, regex=False, ignore_case=False):
+    """One bytes regex matching any of patterns (substrings unless regex)."""
+    parts = [p if regex else re.escape(p) for p in patterns]
+    return re.compile("|".join(f"(?:{p})" for p in parts).encode(), re.IGNORECASE if ignore_case else 0)
+
+
+def scan(matcher, proc="/proc", exclude=None):
+    """[Proc] whose cmdline matches; never this process or its ancestors."""
+    if exclude is None:
+        exclude = own_tree(proc)
+    found = []
+    for entry in os.listdir(proc):
+        if not entry.isdigit() or int(entry) in exclude:
+            continue
+        try:
+            with open(f"{proc}/{entry}/cmdline", "rb") as f:
+                cmdline = f.read()
+        except OSError:
+            continue
+        if not cmdline:
+            continue  # kernel thread or zombie
+        cmdline = cmdline.rstrip(b"\0").replace(b"\0", b" ")
+        if not matcher.search(cmdline):
+            continue
+        stat = _stat(entry, proc)
+        if stat is None or stat[0] == "Z":
+            continue
+        found.append(Proc(int(entry), stat[2], cmdline.decode(errors="replace")))
+    return found
+
+
+def from_pids(keys, proc="/proc"):
+    """[Proc] for (pid, starttime) pairs picked elsewhere (e.g. the heat
+    ranking, which captured the starttime); gone or reused PIDs dropped."""
+    found = []
+    for pid, start in keys:
+        stat = _stat(pid, proc)
+        if stat is not None and stat[2] == start and stat[0] != "Z":
+            found.append(Proc(pid, start))
+    return found
+
+
+def parse_signal(name):
+    """"TERM", "-TERM", "SIGTERM" or "15" -> signal.Signals."""
+    name = name.lstrip("-").upper()
+    if name.isdigit():
+        return signal.Signals(int(name))
+    return signal.Signals[name if name.startswith("SIG") else "SIG" + name]
+
+
+class _Target:
+    __slots__ = ("proc", "fd")
+
+    def __init__(self, proc, fd):
+        self.proc = proc
+        self.fd = fd
+
+
+def _open(p):
+    """_Target for p, or None if it is gone or its PID was reused."""
+    fd = None
+    if hasattr(os, "pidfd_open"):
+        try:
+            fd = os.pidfd_open(p.pid)
+        except ProcessLookupError:
+            return None
+        except OSError:
+            fd = None  # ENOSYS: old kernel
+    # a pidfd keeps referring to this process even if its PID is later
+    # reaped and recycled, so pidfd signals need only this one check;
+    # anything that goes by bare PID (os.kill, sudo kill) must recheck
+    if not alive(p):
+        if fd is not None:
+            os.close(fd)
+        return None
+    return _Target(p, fd)
+
+
+def _send(targets, sig, sudo):
+    """Signal targets; return those refused (after the sudo retry, if any)."""
+    denied = []
+    for t in targets:
+        try:
+            if t.fd is not None:
+                signal.pidfd_send_signal(t.fd, sig)
+            elif alive(t.proc):
+                os.kill(t.proc.pid, sig)
+        except PermissionError:
+            denied.append(t)
+        except ProcessLookupError:
+            pass
+    if denied and sudo:
+        # one fork for all of them, by bare PID: starttimes re-checked right
+        # before, pidfd or not, since the PID may have been reused meanwhile
+        denied = [t for t in denied if alive(t.proc)]
+        pids = [str(t.proc.pid) for t in denied]
+        if pids:
+            try:
+                result = subprocess.run(["sudo", "kill", f"-{sig.name[3:]}", *pids],
+                                        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, timeout=SUDO_TIMEOUT)
+                if result.returncode == 0:
+                    denied = []
+            except (OSError, subprocess.SubprocessError) as e:
+                print(f"Error running sudo kill: {e}", file=sys.stderr)
+    return denied
+
+
+def _wait(targets, timeout):
+    """Wait until every target exits or timeout passes; return those still running."""
+    deadline = time.monotonic() + timeout
+    pending = {t.fd: t for t in targets if t.fd is not None}
+    polled = [t for t in targets if t.fd is None]
+    poller = select.poll()
+    for fd in pending:
+        poller.register(fd, select.POLLIN)
+    while pending or polled:
+        polled = [t for t in polled if alive(t.proc)]
+        remaining = deadline - time.monotonic()
+        if remaining <= 0 or not (pending or polled):
+            break
+        wait = min(remaining, FALLBACK_POLL) if polled else remaining
+        for fd, _ in poller.poll(wait * 1000):
+            poller.unregister(fd)
+            del pending[fd]
+    return list(pending.values()) + polled
+
+
+def terminate(procs, sig=signal.SIGTERM, grace=GRACE, escalate=True, sudo=False, resume=False):
+    """Send sig to procs, then SIGKILL any still running after grace seconds.
+    resume follows sig with SIGCONT, so a SIGSTOPped process (e.g. paused by
+    the mitigation ladder) can run its handler instead of waiting out grace.
+
+    Returns {"exited", "killed", "signalled", "failed", "gone"} -> [Proc];
+    "gone" had already exited (or had its PID reused) before the first
+    signal. With escalate=False nothing is waited for and every process
+    that accepted the signal is "signalled".
+    """
+    result = {"exited": [], "killed": [], "signalled": [], "failed": [], "gone": []}
+    targets = []
+    for p in procs:
+        t = _open(p)
+        if t is None:
+            result["gone"].append(p)
+        else:
+            targets.append(t)
+    opened = list(targets)
+    try:
+        denied = _send(targets, sig, sudo)
+        result["failed"] += [t.proc for t in denied]
+        targets = [t for t in targets if t not in denied]
+        if resume and sig not in (signal.SIGKILL, signal.SIGCONT):
+            _send(targets, signal.SIGCONT, sudo)
+        if sig == signal.SIGKILL:
+            left = _wait(targets, KILL_WAIT)
+            result["killed"] += [t.proc for t in targets if t not in left]
+            result["failed"] += [t.proc for t in left]
+            return result
+        if not escalate:
+            result["signalled"] += [t.proc for t in targets]
+            return result
+        left = _wait(targets, grace)
+        result["exited"] += [t.proc for t in targets if t not in left]
+        if left:
+            denied = _send(left, signal.SIGKILL, sudo)
+            stuck = _wait([t for t in left if t not in denied], KILL_WAIT)
+            result["killed"] += [t.proc for t in left if t not in denied and t not in stuck]
+            result["failed"] += [t.proc for t in denied + stuck]
+        return result
+    finally:
+        for t in opened:
+            if t.fd is not None:
+                os.close(t.fd)
+
+
+def summary(result):
+    """'3 exited, 1 killed' for a terminate() result."""
+    parts = [f"{len(procs)} {outcome}" for outcome, procs in result.items() if procs]
+    return ", ".join(parts) or "nothing to do"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Terminate processes whose command line matches a pattern")
+    parser.add_argument("patterns", nargs="+", help="Substring (or --regex) to match against the full command line")
+    parser.add_argument("-s", "--signal", default="TERM", help="First signal to send (default: TERM)")
+    parser.add_argument("-g", "--grace", type=float, default=GRACE,
+                        help=f"Seconds to wait before SIGKILL (default: {GRACE:g})")
+    parser.add_argument("--no-escalate", action="store_true", help="Only send --signal, never SIGKILL")
+    parser.add_argument("--regex", action="store_true", help="Patterns are regular expressions")
+    parser.add_argument("-i", "--ignore-case", action="store_true", help="Case-insensitive match")
+    parser.add_argument("--sudo", action="store_true", help="Retry refused signals with one sudo kill")
+    parser.add_argument("-n", "--dry-run", action="store_true", help="List matches, do not signal")
+    args = parser.parse_args(argv)
+    try:
+        sig = parse_signal(args.signal)
+    except (KeyError, ValueError):
+        parser.error(f"unknown signal {args.signal!r}")
+
+    procs = scan(compile_patterns(args.patterns, args.regex, args.ignore_case))
+    if not procs:
+        print(f"No processes found matching {' or '.join(map(repr, args.patterns))}.")
+        return 0
+    for p in procs:
+        print(f"{'Would send' if args.dry_run else 'Sending'} {sig.name[3:]} to PID {p.pid}: {p.cmdline}")
+    if args.dry_run:
+        return 0
+    result = terminate(procs, sig, args.grace, not args.no_escalate, args.sudo)
+    for outcome in ("killed", "failed"):
+        for p in result[outcome]:
+            print(f"PID {p.pid} {outcome}: {p.cmdline[:60]}", file=sys.stderr if outcome == "failed" else sys.stdout)
+    print(summary(result))
+    return 1 if result["failed"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
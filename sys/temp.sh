@@ -23,10 +23,10 @@ echo ""
 
 # 2. Clear old log file
 echo "Step 2: Clearing old log file..."
-if [ -f /tmp/temp.log ]; then
+if [ -f /tmp/temp.ring ]; then
     echo "  Old log content:"
-    cat /tmp/temp.log | head -5
-    rm -f /tmp/temp.log
+    python3 "$(dirname "$0")/temperatureWarn.py" --dump | head -5
+    rm -f /tmp/temp.ring
     echo "  ✓ Log file cleared"
 else
     echo "  ℹ No log file to clear"
@@ -59,10 +59,10 @@ echo ""
 # 7. Wait and check log file
 echo "Step 7: Waiting 5 seconds for log file to be created..."
 sleep 5
-if [ -f /tmp/temp.log ]; then
+if [ -f /tmp/temp.ring ]; then
     echo "  ✓ Log file exists!"
     echo "  Latest log entries:"
-    tail -20 /tmp/temp.log
+    python3 "$(dirname "$0")/temperatureWarn.py" --dump | tail -20
 else
     echo "  ✗ Log file NOT created - service may have issues!"
 fi
@@ -73,7 +73,7 @@ echo "Restart Complete!"
 echo "================================================"
 echo ""
 echo "To monitor logs in real-time, run:"
-echo "  tail -f /tmp/temp.log"
+echo "  watch -n 5 'python3 $(dirname "$0")/temperatureWarn.py --dump | tail -20'"
 echo ""
 echo "To check service logs:"
 echo "  sudo journalctl -u temperature-warn -f"
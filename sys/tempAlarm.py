@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+# sel2in.com tgkprog@gmail.com
+"""Event-driven wakeups from hwmon alarm attributes (temperatureWarn --alarm).
+
+Drivers that support it raise tempN_max_alarm / tempN_crit_alarm (or
+tempN_alarm) and call sysfs_notify() when a limit is crossed. HwmonAlarms
+writes --warn and --critical into the CPU chip's tempN_max / tempN_crit
+(root only; otherwise the chip's own limits are kept), opens the alarm
+files of every chip and blocks in poll() on them. Monitor uses wait() as
+its sleep, so the scheduler's interval becomes a backstop and a crossing
+is seen as soon as the driver reports it.
+
+sysfs signals a change with POLLPRI | POLLERR; after a wakeup the file
+must be re-read from offset 0 to re-arm it. Tests use a fake hwmon tree
+whose alarm files are FIFOs and poll for POLLIN instead.
+
+k10temp has no alarm attributes. On such machines HwmonAlarms is falsy
+and the monitor keeps plain timed polling.
+"""
+import os
+import re
+import select
+import sys
+import time
+
+from tempSensors import HWMON_ROOT, _read_text
+
+ARM_CHIPS = ("k10temp", "coretemp")  # chips whose limits follow --warn / --critical
+SYSFS_EVENTS = select.POLLPRI | select.POLLERR
+_ALARM_RE = re.compile(r"^temp(\d+)_(?:(max|crit)_)?alarm$")
+
+
+def _read_alarm(fd):
+    """Current alarm value; re-arms sysfs notification. None if unreadable."""
+    try:
+        raw = os.pread(fd, 16, 0)
+    except OSError:
+        try:
+            raw = os.read(fd, 16)  # FIFO stand-in: not seekable
+        except OSError:
+            return None
+    try:
+        return int(raw.split()[-1]) if raw.strip() else None
+    except ValueError:
+        return None
+
+
+class HwmonAlarms:
+    """Armed hwmon limits plus a poll() set on their alarm files."""
+
+    def __init__(self, warn, critical, root=HWMON_ROOT, chips=None, arm_chips=ARM_CHIPS,
+                 events=SYSFS_EVENTS):
+        self.events = events
+        self.poller = select.poll()
+        self.alarms = {}  # fd -> (chip, attr)
+        self.saved = {}   # limit path -> value before arming
+        self.fired = 0
+        limits = {"max": warn, "crit": critical}
+        try:
+            entries = sorted(os.listdir(root), key=lambda n: (len(n), n))
+        except OSError:
+            return
+        for entry in entries:
+            chip_dir = os.path.join(root, entry)
+            name = _read_text(os.path.join(chip_dir, "name"))
+            if not name or (chips is not None and not name.startswith(chips)):
+                continue
+            try:
+                attrs = sorted(os.listdir(chip_dir))
+            except OSError:
+                continue
+            for attr in attrs:
+                m = _ALARM_RE.match(attr)
+                if not m:
+                    continue
+                index, kind = m.groups()
+                if name.startswith(arm_chips):
+                    for limit in ((kind,) if kind else ("max", "crit")):
+                        self._arm(os.path.join(chip_dir, f"temp{index}_{limit}"), limits[limit])
+                self._watch(f"{name}/{entry}", attr, os.path.join(chip_dir, attr))
+
+    def __bool__(self):
+        return bool(self.alarms)
+
+    def _arm(self, path, celsius):
+        if path in self.saved or not os.path.exists(path):
+            return
+        current = _read_text(path)
+        try:
+            with open(path, "w") as f:
+                f.write(str(int(celsius * 1000)))
+            self.saved[path] = current
+        except PermissionError:
+            pass  # not root: the chip's own limit still raises the alarm
+        except OSError as e:
+            print(f"Error arming {path}: {e}", file=sys.stderr)
+
+    def _watch(self, chip, attr, path):
+        try:
+            fd = os.open(path, os.O_RDONLY | os.O_NONBLOCK)
+        except OSError as e:
+            print(f"Error opening {path}: {e}", file=sys.stderr)
+            return
+        _read_alarm(fd)  # sysfs only notifies after a first read
+        self.alarms[fd] = (chip, attr)
+        self.poller.register(fd, self.events)
+
+    def wait(self, timeout):
+        """Sleep up to timeout seconds or until an alarm fires.
+        Returns [(chip, attr, value)] for the alarms that fired."""
+        deadline = time.monotonic() + timeout
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return []
+            fired = []
+            for fd, mask in self.poller.poll(remaining * 1000):
+                if fd not in self.alarms:
+                    continue
+                chip, attr = self.alarms[fd]
+                if mask & (select.POLLHUP | select.POLLNVAL):
+                    # writer of a stand-in went away; sysfs files never do this
+                    self.poller.unregister(fd)
+                    os.close(fd)
+                    del self.alarms[fd]
+                    continue
+                value = _read_alarm(fd)
+                if value:
+                    fired.append((chip, attr, value))
+            if fired:
+                self.fired += len(fired)
+                print(f"ALARM: {', '.join(f'{chip} {attr}' for chip, attr, _ in fired)}", file=sys.stderr)
+                return fired
+            if not self.alarms:
+                time.sleep(max(0.0, deadline - time.monotonic()))
+                return []
+
+    def close(self):
+        """Restore the limits that were armed and stop watching."""
+        for path, value in self.saved.items():
+            try:
+                with open(path, "w") as f:
+                    f.write(value)
+            except OSError as e:
+                print(f"Error restoring {path}: {e}", file=sys.stderr)
+        self.saved = {}
+        for fd in self.alarms:
+            self.poller.unregister(fd)
+            os.close(fd)
+        self.alarms = {}
@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+# sel2in.com tgkprog@gmail.com
+"""asyncio plumbing for `temperatureWarn.py --async`.
+
+The sampler task reads and decides on a fixed cadence; every side effect
+is handed to a Stages object instead of being run in line:
+
+    mitigate  ladder updates (size 1: only the latest temperature matters)
+    notify    desktop notifications
+    ui        warning window
+    log       ring log, history, metrics
+
+Each stage is one consumer task behind a bounded asyncio.Queue. When a
+queue is full the oldest entry is dropped, so the sampler never waits on
+a slow consumer. Blocking work (D-Bus calls, SQLite, procKill waits) runs
+via asyncio.to_thread. External commands go through run_command /
+run_first, which use asyncio.create_subprocess_exec and kill anything
+still running after its timeout.
+"""
+import asyncio
+import subprocess
+import sys
+import threading
+
+QUEUE_SIZES = {"mitigate": 1, "notify": 4, "ui": 8, "log": 64}
+READ_TIMEOUT = 2.0     # seconds the sampler waits for a sensor read
+COMMAND_TIMEOUT = 5.0  # seconds before an external command is killed
+
+
+async def run_command(cmd, timeout=COMMAND_TIMEOUT):
+    """Run cmd with stdio discarded; True if it exited 0 within timeout."""
+    try:
+        proc = await asyncio.create_subprocess_exec(
+            *cmd, stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    except OSError:
+        return False
+    try:
+        return await asyncio.wait_for(proc.wait(), timeout) == 0
+    except asyncio.TimeoutError:
+        proc.kill()
+        await proc.wait()
+        return False
+
+
+async def run_first(commands, timeout=COMMAND_TIMEOUT):
+    """Try commands in order; return the first that succeeded, or None."""
+    for cmd in commands:
+        if await run_command(cmd, timeout):
+            return cmd
+    return None
+
+
+class Stages:
+    """Bounded queues, each drained by its own consumer task."""
+
+    def __init__(self, sizes=QUEUE_SIZES):
+        self.sizes = dict(sizes)
+        self.queues = {}
+        self.dropped = dict.fromkeys(self.sizes, 0)
+        self.tasks = []
+        self.background = set()
+        self.loop = None
+        self.thread = None
+
+    def start(self):
+        """Create the queues and consumers; call from inside the running loop."""
+        self.loop = asyncio.get_running_loop()
+        self.thread = threading.get_ident()
+        for name, size in self.sizes.items():
+            self.queues[name] = asyncio.Queue(size)
+            self.tasks.append(asyncio.create_task(self._consume(name), name=f"temp-{name}"))
+
+    def offer(self, name, fn, *args):
+        """Queue fn(*args) on stage name, dropping the oldest entry when full.
+        Safe to call from worker threads."""
+        if threading.get_ident() == self.thread:
+            self._put(name, fn, args)
+        else:
+            self.loop.call_soon_threadsafe(self._put, name, fn, args)
+
+    def _put(self, name, fn, args):
+        queue = self.queues[name]
+        if queue.full():
+            queue.get_nowait()
+            self.dropped[name] += 1
+        queue.put_nowait((fn, args))
+
+    def spawn(self, coro_fn, *args):
+        """Run coro_fn(*args) on the loop without waiting for it; any thread."""
+        if threading.get_ident() != self.thread:
+            asyncio.run_coroutine_threadsafe(coro_fn(*args), self.loop)
+            return
+        task = asyncio.create_task(coro_fn(*args))
+        self.background.add(task)  # the loop only keeps weak references
+        task.add_done_callback(self.background.discard)
+
+    async def _consume(self, name):
+        queue = self.queues[name]
+        while True:
+            fn, args = await queue.get()
+            try:
+                if asyncio.iscoroutinefunction(fn):
+                    await fn(*args)
+                else:
+                    await asyncio.to_thread(fn, *args)
+            except Exception as e:
+                print(f"Error in {name} task: {e}", file=sys.stderr)
+
+    async def stop(self):
+        for task in self.tasks:
+            task.cancel()
+        await asyncio.gather(*self.tasks, return_exceptions=True)
+        self.tasks = []
+        dropped = ", ".join(f"{name} {count}" for name, count in self.dropped.items() if count)
+        if dropped:
+            print(f"Dropped queued work (queue full): {dropped}", file=sys.stderr)
@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+# sel2in.com tgkprog@gmail.com
+"""Short-horizon temperature forecast for temperatureWarn.py.
+
+Keeps the last WINDOW seconds of samples, smooths the level with an EWMA
+and fits linear and quadratic trends (numpy.polyfit when NumPy is
+installed, closed-form least squares otherwise). The forecast is anchored
+at the EWMA level so one noisy reading does not swing it, and the earlier
+of the linear and quadratic crossing times is used so acceleration is
+caught early.
+
+ForecastLog appends tab-separated events (alarm, sample, crossed, clear)
+with the forecast error and the lead time actually achieved, so --forecast-lead
+and the thresholds can be tuned from history.
+"""
+import math
+import sys
+from collections import deque
+from datetime import datetime
+
+try:
+    import numpy as np
+except ImportError:
+    np = None  # pure-python fit below
+
+WINDOW = 120.0      # seconds of samples kept
+EWMA_ALPHA = 0.3
+MIN_SAMPLES = 4
+MAX_HORIZON = 600.0  # do not trust extrapolation further out than this
+
+
+def _polyfit(xs, ys, degree):
+    """Least-squares polynomial coefficients, highest power first."""
+    if np is not None:
+        return [float(c) for c in np.polyfit(xs, ys, degree)]
+    n = len(xs)
+    if degree == 1:
+        sx = sum(xs)
+        sy = sum(ys)
+        sxx = sum(x * x for x in xs)
+        sxy = sum(x * y for x, y in zip(xs, ys))
+        den = n * sxx - sx * sx
+        if den == 0:
+            return [0.0, sy / n]
+        b = (n * sxy - sx * sy) / den
+        return [b, (sy - b * sx) / n]
+    # degree 2: solve the 3x3 normal equations with Cramer's rule
+    s = [sum(x ** k for x in xs) for k in range(5)]
+    t = [sum((x ** k) * y for x, y in zip(xs, ys)) for k in range(3)]
+    m = [[s[4], s[3], s[2]], [s[3], s[2], s[1]], [s[2], s[1], s[0]]]
+    rhs = [t[2], t[1], t[0]]
+
+    def det(a):
+        return (a[0][0] * (a[1][1] * a[2][2] - a[1][2] * a[2][1])
+                - a[0][1] * (a[1][0] * a[2][2] - a[1][2] * a[2][0])
+                + a[0][2] * (a[1][0] * a[2][1] - a[1][1] * a[2][0]))
+
+    d = det(m)
+    if d == 0:
+        return [0.0] + _polyfit(xs, ys, 1)
+    coeffs = []
+    for col in range(3):
+        mc = [row[:] for row in m]
+        for r in range(3):
+            mc[r][col] = rhs[r]
+        coeffs.append(det(mc) / d)
+    return coeffs
+
+
+class ThermalForecaster:
+    """Estimate when the temperature will reach a threshold."""
+
+    def __init__(self, window=WINDOW, alpha=EWMA_ALPHA):
+        self.window = window
+        self.alpha = alpha
+        self.samples = deque()
+        self.ewma = None
+        self.linear = None
+        self.quadratic = None
+        self._pending = None  # (time, predicted temp) for the next sample
+
+    def add(self, now, temp):
+        """Add a sample; return the forecast error for it (actual - predicted) or None."""
+        error = None
+        if self._pending is not None:
+            error = temp - self._pending[1]
+            self._pending = None
+        self.samples.append((now, temp))
+        while self.samples and now - self.samples[0][0] > self.window:
+            self.samples.popleft()
+        self.ewma = temp if self.ewma is None else self.alpha * temp + (1 - self.alpha) * self.ewma
+        self._fit()
+        return error
+
+    def _fit(self):
+        self.linear = self.quadratic = None
+        if len(self.samples) < MIN_SAMPLES:
+            return
+        t0 = self.samples[-1][0]
+        xs = [t - t0 for t, _ in self.samples]
+        ys = [temp for _, temp in self.samples]
+        if xs[0] == 0:
+            return
+        self.linear = _polyfit(xs, ys, 1)
+        if len(self.samples) >= MIN_SAMPLES + 2:
+            self.quadratic = _polyfit(xs, ys, 2)
+
+    def predict(self, seconds_ahead):
+        """Forecast temperature `seconds_ahead` after the newest sample."""
+        if self.linear is None:
+            return self.ewma
+        b, _ = self.linear
+        value = self.ewma + b * seconds_ahead
+        if self.quadratic is not None:
+            a, qb, _ = self.quadratic
+            value = max(value, self.ewma + a * seconds_ahead ** 2 + qb * seconds_ahead)
+        return value
+
+    def expect(self, at, seconds_ahead):
+        """Remember the forecast for the next sample so add() can score it."""
+        self._pending = (at, self.predict(seconds_ahead))
+
+    def time_to(self, threshold):
+        """Seconds until the forecast reaches threshold, 0 if already there, None if not soon."""
+        if self.ewma is None:
+            return None
+        gap = threshold - self.ewma
+        if gap <= 0:
+            return 0.0
+        etas = []
+        if self.linear is not None and self.linear[0] > 0:
+            etas.append(gap / self.linear[0])
+        if self.quadratic is not None:
+            a, b, _ = self.quadratic
+            if a != 0:
+                disc = b * b + 4 * a * gap
+                if disc >= 0:
+                    for root in ((-b + math.sqrt(disc)) / (2 * a), (-b - math.sqrt(disc)) / (2 * a)):
+                        if root > 0:
+                            etas.append(root)
+            elif b > 0:
+                etas.append(gap / b)
+        etas = [e for e in etas if e <= MAX_HORIZON]
+        return min(etas) if etas else None
+
+
+class ForecastLog:
+    """Append forecast events as TSV: time, event, temp, eta, error, lead."""
+
+    HEADER = "time\tevent\ttemp\teta_s\terror_c\tlead_s\n"
+
+    def __init__(self, path):
+        self.path = path
+        self.alarm_at = None
+        self.alarm_eta = None
+
+    def _write(self, event, temp, eta=None, error=None, lead=None):
+        fields = [
+            datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            event,
+            f"{temp:.1f}",
+            "" if eta is None else f"{eta:.1f}",
+            "" if error is None else f"{error:+.2f}",
+            "" if lead is None else f"{lead:.1f}",
+        ]
+        try:
+            try:
+                with open(self.path, "x") as f:
+                    f.write(self.HEADER)
+            except FileExistsError:
+                pass
+            with open(self.path, "a") as f:
+                f.write("\t".join(fields) + "\n")
+        except OSError as e:
+            print(f"Error writing forecast log: {e}", file=sys.stderr)
+
+    def alarm(self, now, temp, eta):
+        """Forecast says critical is near; remember when we first knew."""
+        if self.alarm_at is None:
+            self.alarm_at = now
+            self.alarm_eta = eta
+            self._write("alarm", temp, eta=eta)
+
+    def sample(self, now, temp, eta, error):
+        """Score each sample taken while an alarm is active."""
+        if self.alarm_at is not None:
+            self._write("sample", temp, eta=eta, error=error)
+
+    def crossed(self, now, temp):
+        """Threshold actually reached: log the eta given at alarm time and the real lead."""
+        if self.alarm_at is None:
+            self._write("crossed", temp, lead=0.0)
+            return
+        lead = now - self.alarm_at
+        self._write("crossed", temp, eta=self.alarm_eta, lead=lead)
+        self.alarm_at = None
+
+    def clear(self, now, temp):
+        """Alarm withdrawn without crossing (mitigation worked or false alarm)."""
+        if self.alarm_at is not None:
+            self._write("clear", temp, lead=now - self.alarm_at)
+            self.alarm_at = None
@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+# sel2in.com tgkprog@gmail.com
+"""Long-term, downsampled sensor history for temperatureWarn.py.
+
+The ring log (tempRing) keeps minutes; this SQLite file keeps the rest so
+an overnight event can still be looked at in the morning:
+
+    raw     every snapshot, kept RAW_KEEP (1 hour)
+    minute  n, min/avg/max per field, kept MINUTE_KEEP (30 days)
+    hour    n, min/avg/max per field, kept forever
+
+Rollups run inside add() whenever a minute or hour boundary is crossed,
+and retention is driven by snapshot time, not the wall clock. If the file
+grows past max_bytes the oldest minute rows, then hour rows, are dropped
+and the freed pages handed back with an incremental vacuum.
+
+range(start, end) picks the finest table that still covers `start`;
+checkTime.py uses it to print the thermal context around an event.
+"""
+import os
+import sqlite3
+import sys
+
+from tempSensors import SensorSnapshot
+
+DB_PATH = "/var/tmp/temp_history.db"  # survives reboots, unlike /tmp
+RAW_KEEP = 3600
+MINUTE_KEEP = 30 * 86400
+MAX_BYTES = 64 * 1024 * 1024
+HOUR_FLOOR = 366 * 24  # hour rows the size cap never touches
+FIELDS = SensorSnapshot.FIELDS
+
+
+def _rollup_columns(source):
+    """SELECT list aggregating `source` rows (raw values or min/avg/max)."""
+    cols = []
+    for f in FIELDS:
+        if source == "raw":
+            cols += [f"min({f})", f"avg({f})", f"max({f})"]
+        else:
+            cols += [f"min({f}_min)", f"sum({f}_avg * n) / sum(CASE WHEN {f}_avg IS NULL THEN 0 ELSE n END)",
+                     f"max({f}_max)"]
+    return ", ".join(cols)
+
+
+class History:
+    """SQLite store of snapshots with raw -> minute -> hour rollups."""
+
+    def __init__(self, path=DB_PATH, max_bytes=MAX_BYTES, readonly=False):
+        self.path = path
+        self.max_bytes = max_bytes
+        if readonly:
+            self.db = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+            return
+        # written from the monitor's log stage thread, one thread at a time
+        self.db = sqlite3.connect(path, check_same_thread=False)
+        self.db.execute("PRAGMA auto_vacuum=INCREMENTAL")  # only takes effect on a new file
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self._create()
+        self.last_minute = self._last("minute")
+        self.last_hour = self._last("hour")
+
+    def _create(self):
+        raw = ", ".join(f"{f} REAL" for f in FIELDS)
+        agg = ", ".join(f"{f}_min REAL, {f}_avg REAL, {f}_max REAL" for f in FIELDS)
+        with self.db:
+            self.db.execute(f"CREATE TABLE IF NOT EXISTS raw (ts REAL PRIMARY KEY, {raw})")
+            for table in ("minute", "hour"):
+                self.db.execute(f"CREATE TABLE IF NOT EXISTS {table} (ts INTEGER PRIMARY KEY, n INTEGER, {agg})")
+
+    def _last(self, table):
+        """Start of the newest bucket already rolled up into table, if any."""
+        row = self.db.execute(f"SELECT max(ts) FROM {table}").fetchone()
+        return row[0]
+
+    def add(self, snapshot):
+        """Store one snapshot; rolls up and prunes when a boundary is crossed."""
+        ts = snapshot.timestamp
+        try:
+            with self.db:
+                self.db.execute(
+                    f"INSERT OR REPLACE INTO raw VALUES (?{', ?' * len(FIELDS)})",
+                    (ts, *snapshot.values()),
+                )
+                minute = int(ts // 60) * 60
+                if self.last_minute is None:
+                    self.last_minute = minute
+                elif minute > self.last_minute:
+                    self._rollup("raw", "minute", 60, self.last_minute, minute)
+                    self.last_minute = minute
+                    self.db.execute("DELETE FROM raw WHERE ts < ?", (ts - RAW_KEEP,))
+                    self.db.execute("DELETE FROM minute WHERE ts < ?", (ts - MINUTE_KEEP,))
+                hour = int(ts // 3600) * 3600
+                if self.last_hour is None:
+                    self.last_hour = hour
+                elif hour > self.last_hour:
+                    self._rollup("minute", "hour", 3600, self.last_hour, hour)
+                    self.last_hour = hour
+                    self._cap()
+        except sqlite3.Error as e:
+            print(f"Error writing history {self.path}: {e}", file=sys.stderr)
+
+    def _rollup(self, source, target, step, start, end):
+        n = "count(*)" if source == "raw" else "sum(n)"
+        self.db.execute(
+            f"INSERT OR REPLACE INTO {target} "
+            f"SELECT CAST(ts / {step} AS INTEGER) * {step}, {n}, {_rollup_columns(source)} "
+            f"FROM {source} WHERE ts >= ? AND ts < ? GROUP BY 1",
+            (start, end),
+        )
+
+    def size(self):
+        page_count = self.db.execute("PRAGMA page_count").fetchone()[0]
+        free = self.db.execute("PRAGMA freelist_count").fetchone()[0]
+        page_size = self.db.execute("PRAGMA page_size").fetchone()[0]
+        return (page_count - free) * page_size
+
+    def _cap(self):
+        """Drop the oldest half of minute rows, then of hour rows (keeping at
+        least HOUR_FLOOR), until under max_bytes. Raw rows are bounded by
+        RAW_KEEP and never trimmed here."""
+        for table, floor in (("minute", 0), ("hour", HOUR_FLOOR)):
+            while self.size() > self.max_bytes:
+                count = self.db.execute(f"SELECT count(*) FROM {table}").fetchone()[0]
+                if count <= floor:
+                    break
+                self.db.execute(
+                    f"DELETE FROM {table} WHERE ts IN (SELECT ts FROM {table} ORDER BY ts LIMIT ?)",
+                    (max(1, min(count // 2, count - floor)),),
+                )
+        self.db.execute("PRAGMA incremental_vacuum")
+
+    def range(self, start, end, fields=("cpu",)):
+        """[(ts, {field: (min, avg, max)})] for start <= ts < end (epoch seconds).
+
+        Uses raw rows if they still reach back to start, else minute rows,
+        else hour rows; raw rows have min == avg == max.
+        """
+        firsts = {}
+        for table in ("raw", "minute", "hour"):
+            first = self.db.execute(f"SELECT min(ts) FROM {table}").fetchone()[0]
+            if first is not None:
+                firsts[table] = first
+                if first <= start + (60 if table == "raw" else 0):
+                    break
+        else:
+            # nothing reaches back that far: use whatever reaches furthest
+            table = min(firsts, key=firsts.get) if firsts else "raw"
+        if table == "raw":
+            cols = ", ".join(f"{f}, {f}, {f}" for f in fields)
+        else:
+            cols = ", ".join(f"{f}_min, {f}_avg, {f}_max" for f in fields)
+        rows = self.db.execute(
+            f"SELECT ts, {cols} FROM {table} WHERE ts >= ? AND ts < ? ORDER BY ts", (start, end))
+        return [
+            (row[0], {f: row[1 + 3 * i:4 + 3 * i] for i, f in enumerate(fields)})
+            for row in rows
+        ]
+
+    def close(self):
+        self.db.close()
+
+
+def open_readonly(path=None):
+    """History for reading, or None when no history has been recorded yet."""
+    path = path or DB_PATH
+    if not os.path.exists(path):
+        return None
+    return History(path, readonly=True)
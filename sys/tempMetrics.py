@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+# sel2in.com tgkprog@gmail.com
+"""Prometheus metrics for temperatureWarn.py.
+
+The monitor calls Metrics.update() once per tick. That renders the whole
+exposition (Prometheus text format 0.0.4) into one bytes object, reusing
+cached series prefixes so a tick only formats numbers. Scrapes of the
+HTTP endpoint and the node_exporter textfile both get that cached body,
+so a scrape costs one socket write whatever the scrape interval.
+
+Exported:
+    temperature_warn_temp_celsius{chip,sensor}            every temp*_input
+    temperature_warn_temp_limit_celsius{chip,sensor,limit} max / crit / crit_hyst
+    temperature_warn_fan_rpm{chip,sensor}
+    temperature_warn_voltage_volts{chip,sensor}           vddgfx, vddnb, battery
+    temperature_warn_power_watts{chip,sensor}             power1 input
+    temperature_warn_power_average_watts{chip,sensor}
+    temperature_warn_power_crit_watts{chip,sensor}
+    temperature_warn_threshold_celsius{level}
+    temperature_warn_mitigation_active{step}              1 while a rung is engaged
+    temperature_warn_events_total{level}                  entries into warn / critical
+    temperature_warn_processes_signalled_total{step}      SIGSTOP / terminate
+    temperature_warn_last_sample_timestamp_seconds
+"""
+import http.server
+import os
+import re
+import sys
+import threading
+
+PORT = 9479
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+PREFIX = "temperature_warn_"
+
+_ATTR_RE = re.compile(r"(temp|in|fan|power)\d+_([a-z_]+)$")
+
+# (kind, sub-feature) -> (metric, extra label)
+SERIES = {
+    ("temp", "input"): ("temp_celsius", None),
+    ("temp", "max"): ("temp_limit_celsius", 'limit="max"'),
+    ("temp", "crit"): ("temp_limit_celsius", 'limit="crit"'),
+    ("temp", "crit_hyst"): ("temp_limit_celsius", 'limit="crit_hyst"'),
+    ("fan", "input"): ("fan_rpm", None),
+    ("in", "input"): ("voltage_volts", None),
+    ("power", "input"): ("power_watts", None),
+    ("power", "average"): ("power_average_watts", None),
+    ("power", "crit"): ("power_crit_watts", None),
+}
+
+HELP = {
+    "temp_celsius": ("gauge", "Temperature sensor reading."),
+    "temp_limit_celsius": ("gauge", "Temperature limit reported by the chip."),
+    "fan_rpm": ("gauge", "Fan speed."),
+    "voltage_volts": ("gauge", "Voltage sensor reading."),
+    "power_watts": ("gauge", "Power draw."),
+    "power_average_watts": ("gauge", "Averaged power draw."),
+    "power_crit_watts": ("gauge", "Critical power limit."),
+    "threshold_celsius": ("gauge", "Configured --warn and --critical thresholds."),
+    "mitigation_active": ("gauge", "1 while a mitigation ladder rung is engaged."),
+    "events_total": ("counter", "Times the CPU temperature entered the warn or critical band."),
+    "processes_signalled_total": ("counter", "Processes paused or terminated by the mitigation ladder."),
+    "last_sample_timestamp_seconds": ("gauge", "Time of the last sensor snapshot."),
+}
+_ORDER = list(HELP)
+
+
+def _escape(value):
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _num(value):
+    return repr(float(value))
+
+
+class Metrics:
+    """Counters plus the cached exposition body of the last tick."""
+
+    def __init__(self, warn, critical):
+        self.warn = warn
+        self.critical = critical
+        self.level = None  # None, "warn" or "critical"
+        self.events = {"warn": 0, "critical": 0}
+        self.prefixes = {}  # (metric, chip, sensor, extra) -> 'name{labels} '
+        self.headers = {m: f"# HELP {PREFIX}{m} {h}\n# TYPE {PREFIX}{m} {t}\n" for m, (t, h) in HELP.items()}
+        self.body = b""
+
+    def _prefix(self, metric, chip, sensor, extra=None):
+        key = (metric, chip, sensor, extra)
+        prefix = self.prefixes.get(key)
+        if prefix is None:
+            labels = f'chip="{_escape(chip)}",sensor="{_escape(sensor)}"'
+            if extra:
+                labels += "," + extra
+            prefix = self.prefixes[key] = f"{PREFIX}{metric}{{{labels}}} "
+        return prefix
+
+    def _count_events(self, temp):
+        level = None
+        if temp is not None and temp >= self.critical:
+            level = "critical"
+        elif temp is not None and temp >= self.warn:
+            level = "warn"
+        if level == "critical" and self.level != "critical":
+            self.events["critical"] += 1
+        if level is not None and self.level is None:
+            self.events["warn"] += 1
+        self.level = level
+
+    def update(self, snapshot, ladder=None):
+        """Account for one tick and re-render the exposition body."""
+        self._count_events(snapshot.cpu)
+        lines = {m: [] for m in _ORDER}
+        for chip, features in snapshot.chips.items():
+            if not isinstance(features, dict):
+                continue
+            for sensor, values in features.items():
+                if not isinstance(values, dict):
+                    continue
+                for key, value in values.items():
+                    m = _ATTR_RE.match(key)
+                    series = m and SERIES.get((m.group(1), m.group(2)))
+                    if series and value is not None:
+                        metric, extra = series
+                        lines[metric].append(self._prefix(metric, chip, sensor, extra) + _num(value))
+        lines["threshold_celsius"] += [
+            f'{PREFIX}threshold_celsius{{level="warn"}} {_num(self.warn)}',
+            f'{PREFIX}threshold_celsius{{level="critical"}} {_num(self.critical)}',
+        ]
+        for level, count in self.events.items():
+            lines["events_total"].append(f'{PREFIX}events_total{{level="{level}"}} {count}')
+        for step in (ladder.steps if ladder else []):
+            lines["mitigation_active"].append(f'{PREFIX}mitigation_active{{step="{step.name}"}} {int(step.active)}')
+            if step.name in ("stop", "kill"):
+                lines["processes_signalled_total"].append(
+                    f'{PREFIX}processes_signalled_total{{step="{step.name}"}} {step.signalled}')
+        lines["last_sample_timestamp_seconds"].append(f"{PREFIX}last_sample_timestamp_seconds {_num(snapshot.timestamp)}")
+
+        out = []
+        for metric in _ORDER:
+            if lines[metric]:
+                out.append(self.headers[metric])
+                out.append("\n".join(lines[metric]))
+                out.append("\n")
+        self.body = "".join(out).encode()
+
+    def write_textfile(self, path):
+        """node_exporter textfile collector: write to a temp file, rename over."""
+        tmp = f"{path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp, "wb") as f:
+                f.write(self.body)
+            os.replace(tmp, path)
+        except OSError as e:
+            print(f"Error writing metrics to {path}: {e}", file=sys.stderr)
+
+    def serve(self, port=PORT, host="127.0.0.1"):
+        """Serve /metrics from a daemon thread; returns the server."""
+        metrics = self
+
+        class Handler(http.server.BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path not in ("/metrics", "/"):
+                    self.send_error(404)
+                    return
+                body = metrics.body
+                self.send_response(200)
+                self.send_header("Content-Type", CONTENT_TYPE)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass  # scrapes every few seconds would flood stderr
+
+        server = http.server.ThreadingHTTPServer((host, port), Handler)
+        server.daemon_threads = True
+        threading.Thread(target=server.serve_forever, name="temp-metrics", daemon=True).start()
+        return server
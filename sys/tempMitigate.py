@@ -0,0 +1,376 @@
+#!/usr/bin/env python3
+# sel2in.com tgkprog@gmail.com
+"""Graduated mitigation ladder for temperatureWarn.py.
+
+Instead of SIGTERMing everything at --critical the monitor climbs a ladder:
+
+    freq    cap CPU frequency via the cpufreq sysfs knobs (what b/cpuset does)
+    cgroup  move the heavy processes into a cgroup v2 group with a cpu.max quota
+    stop    SIGSTOP the top heat contributors
+    kill    terminate the top heat contributors (the old critical path)
+
+Each rung engages when the temperature reaches its level and releases by
+itself once the temperature is `hysteresis` degrees below that level
+(kill cannot be undone, it only re-arms). A rung that fails for lack of
+permission is marked unavailable and skipped, so the ladder keeps working
+as a normal user with whatever it is allowed to do.
+
+Rungs get their targets from a callable returning [(pid, starttime,
+label)], most important first. Paused processes cool off and leave that
+ranking, so the kill rung is also handed whatever the stop rung paused.
+"""
+import glob
+import os
+import signal
+import subprocess
+import sys
+import threading
+
+CPUFREQ_GLOB = "/sys/devices/system/cpu/cpu[0-9]*/cpufreq"
+CGROUP_ROOT = "/sys/fs/cgroup"
+CGROUP_NAME = "temperature-warn"
+HYSTERESIS = 3.0
+COMMAND_TIMEOUT = 5  # seconds before cpupower & co. are killed
+
+
+class Step:
+    """One rung of the ladder."""
+    name = "step"
+    reversible = True
+
+    def __init__(self, level):
+        self.level = level
+        self.active = False
+        self.available = True
+        self.signalled = 0  # processes paused/terminated so far, for tempMetrics
+
+    def engage(self, targets):
+        """Apply (again); called every tick while engaged. Return False if not permitted."""
+        return True
+
+    def release(self):
+        pass
+
+    def __repr__(self):
+        return f"{self.name}@{self.level:g}"
+
+
+class CpuFreqStep(Step):
+    """Cap scaling_max_freq at percent of cpuinfo_max_freq on every policy."""
+    name = "freq"
+
+    def __init__(self, level, percent=70, cpufreq_glob=CPUFREQ_GLOB):
+        super().__init__(level)
+        self.percent = percent
+        self.cpufreq_glob = cpufreq_glob
+        self.saved = {}
+
+    def engage(self, targets):
+        if self.saved:
+            return True
+        limit_khz = None
+        denied = False
+        for policy in sorted(glob.glob(self.cpufreq_glob)):
+            try:
+                with open(os.path.join(policy, "cpuinfo_max_freq")) as f:
+                    limit_khz = int(f.read()) * self.percent // 100
+                path = os.path.join(policy, "scaling_max_freq")
+                with open(path) as f:
+                    current = f.read().strip()
+                with open(path, "w") as f:
+                    f.write(str(limit_khz))
+                self.saved[path] = current
+            except PermissionError:
+                denied = True
+            except (OSError, ValueError) as e:
+                print(f"Error capping {policy}: {e}", file=sys.stderr)
+        if denied and limit_khz:
+            # same knob b/cpuset drives, through sudo when we are not root
+            cmd = ["sudo", "-n", "cpupower", "frequency-set", "-u", f"{limit_khz}kHz"]
+            try:
+                subprocess.run(cmd, check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+                               timeout=COMMAND_TIMEOUT)
+                self.saved["cpupower"] = None
+            except (OSError, subprocess.SubprocessError):
+                return False
+        if self.saved:
+            print(f"MITIGATE: CPU frequency capped at {self.percent}%", file=sys.stderr)
+        return bool(self.saved)
+
+    def release(self):
+        if not self.saved:
+            return
+        for path, value in list(self.saved.items()):
+            try:
+                if path == "cpupower":
+                    subprocess.run(["sudo", "-n", "cpupower", "frequency-set", "-u", _max_khz(self.cpufreq_glob)],
+                                   check=False, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+                                   timeout=COMMAND_TIMEOUT)
+                else:
+                    with open(path, "w") as f:
+                        f.write(value)
+            except (OSError, subprocess.SubprocessError) as e:
+                print(f"Error restoring {path}: {e}", file=sys.stderr)
+        self.saved = {}
+        print("MITIGATE: CPU frequency cap released", file=sys.stderr)
+
+
+def _max_khz(cpufreq_glob):
+    for policy in sorted(glob.glob(cpufreq_glob)):
+        try:
+            with open(os.path.join(policy, "cpuinfo_max_freq")) as f:
+                return f"{int(f.read())}kHz"
+        except (OSError, ValueError):
+            continue
+    return "0kHz"
+
+
+class CgroupStep(Step):
+    """Move targets into a cgroup v2 group limited by cpu.max."""
+    name = "cgroup"
+
+    def __init__(self, level, percent=50, root=CGROUP_ROOT, group=CGROUP_NAME, period=100000):
+        super().__init__(level)
+        self.percent = percent
+        self.root = root
+        self.path = os.path.join(root, group)
+        self.period = period
+        self.moved = {}  # pid -> original cgroup directory
+
+    def _setup(self):
+        if not os.path.isdir(self.path):
+            with open(os.path.join(self.root, "cgroup.subtree_control"), "w") as f:
+                f.write("+cpu")
+            os.mkdir(self.path)
+        quota = self.period * (os.cpu_count() or 1) * self.percent // 100
+        with open(os.path.join(self.path, "cpu.max"), "w") as f:
+            f.write(f"{quota} {self.period}")
+
+    @staticmethod
+    def _move(pid, group):
+        with open(os.path.join(group, "cgroup.procs"), "w") as f:
+            f.write(str(pid))
+
+    def engage(self, targets):
+        try:
+            if not self.moved:
+                self._setup()
+        except PermissionError:
+            return False
+        except OSError as e:
+            print(f"Error setting up {self.path}: {e}", file=sys.stderr)
+            return True
+        for pid, _, label in targets:
+            if pid in self.moved:
+                continue
+            original = _cgroup_of(pid, self.root)
+            if original is None:
+                continue
+            try:
+                self._move(pid, self.path)
+            except PermissionError:
+                return False
+            except OSError as e:
+                # ESRCH: exited since it was ranked; EINVAL: cannot be moved
+                print(f"Error limiting {label} (PID {pid}): {e}", file=sys.stderr)
+                continue
+            self.moved[pid] = original
+            print(f"MITIGATE: limited {label} (PID {pid}) to {self.percent}% CPU", file=sys.stderr)
+        return True
+
+    def release(self):
+        if not self.moved:
+            return
+        for pid, original in self.moved.items():
+            try:
+                self._move(pid, original)
+            except OSError:
+                pass  # process gone
+        self.moved = {}
+        print("MITIGATE: CPU quota released", file=sys.stderr)
+
+
+def _cgroup_of(pid, root=CGROUP_ROOT):
+    """cgroup v2 directory a process currently belongs to."""
+    try:
+        with open(f"/proc/{pid}/cgroup") as f:
+            for line in f:
+                if line.startswith("0::"):
+                    return os.path.join(root, line[3:].strip().lstrip("/"))
+    except OSError:
+        pass
+    return None
+
+
+def _starttime(pid, proc="/proc"):
+    """starttime (clock ticks) of pid, or None once it is gone."""
+    try:
+        with open(f"{proc}/{pid}/stat", "rb") as f:
+            data = f.read()
+    except OSError:
+        return None
+    return int(data[data.rfind(b")") + 2:].split()[19])
+
+
+class StopStep(Step):
+    """SIGSTOP up to `count` targets per excursion; SIGCONT them on release.
+    Stopped processes are remembered as (pid, starttime, label), so a PID
+    reused meanwhile is never continued."""
+    name = "stop"
+
+    def __init__(self, level, count=3):
+        super().__init__(level)
+        self.count = count
+        self.stopped = []  # [(pid, starttime, label)], as the targets came
+
+    def engage(self, targets):
+        # stopped processes cool off and drop out of the ranking; do not
+        # keep pausing the next ones in line
+        if len(self.stopped) >= self.count:
+            return True
+        denied = False
+        paused = {pid for pid, _, _ in self.stopped}
+        for pid, start, label in targets[:self.count]:
+            if len(self.stopped) >= self.count:
+                break
+            if pid in paused or _starttime(pid) != start:
+                continue  # gone or reused since it was ranked
+            try:
+                os.kill(pid, signal.SIGSTOP)
+                self.stopped.append((pid, start, label))
+                self.signalled += 1
+                print(f"MITIGATE: paused {label} (PID {pid})", file=sys.stderr)
+            except PermissionError:
+                denied = True
+            except OSError:
+                pass
+        return bool(self.stopped) or not denied
+
+    def release(self):
+        if not self.stopped:
+            return
+        for pid, start, _ in self.stopped:
+            if _starttime(pid) != start:
+                continue  # exited, PID possibly reused
+            try:
+                os.kill(pid, signal.SIGCONT)
+            except OSError:
+                pass
+        print(f"MITIGATE: resumed {len(self.stopped)} paused processes", file=sys.stderr)
+        self.stopped = []
+
+
+class KillStep(Step):
+    """Last resort: run the terminate action on the targets once per excursion.
+    Processes paused by `stop` (a StopStep) come first: they caused the heat
+    but have cooled off in the ranking. The action returns how many
+    processes it terminated. With background set it runs on its own daemon
+    thread, so its SIGTERM grace period does not hold up the tick."""
+    name = "kill"
+    reversible = False
+
+    def __init__(self, level, action, stop=None, background=False):
+        super().__init__(level)
+        self.action = action
+        self.stop = stop
+        self.background = background
+        self.fired = False
+
+    def engage(self, targets):
+        if not self.fired:
+            self.fired = True
+            paused = list(self.stop.stopped) if self.stop else []
+            keys = {(pid, start) for pid, start, _ in paused}
+            targets = paused + [t for t in targets if (t[0], t[1]) not in keys]
+            if self.background:
+                threading.Thread(target=self._terminate, args=(targets,), name="temp-kill", daemon=True).start()
+            else:
+                self._terminate(targets)
+        return True
+
+    def _terminate(self, targets):
+        self.signalled += self.action(targets) or 0
+
+    def release(self):
+        self.fired = False
+
+
+class MitigationLadder:
+    """Engage rungs as the temperature climbs, release them as it falls."""
+
+    def __init__(self, steps, find_targets, hysteresis=HYSTERESIS):
+        self.steps = sorted(steps, key=lambda s: s.level)
+        self.find_targets = find_targets
+        self.hysteresis = hysteresis
+
+    def update(self, temp, floor=0):
+        """Apply the ladder for temp. The first `floor` rungs stay engaged
+        regardless of temp (used by the forecast to act early)."""
+        targets = None
+        for index, step in enumerate(self.steps):
+            wanted = temp >= step.level or index < floor
+            if wanted and step.available:
+                if targets is None:
+                    targets = self.find_targets()
+                if not step.engage(targets):
+                    step.available = False
+                    print(f"MITIGATE: {step.name} not permitted, skipping it", file=sys.stderr)
+                    # undo whatever it managed before being refused, active or not
+                    step.release()
+                    step.active = False
+                    continue
+                step.active = True
+        for index in range(len(self.steps) - 1, -1, -1):
+            step = self.steps[index]
+            if step.active and index >= floor and temp < step.level - self.hysteresis:
+                step.release()
+                step.active = False
+
+    def release_all(self):
+        for step in reversed(self.steps):
+            if step.active:
+                step.release()
+                step.active = False
+
+    def active(self):
+        """Names of the engaged rungs, lowest first."""
+        return [s.name for s in self.steps if s.active]
+
+    def index_of(self, name):
+        """1-based rung count up to and including `name`, 0 if absent."""
+        for index, step in enumerate(self.steps):
+            if step.name == name:
+                return index + 1
+        return 0
+
+
+def parse_ladder(spec, kill_action, background_kill=False):
+    """Build steps from "freq:73,cgroup:75,stop:78,kill:80" (name:level[:arg]).
+    background_kill runs the kill action off the calling thread."""
+    steps = []
+    for part in spec.split(","):
+        fields = part.strip().split(":")
+        if len(fields) < 2:
+            raise ValueError(f"bad ladder step {part!r}, want name:level[:arg]")
+        name, level = fields[0], float(fields[1])
+        arg = int(fields[2]) if len(fields) > 2 else None
+        if name == "freq":
+            steps.append(CpuFreqStep(level, *([arg] if arg else [])))
+        elif name == "cgroup":
+            steps.append(CgroupStep(level, *([arg] if arg else [])))
+        elif name == "stop":
+            steps.append(StopStep(level, *([arg] if arg else [])))
+        elif name == "kill":
+            steps.append(KillStep(level, kill_action, background=background_kill))
+        else:
+            raise ValueError(f"unknown ladder step {name!r}")
+    stops = [s for s in steps if isinstance(s, StopStep)]
+    for step in steps:
+        if isinstance(step, KillStep) and stops:
+            step.stop = stops[0]
+    return steps
+
+
+def default_ladder(warn, critical):
+    """freq at warn, cgroup halfway, stop at critical, kill 2° past it."""
+    return f"freq:{warn:g},cgroup:{(warn + critical) / 2:g},stop:{critical:g},kill:{critical + 2:g}"
@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+# sel2in.com tgkprog@gmail.com
+"""Desktop notifications for temperatureWarn.py over D-Bus.
+
+Talks to org.freedesktop.Notifications on one session-bus connection
+(PyGObject's Gio, the same stack as b/showWin.py) instead of forking
+notify-send every tick. Each kind of message ("temp", "forecast") keeps
+the ID the server returned and passes it as replaces_id, so a long heat
+event updates one bubble in place instead of stacking new ones.
+
+A token bucket limits how often a bubble is (re)sent; a repeat of the text
+already on screen is dropped without using a token, and an update that
+finds the bucket empty is held and goes out with the next call that has a
+token. With no gi or no session bus it falls back to notify-send (or the
+`sender` passed in, e.g. an async one), under the same rate limit.
+"""
+import subprocess
+import sys
+import time
+
+try:
+    from gi.repository import Gio, GLib
+except ImportError:
+    Gio = GLib = None  # python3-gi not available, notify-send only
+
+BUS_NAME = "org.freedesktop.Notifications"
+OBJECT_PATH = "/org/freedesktop/Notifications"
+INTERFACE = "org.freedesktop.Notifications"
+APP_NAME = "temperature-warn"
+ICON = "dialog-warning"
+URGENCY = {"low": 0, "normal": 1, "critical": 2}
+RATE = 0.2     # tokens per second: one bubble update per 5 s when busy
+BURST = 3      # updates allowed back to back
+TIMEOUT_MS = 2000
+
+
+class TokenBucket:
+    """Classic token bucket: `rate` tokens per second, at most `burst` saved."""
+
+    def __init__(self, rate=RATE, burst=BURST, clock=time.monotonic):
+        self.rate = rate
+        self.burst = burst
+        self.clock = clock
+        self.tokens = float(burst)
+        self.last = clock()
+
+    def take(self):
+        now = self.clock()
+        self.tokens = min(self.burst, self.tokens + (now - self.last) * self.rate)
+        self.last = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return True
+        return False
+
+
+class Notifier:
+    """Rate-limited, replace-in-place desktop notifications."""
+
+    def __init__(self, app_name=APP_NAME, rate=RATE, burst=BURST, clock=time.monotonic, address=None,
+                 sender=None):
+        self.app_name = app_name
+        self.sender = sender or self._notify_send  # fallback: sender(summary, body, urgency)
+        self.bucket = TokenBucket(rate, burst, clock)
+        self.address = address  # bus address; None = the session bus
+        self.bus = None
+        self.warned = False
+        self.ids = {}      # key -> notification id from the server
+        self.shown = {}    # key -> (summary, body) last sent
+        self.pending = {}  # key -> (summary, body, urgency) held by the limiter
+
+    def _connect(self):
+        if self.bus is None and Gio is not None:
+            try:
+                if self.address:
+                    flags = (Gio.DBusConnectionFlags.AUTHENTICATION_CLIENT
+                             | Gio.DBusConnectionFlags.MESSAGE_BUS_CONNECTION)
+                    self.bus = Gio.DBusConnection.new_for_address_sync(self.address, flags, None, None)
+                else:
+                    self.bus = Gio.bus_get_sync(Gio.BusType.SESSION, None)
+            except GLib.Error as e:
+                if not self.warned:
+                    print(f"D-Bus unavailable, using notify-send: {e.message}", file=sys.stderr)
+                    self.warned = True
+        return self.bus
+
+    def notify(self, summary, body, urgency="critical", key="temp"):
+        """Show or replace the `key` bubble. Returns "sent", "repeat" or "held"."""
+        if self.shown.get(key) == (summary, body):
+            self.pending.pop(key, None)
+            return "repeat"
+        if not self.bucket.take():
+            self.pending[key] = (summary, body, urgency)
+            return "held"
+        self.pending.pop(key, None)
+        self.shown[key] = (summary, body)
+        bus = self._connect()
+        if bus is not None:
+            try:
+                self.ids[key] = self._call(bus, key, summary, body, urgency)
+                return "sent"
+            except GLib.Error as e:
+                print(f"D-Bus notify failed, using notify-send: {e.message}", file=sys.stderr)
+                self.bus = None
+        self.sender(summary, body, urgency)
+        return "sent"
+
+    def flush(self):
+        """Send held updates if the bucket allows."""
+        for key, (summary, body, urgency) in list(self.pending.items()):
+            self.notify(summary, body, urgency, key)
+
+    def _call(self, bus, key, summary, body, urgency):
+        params = GLib.Variant("(susssasa{sv}i)", (
+            self.app_name, self.ids.get(key, 0), ICON, summary, body, [],
+            {"urgency": GLib.Variant("y", URGENCY[urgency])}, -1,
+        ))
+        reply = bus.call_sync(BUS_NAME, OBJECT_PATH, INTERFACE, "Notify", params,
+                              GLib.VariantType("(u)"), Gio.DBusCallFlags.NONE, TIMEOUT_MS, None)
+        return reply.unpack()[0]
+
+    def _notify_send(self, summary, body, urgency):
+        try:
+            subprocess.run(["notify-send", "-u", urgency, summary, body], check=False, timeout=TIMEOUT_MS / 1000)
+        except (OSError, subprocess.SubprocessError) as e:
+            print(f"Error sending notification: {e}", file=sys.stderr)
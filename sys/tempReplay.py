@@ -0,0 +1,338 @@
+#!/usr/bin/env python3
+# sel2in.com tgkprog@gmail.com
+"""Record-and-replay harness and benchmark for temperatureWarn.py.
+
+Fixtures are JSON files (test/fixtures/*.capture.json) holding what one
+machine's sensors looked like at one instant, in all three forms the
+monitor can read:
+
+    {"name": ..., "captured": "2026-01-14 01:24:31",
+     "sensors": "<`sensors` text>",
+     "sensors_json": {<`sensors -j`>},
+     "hwmon": {"hwmon1": ["k10temp", {"temp1_input": "73000", ...}], ...},
+     "expected": {"cpu": 73.0, ...}}   # SensorSnapshot fields
+
+Record one on the laptop with `python3 tempReplay.py capture NAME`, check
+and fill in "expected", and every parser can then be tested without it.
+
+VirtualMonitor runs the real Monitor.tick() on a virtual clock with a
+scripted temperature trace on top of a fixture, recording each decision
+instead of acting on it.
+
+    python3 tempReplay.py capture NAME [-o FILE]
+    python3 tempReplay.py bench [FIXTURE...]      parse cost + decision latency
+    python3 tempReplay.py replay [--trace TSV]    print the decisions for a trace
+"""
+import argparse
+import bisect
+import glob
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+import tempSchedule
+import tempSensors
+import temperatureWarn
+from tempSensors import SensorSnapshot
+
+FIXTURE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "test", "fixtures")
+SOURCES = ("hwmon", "sensors-json", "sensors")
+
+
+# --- fixtures ---------------------------------------------------------------
+
+def capture(name, hwmon_root=tempSensors.HWMON_ROOT, chips=tempSensors.CHIPS):
+    """Record this machine's sensors in every form as a fixture dict."""
+    hwmon = {}
+    for entry in sorted(os.listdir(hwmon_root)) if os.path.isdir(hwmon_root) else []:
+        chip_dir = os.path.join(hwmon_root, entry)
+        chip = tempSensors._read_text(os.path.join(chip_dir, "name"))
+        if not chip or not chip.startswith(chips):
+            continue
+        attrs = {}
+        for attr in sorted(os.listdir(chip_dir)):
+            if tempSensors._ATTR_RE.match(attr) or attr.endswith("_label"):
+                value = tempSensors._read_text(os.path.join(chip_dir, attr))
+                if value is not None:
+                    attrs[attr] = value
+        hwmon[entry] = [chip, attrs]
+    try:
+        text = subprocess.check_output(["sensors"], text=True, stderr=subprocess.DEVNULL)
+    except (OSError, subprocess.CalledProcessError):
+        text = ""
+    fixture = {
+        "name": name,
+        "captured": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        "sensors": text,
+        "sensors_json": tempSensors.read_sensors_json(),
+        "hwmon": hwmon,
+    }
+    # a starting point only: check it against `sensors` before committing
+    fixture["expected"] = dict(zip(SensorSnapshot.FIELDS, parse(fixture, "sensors-json").values()))
+    return fixture
+
+
+def load_fixture(path):
+    with open(path) as f:
+        return json.load(f)
+
+
+def fixture_paths(directory=FIXTURE_DIR):
+    return sorted(glob.glob(os.path.join(directory, "*.capture.json")))
+
+
+def write_hwmon(root, tree):
+    """Write a fixture's hwmon tree as a fake /sys/class/hwmon under root."""
+    for entry, (name, attrs) in tree.items():
+        chip_dir = os.path.join(root, entry)
+        os.makedirs(chip_dir, exist_ok=True)
+        with open(os.path.join(chip_dir, "name"), "w") as f:
+            f.write(name + "\n")
+        for attr, value in attrs.items():
+            with open(os.path.join(chip_dir, attr), "w") as f:
+                f.write(value + "\n")
+
+
+class HwmonFixture:
+    """A fixture's hwmon tree on disk for the life of a with block."""
+
+    def __init__(self, fixture):
+        self.fixture = fixture
+
+    def __enter__(self):
+        self.root = tempfile.mkdtemp(prefix="hwmon-")
+        write_hwmon(self.root, self.fixture["hwmon"])
+        self.backend = tempSensors.HwmonBackend(self.root)
+        return self
+
+    def read(self):
+        return SensorSnapshot.from_chips(self.backend.read(), "hwmon")
+
+    def __exit__(self, *exc):
+        self.backend.close()
+        shutil.rmtree(self.root)
+
+
+def parse(fixture, source):
+    """SensorSnapshot for one source of a fixture, through the real parsers."""
+    if source == "sensors":
+        return SensorSnapshot.from_chips(tempSensors.parse_sensors_text(fixture["sensors"]), source)
+    if source == "sensors-json":
+        return SensorSnapshot.from_chips(json.loads(json.dumps(fixture["sensors_json"])), source)
+    with HwmonFixture(fixture) as hwmon:
+        return hwmon.read()
+
+
+def mismatches(fixture, snapshot, tolerance=0.06):
+    """[(field, expected, got)] where snapshot differs from fixture["expected"].
+    The default tolerance allows for `sensors` printing temperatures to 0.1°C."""
+    bad = []
+    for name, want in fixture["expected"].items():
+        got = getattr(snapshot, name)
+        if (want is None) != (got is None) or (want is not None and abs(want - got) > tolerance):
+            bad.append((name, want, got))
+    return bad
+
+
+# --- traces -----------------------------------------------------------------
+
+def heat_event(t):
+    """Idle at 45°C for 10 minutes, then heat at 0.25°C/s up to 85°C."""
+    if t < 600:
+        return 45.0
+    return min(85.0, 45.0 + (t - 600) * 0.25)
+
+
+def load_trace(path):
+    """Trace from a TSV of `seconds<TAB>temp` lines, linearly interpolated."""
+    times, temps = [], []
+    with open(path) as f:
+        for line in f:
+            if line.strip() and not line.startswith("#"):
+                t, temp = line.split()[:2]
+                times.append(float(t))
+                temps.append(float(temp))
+
+    def trace(t):
+        i = bisect.bisect_right(times, t)
+        if i == 0:
+            return temps[0]
+        if i == len(times):
+            return temps[-1]
+        t0, t1 = times[i - 1], times[i]
+        return temps[i - 1] + (temps[i] - temps[i - 1]) * (t - t0) / (t1 - t0)
+    return trace
+
+
+def crossing_time(trace, threshold, step=0.01, limit=86400):
+    """First virtual time the trace reaches threshold, or None."""
+    t = 0.0
+    while trace(t) < threshold:
+        t += step
+        if t > limit:
+            return None
+    return t
+
+
+# --- replay -----------------------------------------------------------------
+
+class VirtualMonitor(temperatureWarn.Monitor):
+    """Monitor on a virtual clock that records alerts, forecast pre-emption
+    and critical mitigation instead of acting on them."""
+
+    def __init__(self, scheduler, trace, base=None, **kwargs):
+        self.now = 0.0
+        self.trace = trace
+        self.base = base or SensorSnapshot()
+        self.alerts = []
+        self.pre_empts = []
+        self.criticals = []
+        self.samples = []
+        self.tick_seconds = 0.0
+        super().__init__(scheduler, read=self.read_trace, clock=lambda: self.now, sleep=self.advance, **kwargs)
+
+    def read_trace(self):
+        snapshot = SensorSnapshot(timestamp=1e9 + self.now, source="replay", chips=self.base.chips,
+                                  **dict(zip(SensorSnapshot.FIELDS, self.base.values())))
+        snapshot.cpu = self.trace(self.now)
+        return snapshot
+
+    def advance(self, seconds):
+        self.now += seconds
+
+    def tick(self):
+        self.samples.append(self.now)
+        start = time.perf_counter()
+        delay = super().tick()
+        self.tick_seconds += time.perf_counter() - start
+        return delay
+
+    def alert(self, temp, snapshot):
+        self.alerts.append((self.now, temp))
+
+    def pre_empt(self, temp, eta, snapshot):
+        self.pre_empts.append((self.now, temp, eta))
+
+    def release(self):
+        pass
+
+    def mitigate(self, temp):
+        if temp >= temperatureWarn.CRITICAL:
+            self.criticals.append((self.now, temp))
+        super().mitigate(temp)
+
+    def replay(self, until):
+        while self.now < until:
+            self.sleep(self.tick())
+
+
+def replay(trace, until, min_interval=temperatureWarn.MIN_INTERVAL, max_interval=temperatureWarn.MAX_INTERVAL,
+           base=None):
+    """Run a trace through a VirtualMonitor with the ring log in a temp dir."""
+    scheduler = tempSchedule.SampleScheduler(temperatureWarn.THRESHOLD, temperatureWarn.CRITICAL,
+                                             min_interval, max_interval)
+    monitor = VirtualMonitor(scheduler, trace, base)
+    saved = temperatureWarn.LOG_FILE
+    with tempfile.TemporaryDirectory() as tmp:
+        temperatureWarn.LOG_FILE = os.path.join(tmp, "temp.ring")
+        try:
+            monitor.replay(until)
+        finally:
+            temperatureWarn.LOG_FILE = saved
+    return monitor
+
+
+def decision_latency(monitor, trace):
+    """{path: seconds from the trace crossing to the decision} for warn,
+    critical and forecast (negative = acted before the crossing)."""
+    warn_at = crossing_time(trace, temperatureWarn.THRESHOLD)
+    crit_at = crossing_time(trace, temperatureWarn.CRITICAL)
+    out = {}
+    if warn_at is not None and monitor.alerts:
+        out["warn"] = monitor.alerts[0][0] - warn_at
+    if crit_at is not None and monitor.criticals:
+        out["critical"] = monitor.criticals[0][0] - crit_at
+    if crit_at is not None and monitor.pre_empts:
+        out["forecast"] = monitor.pre_empts[0][0] - crit_at
+    return out
+
+
+# --- benchmark --------------------------------------------------------------
+
+def bench_parse(fixture, iterations=2000):
+    """{source: microseconds per snapshot} through each real parser."""
+    out = {}
+    text = fixture["sensors"]
+    start = time.perf_counter()
+    for _ in range(iterations):
+        SensorSnapshot.from_chips(tempSensors.parse_sensors_text(text), "sensors")
+    out["sensors"] = (time.perf_counter() - start) / iterations * 1e6
+    raw = json.dumps(fixture["sensors_json"])
+    start = time.perf_counter()
+    for _ in range(iterations):
+        SensorSnapshot.from_chips(json.loads(raw), "sensors-json")
+    out["sensors-json"] = (time.perf_counter() - start) / iterations * 1e6
+    with HwmonFixture(fixture) as hwmon:
+        start = time.perf_counter()
+        for _ in range(iterations):
+            hwmon.read()
+        out["hwmon"] = (time.perf_counter() - start) / iterations * 1e6
+    return out
+
+
+def bench(paths, iterations=2000, out=sys.stdout):
+    print(f"{'fixture':<24} {'source':<13} {'µs/snapshot':>12}", file=out)
+    for path in paths:
+        fixture = load_fixture(path)
+        for source, micros in bench_parse(fixture, iterations).items():
+            print(f"{fixture['name']:<24} {source:<13} {micros:>12.1f}", file=out)
+    monitor = replay(heat_event, 900)
+    print(f"\nheat_event replay: {len(monitor.samples)} ticks, "
+          f"{monitor.tick_seconds / len(monitor.samples) * 1e6:.0f} µs per tick", file=out)
+    print(f"{'path':<10} {'latency s':>10}  (virtual time from crossing to decision)", file=out)
+    for path, latency in decision_latency(monitor, heat_event).items():
+        print(f"{path:<10} {latency:>10.1f}", file=out)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Capture, replay and benchmark sensor fixtures")
+    sub = parser.add_subparsers(dest="command", required=True)
+    cap = sub.add_parser("capture", help="Record this machine's sensors as a fixture")
+    cap.add_argument("name")
+    cap.add_argument("-o", "--output", help="Fixture file (default: test/fixtures/NAME.capture.json)")
+    ben = sub.add_parser("bench", help="Parse cost per source and decision latency per path")
+    ben.add_argument("fixtures", nargs="*", help="Fixture files (default: all in test/fixtures)")
+    ben.add_argument("-n", "--iterations", type=int, default=2000)
+    rep = sub.add_parser("replay", help="Print the monitor's decisions for a trace")
+    rep.add_argument("--trace", help="TSV of seconds<TAB>temp (default: built-in heat event)")
+    rep.add_argument("--until", type=float, default=900)
+    rep.add_argument("--min-interval", type=float, default=temperatureWarn.MIN_INTERVAL)
+    rep.add_argument("--max-interval", type=float, default=temperatureWarn.MAX_INTERVAL)
+    args = parser.parse_args(argv)
+
+    if args.command == "capture":
+        path = args.output or os.path.join(FIXTURE_DIR, f"{args.name}.capture.json")
+        with open(path, "w") as f:
+            json.dump(capture(args.name), f, indent=2, ensure_ascii=False)
+        print(f"Wrote {path}; check its \"expected\" values against `sensors`")
+    elif args.command == "bench":
+        bench(args.fixtures or fixture_paths(), args.iterations)
+    else:
+        trace = load_trace(args.trace) if args.trace else heat_event
+        monitor = replay(trace, args.until, args.min_interval, args.max_interval)
+        for when, temp in monitor.alerts:
+            print(f"{when:8.1f}s  alert     {temp:.1f}°C")
+        for when, temp, eta in monitor.pre_empts:
+            print(f"{when:8.1f}s  forecast  {temp:.1f}°C, critical in ~{eta:.0f}s")
+        for path, latency in decision_latency(monitor, trace).items():
+            print(f"{path} latency: {latency:.1f}s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
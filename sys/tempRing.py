@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+# sel2in.com tgkprog@gmail.com
+"""Fixed-size, memory-mapped ring file of sensor snapshots.
+
+Replaces the old text log that was read, filtered and rewritten every tick.
+The file is preallocated once; an append packs one fixed-size record into
+the mapped page and bumps a sequence number in the header, so disk writes
+per tick are constant and nothing is ever rewritten.
+
+Layout (little endian):
+    header  MAGIC, version, record size, capacity, next sequence number
+    records seq, epoch timestamp, one float32 per SensorSnapshot field
+            (NaN for a missing sensor), then the TOP_N hottest processes
+            as (pid, % of a core, comm)
+Record seq N lives in slot N % capacity; a reader trusts a slot only when
+its stored seq matches, which also skips a slot caught mid-write.
+"""
+import math
+import mmap
+import os
+import struct
+
+from tempSensors import SensorSnapshot
+
+MAGIC = b"TRNG"
+VERSION = 2
+DEFAULT_CAPACITY = 1024  # ~17 minutes at 1 s, ~8 hours at 30 s
+TOP_N = 3  # heat ranking entries kept per record
+
+_HEADER = struct.Struct("<4sHHIQ")
+HEADER_SIZE = 64
+_RECORD = struct.Struct("<Qd%df" % len(SensorSnapshot.FIELDS) + "IH16s" * TOP_N)
+_NFIELDS = len(SensorSnapshot.FIELDS)
+_NAN = float("nan")
+
+
+class TempRing:
+    """Ring of SensorSnapshot records backed by an mmap'd file."""
+
+    def __init__(self, path, capacity=DEFAULT_CAPACITY, readonly=False):
+        self.path = path
+        self.readonly = readonly
+        if readonly:
+            fd = os.open(path, os.O_RDONLY)
+        else:
+            fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            if readonly:
+                self._map = mmap.mmap(fd, 0, access=mmap.ACCESS_READ)
+                self.capacity = self._check_header()
+                if self.capacity is None:
+                    self._map.close()
+                    raise ValueError(f"{path} is not a temperature ring file")
+            else:
+                self._map = self._open_rw(fd, capacity)
+                self.capacity = capacity
+        finally:
+            os.close(fd)
+
+    def _open_rw(self, fd, capacity):
+        size = HEADER_SIZE + capacity * _RECORD.size
+        if os.fstat(fd).st_size == size:
+            m = mmap.mmap(fd, size)
+            self._map = m
+            if self._check_header() == capacity:
+                return m
+            m.close()
+        # new file, old text log, other version or capacity: start over
+        os.ftruncate(fd, 0)
+        os.ftruncate(fd, size)
+        m = mmap.mmap(fd, size)
+        _HEADER.pack_into(m, 0, MAGIC, VERSION, _RECORD.size, capacity, 1)
+        return m
+
+    def _check_header(self):
+        if len(self._map) < HEADER_SIZE:
+            return None
+        magic, version, record_size, capacity, _ = _HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC or version != VERSION or record_size != _RECORD.size:
+            return None
+        if len(self._map) != HEADER_SIZE + capacity * record_size:
+            return None
+        return capacity
+
+    @property
+    def next_seq(self):
+        return _HEADER.unpack_from(self._map, 0)[4]
+
+    def append(self, snapshot):
+        """Store one snapshot; O(1), overwrites the oldest record when full."""
+        seq = self.next_seq
+        offset = HEADER_SIZE + (seq % self.capacity) * _RECORD.size
+        values = [_NAN if v is None else v for v in snapshot.values()]
+        top = list(snapshot.top[:TOP_N]) + [(0, "", 0.0)] * (TOP_N - len(snapshot.top[:TOP_N]))
+        for pid, comm, heat in top:
+            values += (pid, min(65535, int(round(heat * 100))), comm.encode()[:16])
+        _RECORD.pack_into(self._map, offset, seq, snapshot.timestamp, *values)
+        struct.pack_into("<Q", self._map, _HEADER.size - 8, seq + 1)
+
+    def snapshots(self, since=None):
+        """Yield stored snapshots oldest first, optionally only those >= since."""
+        end = self.next_seq
+        for seq in range(max(1, end - self.capacity), end):
+            offset = HEADER_SIZE + (seq % self.capacity) * _RECORD.size
+            record = _RECORD.unpack_from(self._map, offset)
+            if record[0] != seq:
+                continue
+            timestamp = record[1]
+            if since is not None and timestamp < since:
+                continue
+            values = {
+                name: (None if math.isnan(v) else v)
+                for name, v in zip(SensorSnapshot.FIELDS, record[2:])
+            }
+            rest = record[2 + _NFIELDS:]
+            top = [
+                (rest[i], rest[i + 2].rstrip(b"\0").decode(errors="replace"), rest[i + 1] / 100)
+                for i in range(0, len(rest), 3) if rest[i]
+            ]
+            yield SensorSnapshot(timestamp=timestamp, source="ring", top=top, **values)
+
+    def close(self):
+        self._map.close()
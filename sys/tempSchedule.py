@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+# sel2in.com tgkprog@gmail.com
+"""Adaptive sampling interval for temperatureWarn.py.
+
+The next sample time depends on how close the CPU is to --warn/--critical
+and on how fast it is heating up:
+  - within APPROACH_MARGIN of --critical: every min_interval
+  - within APPROACH_MARGIN of --warn:     every 2 * min_interval
+  - cooler: grows with the headroom, up to max_interval, but never longer
+    than a quarter of the time the current slope needs to reach the warn
+    band
+The hot zone is left only HYSTERESIS degrees below where it was entered,
+and the interval may grow by at most BACKOFF per sample, so readings
+wobbling around a boundary do not make the cadence flap. A jump of
+STEP_RESET degrees between two samples (a load that started while we slept)
+drops the old samples and restarts from min_interval so the new slope is
+measured quickly.
+"""
+from collections import deque
+
+APPROACH_MARGIN = 5.0   # °C below warn/critical where fast sampling starts
+HYSTERESIS = 2.0        # °C below the margin before fast sampling stops
+COOL_SPAN = 20.0        # °C of headroom that maps onto the full interval range
+SLOPE_WINDOW = 60.0     # seconds of samples used for the rate of change
+BACKOFF = 1.5           # max growth factor of the interval per sample
+SLOPE_FRACTION = 0.25   # sample at least 4 times before the slope hits warn
+STEP_RESET = 2.0        # °C change between samples that restarts fast sampling
+
+
+class SampleScheduler:
+    """Pick the delay until the next sample from temperature and slope."""
+
+    def __init__(self, warn, critical, min_interval=1.0, max_interval=120.0):
+        if min_interval <= 0 or max_interval < min_interval:
+            raise ValueError("need 0 < min_interval <= max_interval")
+        self.warn = warn
+        self.critical = critical
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.samples = deque()
+        self.hot = False
+        self.interval = min_interval
+
+    def slope(self):
+        """Least-squares rate of change over SLOPE_WINDOW, °C per second."""
+        n = len(self.samples)
+        if n < 2:
+            return 0.0
+        t0 = self.samples[0][0]
+        sx = sy = sxx = sxy = 0.0
+        for t, temp in self.samples:
+            x = t - t0
+            sx += x
+            sy += temp
+            sxx += x * x
+            sxy += x * temp
+        den = n * sxx - sx * sx
+        if den <= 0:
+            return 0.0
+        return (n * sxy - sx * sy) / den
+
+    def next_interval(self, now, temp):
+        """Record a sample taken at `now` (monotonic seconds); return the delay."""
+        if temp is None:
+            # sensor hiccup: retry soon but do not spin
+            return min(self.max_interval, max(self.min_interval, self.interval))
+        if self.samples and abs(temp - self.samples[-1][1]) >= STEP_RESET:
+            self.samples.clear()
+            self.interval = self.min_interval
+        self.samples.append((now, temp))
+        while self.samples and now - self.samples[0][0] > SLOPE_WINDOW:
+            self.samples.popleft()
+
+        warn_band = self.warn - APPROACH_MARGIN
+        if temp >= warn_band:
+            self.hot = True
+        elif temp < warn_band - HYSTERESIS:
+            self.hot = False
+
+        if self.hot:
+            if temp >= self.critical - APPROACH_MARGIN:
+                target = self.min_interval
+            else:
+                target = min(2 * self.min_interval, self.max_interval)
+        else:
+            headroom = warn_band - temp
+            span = self.max_interval - self.min_interval
+            target = self.min_interval + span * min(1.0, max(0.0, headroom / COOL_SPAN))
+            slope = self.slope()
+            if slope > 0:
+                target = min(target, headroom / slope * SLOPE_FRACTION)
+
+        target = max(self.min_interval, min(self.max_interval, target))
+        # shrink at once, grow gradually
+        self.interval = min(target, self.interval * BACKOFF)
+        return self.interval
@@ -0,0 +1,449 @@
+#!/usr/bin/env python3
+# sel2in.com tgkprog@gmail.com
+"""Sensor backends for temperatureWarn.py.
+
+Readings come back in the same shape as `sensors -j`:
+    {"k10temp-pci-00c3": {"Adapter": "PCI adapter",
+                          "temp1": {"temp1_input": 73.0, "temp1_max": 70.0}}}
+Units follow lm-sensors: degrees C, volts, RPM and watts.
+
+HwmonBackend walks /sys/class/hwmon once, keeps the live value files open and
+re-reads them with os.pread, so a tick costs a few syscalls instead of a fork.
+parse_sensors_text() turns plain `sensors` output into the same shape; with
+read_sensors_json() it is the fallback when no hwmon chips are found.
+SensorReader ties these together and returns one SensorSnapshot per call.
+"""
+import json
+import os
+import re
+import subprocess
+import sys
+import time
+from typing import Optional
+
+HWMON_ROOT = "/sys/class/hwmon"
+SENSORS_TIMEOUT = 5  # seconds before a hung `sensors` is killed
+
+# Chips the monitor cares about, matched on the hwmon "name" prefix.
+# None in HwmonBackend(chips=...) means "every chip found".
+CHIPS = ("k10temp", "amdgpu", "iwlwifi", "acpitz", "asus", "fam15h_power", "BAT0")
+
+# hwmon raw unit -> lm-sensors unit divisor, per sensor type
+SCALE = {
+    "temp": 1000.0,     # millidegree C
+    "in": 1000.0,       # millivolt
+    "fan": 1.0,         # RPM
+    "power": 1000000.0, # microwatt
+}
+
+# Sub-features re-read every tick; everything else is a limit read once.
+LIVE_SUBFEATURES = ("input", "average")
+
+_ATTR_RE = re.compile(r"^(temp|in|fan|power)(\d+)_([a-z_]+)$")
+
+
+def _read_text(path):
+    try:
+        with open(path) as f:
+            return f.read().strip()
+    except OSError:
+        return None
+
+
+def _bus_name(chip_dir):
+    """Build the libsensors style "bus-address" suffix for a hwmon chip."""
+    device = os.path.join(chip_dir, "device")
+    if not os.path.exists(device):
+        return "virtual-0"
+    real = os.path.realpath(device)
+    base = os.path.basename(real)
+    # PCI: 0000:00:18.3 -> (bus << 8) | (slot << 3) | func -> 00c3
+    m = re.match(r"^[0-9a-f]{4}:([0-9a-f]{2}):([0-9a-f]{2})\.([0-7])$", base)
+    if m:
+        bus, slot, func = (int(x, 16) for x in m.groups())
+        return "pci-%04x" % ((bus << 8) | (slot << 3) | func)
+    if "/ACPI" in real or base.startswith(("PNP", "LNXTHERM", "ACPI")) or "acpi" in base.lower():
+        return "acpi-0"
+    if "/platform/" in real:
+        return "isa-0000"
+    return "virtual-0"
+
+
+_ADAPTERS = {
+    "pci": "PCI adapter",
+    "acpi": "ACPI interface",
+    "isa": "ISA adapter",
+    "virtual": "Virtual device",
+}
+
+
+class _Channel:
+    """One open hwmon value file."""
+    __slots__ = ("chip", "feature", "key", "fd", "divisor")
+
+    def __init__(self, chip, feature, key, fd, divisor):
+        self.chip = chip
+        self.feature = feature
+        self.key = key
+        self.fd = fd
+        self.divisor = divisor
+
+
+class HwmonBackend:
+    """Read hwmon sysfs attributes in-process.
+
+    Discovery happens once in __init__. Live files (*_input, *_average) stay
+    open; static limits (*_max, *_crit, ...) are read at discovery time.
+    """
+
+    def __init__(self, root=HWMON_ROOT, chips=CHIPS):
+        self.root = root
+        self.channels = []
+        self.static = {}
+        self._discover(chips)
+
+    def __bool__(self):
+        return bool(self.channels)
+
+    def _discover(self, chips):
+        try:
+            entries = sorted(os.listdir(self.root), key=lambda n: (len(n), n))
+        except OSError:
+            return
+        for entry in entries:
+            chip_dir = os.path.join(self.root, entry)
+            name = _read_text(os.path.join(chip_dir, "name"))
+            if not name:
+                continue
+            if chips is not None and not name.startswith(chips):
+                continue
+            bus = _bus_name(chip_dir)
+            chip = f"{name}-{bus}"
+            chip_data = {"Adapter": _ADAPTERS[bus.split("-")[0]]}
+            self.static[chip] = chip_data
+            self._discover_chip(chip, chip_dir, chip_data)
+
+    def _discover_chip(self, chip, chip_dir, chip_data):
+        try:
+            names = sorted(os.listdir(chip_dir))
+        except OSError:
+            return
+        for attr in names:
+            m = _ATTR_RE.match(attr)
+            if not m:
+                continue
+            kind, index, sub = m.groups()
+            if sub == "label":
+                continue
+            label = _read_text(os.path.join(chip_dir, f"{kind}{index}_label"))
+            feature = label or f"{kind}{index}"
+            key = attr
+            divisor = SCALE[kind]
+            path = os.path.join(chip_dir, attr)
+            if sub in LIVE_SUBFEATURES:
+                try:
+                    fd = os.open(path, os.O_RDONLY)
+                except OSError:
+                    continue
+                self.channels.append(_Channel(chip, feature, key, fd, divisor))
+                chip_data.setdefault(feature, {})
+            elif sub.endswith("alarm") or sub in ("enable", "type", "fault", "beep"):
+                continue
+            else:
+                raw = _read_text(path)
+                try:
+                    chip_data.setdefault(feature, {})[key] = int(raw) / divisor
+                except (TypeError, ValueError):
+                    continue
+
+    def read(self):
+        """Return a fresh `sensors -j` shaped dict."""
+        out = {}
+        for chip, data in self.static.items():
+            out[chip] = {k: (dict(v) if isinstance(v, dict) else v) for k, v in data.items()}
+        for ch in self.channels:
+            try:
+                raw = os.pread(ch.fd, 32, 0)
+                value = int(raw) / ch.divisor
+            except (OSError, ValueError):
+                continue
+            out[ch.chip][ch.feature][ch.key] = value
+        return out
+
+    def close(self):
+        for ch in self.channels:
+            try:
+                os.close(ch.fd)
+            except OSError:
+                pass
+        self.channels = []
+
+
+# --- `sensors` text fallback -------------------------------------------------
+
+_UNIT_KIND = {
+    "°C": "temp",
+    "C": "temp",
+    "V": "in",
+    "mV": "in",
+    "RPM": "fan",
+    "W": "power",
+    "mW": "power",
+    "uW": "power",
+}
+_UNIT_SCALE = {"mV": 0.001, "mW": 0.001, "uW": 0.000001}
+# names inside "(high = ..., crit = ...)" -> sysfs sub-feature
+_LIMIT_NAMES = {
+    "high": "max",
+    "low": "min",
+    "min": "min",
+    "max": "max",
+    "crit": "crit",
+    "hyst": "crit_hyst",
+    "avg": "average",
+    "interval": "average_interval",
+}
+_VALUE_RE = re.compile(r"([+-]?\d+(?:\.\d+)?)\s*(°C|mV|V|RPM|mW|uW|W|s)\b")
+_LIMIT_RE = re.compile(r"(\w+)\s*=\s*([+-]?\d+(?:\.\d+)?)\s*(°C|mV|V|RPM|mW|uW|W|s)")
+
+
+def parse_sensors_text(text):
+    """Parse plain `sensors` output into the `sensors -j` dict shape.
+
+    Features are numbered per type in the order they appear in a chip
+    section (edge -> temp1, vddgfx -> in0, ...), like libsensors does.
+    """
+    chips = {}
+    chip = None
+    counters = {}
+    feature = None
+    for line in text.splitlines():
+        if not line.strip():
+            chip = None
+            feature = None
+            continue
+        if chip is None:
+            chip = line.strip()
+            chips[chip] = {}
+            counters = {"temp": 0, "in": -1, "fan": 0, "power": 0}
+            continue
+        if line.startswith("Adapter:"):
+            chips[chip]["Adapter"] = line.split(":", 1)[1].strip()
+            continue
+        if line[:1].isspace() and feature is not None:
+            # continuation line: "(crit = +100.0°C, hyst = +99.0°C)"
+            _add_limits(feature, line)
+            continue
+        if ":" not in line:
+            continue
+        name, rest = line.split(":", 1)
+        m = _VALUE_RE.search(rest)
+        if not m:
+            feature = None
+            continue
+        kind = _UNIT_KIND.get(m.group(2))
+        if kind is None:
+            feature = None
+            continue
+        counters[kind] += 1
+        prefix = f"{kind}{counters[kind]}"
+        value = float(m.group(1)) * _UNIT_SCALE.get(m.group(2), 1.0)
+        data = {f"{prefix}_input": value}
+        chips[chip][name.strip()] = data
+        feature = (prefix, data)
+        _add_limits(feature, rest[m.end():])
+    return chips
+
+
+def _add_limits(feature, text):
+    prefix, data = feature
+    for name, number, unit in _LIMIT_RE.findall(text):
+        sub = _LIMIT_NAMES.get(name)
+        if sub is None:
+            continue
+        data[f"{prefix}_{sub}"] = float(number) * _UNIT_SCALE.get(unit, 1.0)
+
+
+def read_sensors_text():
+    """Fork `sensors` once and parse it; {} when unavailable."""
+    try:
+        out = subprocess.check_output(["sensors"], text=True, stderr=subprocess.DEVNULL, timeout=SENSORS_TIMEOUT)
+    except (OSError, subprocess.SubprocessError) as e:
+        print(f"Error running sensors: {e}", file=sys.stderr)
+        return {}
+    return parse_sensors_text(out)
+
+
+# --- lookups shared by the monitor -------------------------------------------
+
+def find_chip(chips, prefix):
+    """Return (name, data) of the first chip whose name starts with prefix."""
+    for name, data in chips.items():
+        if name.startswith(prefix):
+            return name, data
+    return None, None
+
+
+def feature_value(chips, chip_prefix, feature=None, kind="temp", sub="input"):
+    """Value of one sub-feature, e.g. feature_value(c, "amdgpu", "edge").
+
+    With feature=None the first feature of the given kind in the chip is used
+    (k10temp reports its Tctl as "temp1" or "Tctl" depending on the kernel).
+    """
+    _, data = find_chip(chips, chip_prefix)
+    if not data:
+        return None
+    for name, values in data.items():
+        if not isinstance(values, dict):
+            continue
+        if feature is not None and name != feature:
+            continue
+        for key, value in values.items():
+            m = _ATTR_RE.match(key)
+            if m and m.group(1) == kind and m.group(3) == sub:
+                return value
+        if feature is not None:
+            return None
+    return None
+
+
+def format_value(value, kind):
+    """Format a value the way `sensors` prints it ("+73.0°C", "975.00 mV")."""
+    if value is None:
+        return None
+    if kind == "temp":
+        return f"{value:+.1f}°C"
+    if kind == "fan":
+        return f"{value:.0f} RPM"
+    unit = "V" if kind == "in" else "W"
+    if abs(value) < 1:
+        return f"{value * 1000:.2f} m{unit}"
+    return f"{value:.2f} {unit}"
+
+
+def read_sensors_json():
+    """Fork `sensors -j` once; {} when unavailable or not valid JSON."""
+    try:
+        out = subprocess.check_output(["sensors", "-j"], text=True, stderr=subprocess.DEVNULL,
+                                      timeout=SENSORS_TIMEOUT)
+        return json.loads(out)
+    except (OSError, subprocess.SubprocessError, ValueError):
+        return {}
+
+
+# --- one snapshot per tick ---------------------------------------------------
+
+class SensorSnapshot:
+    """Every value the monitor uses, read at one instant.
+
+    Built once per tick and handed to thresholding, logging, the warning
+    window and notifications, so they can never disagree. Temperatures are
+    in degrees C, voltages in V, fans in RPM, power in W; None when the
+    sensor is missing.
+    """
+    # numeric fields, in log/record order
+    FIELDS = (
+        "cpu", "cpu_high", "cpu_crit", "cpu_hyst", "edge", "wifi", "acpitz",
+        "battery_v", "vddgfx", "vddnb", "cpu_fan", "gpu_fan",
+        "power1", "power1_avg", "power1_crit",
+    )
+    __slots__ = FIELDS + ("timestamp", "source", "chips", "top")
+
+    timestamp: float
+    source: str
+    chips: dict
+    top: list  # heat ranking at this instant: [(pid, comm, cores)], see procHeat
+    cpu: Optional[float]
+    cpu_high: Optional[float]
+    cpu_crit: Optional[float]
+    cpu_hyst: Optional[float]
+    edge: Optional[float]
+    wifi: Optional[float]
+    acpitz: Optional[float]
+    battery_v: Optional[float]
+    vddgfx: Optional[float]
+    vddnb: Optional[float]
+    cpu_fan: Optional[float]
+    gpu_fan: Optional[float]
+    power1: Optional[float]
+    power1_avg: Optional[float]
+    power1_crit: Optional[float]
+
+    def __init__(self, timestamp=None, source="", chips=None, top=None, **values):
+        self.timestamp = time.time() if timestamp is None else timestamp
+        self.source = source
+        self.chips = chips if chips is not None else {}
+        self.top = top if top is not None else []
+        for name in self.FIELDS:
+            setattr(self, name, values.pop(name, None))
+        if values:
+            raise TypeError(f"unknown snapshot fields: {', '.join(values)}")
+
+    @classmethod
+    def from_chips(cls, chips, source="", timestamp=None):
+        """Pick the monitor's fields out of a `sensors -j` shaped dict."""
+        v = feature_value
+        return cls(
+            timestamp=timestamp,
+            source=source,
+            chips=chips,
+            cpu=_cpu_temp(chips),
+            cpu_high=v(chips, "k10temp", sub="max"),
+            cpu_crit=v(chips, "k10temp", sub="crit"),
+            cpu_hyst=v(chips, "k10temp", sub="crit_hyst"),
+            edge=v(chips, "amdgpu", "edge"),
+            wifi=v(chips, "iwlwifi"),
+            acpitz=v(chips, "acpitz"),
+            battery_v=v(chips, "BAT0", kind="in"),
+            vddgfx=v(chips, "amdgpu", "vddgfx", kind="in"),
+            vddnb=v(chips, "amdgpu", "vddnb", kind="in"),
+            cpu_fan=v(chips, "asus", "cpu_fan", kind="fan"),
+            gpu_fan=v(chips, "asus", "gpu_fan", kind="fan"),
+            power1=v(chips, "fam15h_power", kind="power"),
+            power1_avg=v(chips, "fam15h_power", kind="power", sub="average"),
+            power1_crit=v(chips, "fam15h_power", kind="power", sub="crit"),
+        )
+
+    def values(self):
+        """Numeric fields as a tuple in FIELDS order."""
+        return tuple(getattr(self, name) for name in self.FIELDS)
+
+    def __repr__(self):
+        return f"SensorSnapshot(cpu={self.cpu}, edge={self.edge}, source={self.source!r})"
+
+
+def _cpu_temp(chips):
+    """k10temp Tctl, else any feature called Tctl/CPU."""
+    temp = feature_value(chips, "k10temp")
+    if temp is not None:
+        return temp
+    for data in chips.values():
+        for name, values in data.items():
+            if isinstance(values, dict) and ("Tctl" in name or "CPU" in name):
+                for key, value in values.items():
+                    if key.startswith("temp") and key.endswith("_input"):
+                        return value
+    return None
+
+
+class SensorReader:
+    """Produce one SensorSnapshot per call from the best available source.
+
+    hwmon sysfs (no fork) -> one `sensors -j` call -> plain `sensors` text.
+    """
+
+    def __init__(self, root=HWMON_ROOT):
+        self.backend = HwmonBackend(root)
+        if not self.backend:
+            print("No hwmon chips found, falling back to sensors -j", file=sys.stderr)
+
+    def read(self):
+        if self.backend:
+            return SensorSnapshot.from_chips(self.backend.read(), "hwmon")
+        chips = read_sensors_json()
+        if chips:
+            return SensorSnapshot.from_chips(chips, "sensors-json")
+        return SensorSnapshot.from_chips(read_sensors_text(), "sensors")
+
+    def close(self):
+        self.backend.close()
@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+# sel2in.com tgkprog@gmail.com
+"""Per-stage deadlines and latency histograms for temperatureWarn.py.
+
+A tick is split into stages:
+
+    read      sensor snapshot + per-process heat
+    decide    forecast / threshold checks (pure computation, run inline)
+    mitigate  climb or descend the mitigation ladder
+    notify    warning window, desktop notification
+    log       ring log, history, metrics
+
+Every stage except decide runs on its own single daemon worker thread
+(so one still hung at shutdown does not keep the process alive). The tick
+waits at most the stage's deadline for it; a stage that overruns is
+abandoned (left to finish in the background, its late duration still
+recorded) and skipped on later ticks until it has finished, so a hung
+notify-send or a slow SQLite fsync never delays the next sample or the
+critical check. Subprocesses started by stages carry their own timeouts,
+so an abandoned stage is eventually killed rather than leaking forever.
+
+Durations go into HDR-style histograms (log buckets with 16 linear
+sub-buckets, so any value is reported within ~6%); `kill -USR1 <pid>`
+prints them with the deadline, overrun and skip counts per stage.
+"""
+import concurrent.futures
+import os
+import queue
+import sys
+import threading
+import time
+
+# seconds; mitigate is short because the kill rung waits out its grace
+# period on its own thread (tempMitigate.KillStep background)
+DEADLINES = {"read": 2.0, "decide": 0.1, "mitigate": 1.0, "notify": 1.0, "log": 0.5}
+INLINE = ("decide",)
+SUB_BITS = 4  # 16 sub-buckets per power of two
+
+
+class Histogram:
+    """Log-linear histogram of durations, kept in integer microseconds."""
+
+    def __init__(self):
+        self.counts = {}
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    @staticmethod
+    def _bucket(us):
+        shift = max(0, us.bit_length() - SUB_BITS - 1)
+        return (shift << (SUB_BITS + 1)) | (us >> shift)
+
+    @staticmethod
+    def _highest(bucket):
+        """Largest microsecond value that falls in bucket."""
+        shift = bucket >> (SUB_BITS + 1)
+        low = (bucket & ((1 << (SUB_BITS + 1)) - 1)) << shift
+        return low + (1 << shift) - 1
+
+    def record(self, seconds):
+        us = max(0, int(seconds * 1e6))
+        bucket = self._bucket(us)
+        self.counts[bucket] = self.counts.get(bucket, 0) + 1
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+
+    def percentile(self, q):
+        """Upper bound, in seconds, of the q-th percentile (0-100)."""
+        # workers record while the SIGUSR1 dump reads: work on a copy (list()
+        # of int-keyed items is one step under the GIL; a lock could deadlock
+        # a signal handler that interrupts record())
+        counts = sorted(list(self.counts.items()))
+        total = sum(n for _, n in counts)
+        if not total:
+            return 0.0
+        rank = max(1, round(q / 100 * total))
+        seen = 0
+        for bucket, n in counts:
+            seen += n
+            if seen >= rank:
+                return min(self._highest(bucket) / 1e6, self.max)
+        return self.max
+
+    def summary(self):
+        if not self.count:
+            return "n=0"
+        ms = [f"{self.percentile(q) * 1000:.2f}" for q in (50, 90, 99)]
+        return (f"n={self.count} mean={self.total / self.count * 1000:.2f} "
+                f"p50={ms[0]} p90={ms[1]} p99={ms[2]} max={self.max * 1000:.2f} ms")
+
+
+class Worker:
+    """One daemon thread running submitted calls in order. Unlike a
+    ThreadPoolExecutor worker it is not joined at interpreter exit."""
+
+    def __init__(self, name):
+        self.calls = queue.SimpleQueue()
+        self.thread = threading.Thread(target=self._loop, name=name, daemon=True)
+        self.thread.start()
+
+    def submit(self, fn, *args):
+        future = concurrent.futures.Future()
+        self.calls.put((future, fn, args))
+        return future
+
+    def _loop(self):
+        while True:
+            call = self.calls.get()
+            if call is None:
+                return
+            future, fn, args = call
+            if not future.set_running_or_notify_cancel():
+                continue
+            try:
+                future.set_result(fn(*args))
+            except BaseException as e:
+                future.set_exception(e)
+
+    def shutdown(self):
+        """Stop after the running call; calls still queued are dropped."""
+        self.calls.put(None)
+
+
+class Watchdog:
+    """Runs tick stages against their deadlines and times them."""
+
+    def __init__(self, deadlines=None, inline=INLINE):
+        self.deadlines = dict(DEADLINES, **(deadlines or {}))
+        self.inline = inline
+        self.histograms = {name: Histogram() for name in (*self.deadlines, "tick")}
+        self.overruns = dict.fromkeys(self.deadlines, 0)
+        self.skipped = dict.fromkeys(self.deadlines, 0)
+        self.workers = {}  # stage -> Worker
+        self.late = {}     # stage -> future abandoned past its deadline
+
+    def _timed(self, name, fn, args):
+        start = time.perf_counter()
+        try:
+            return fn(*args)
+        finally:
+            self.histograms[name].record(time.perf_counter() - start)
+
+    def run(self, name, fn, *args):
+        """fn(*args) as stage `name`; None if it overran or is still running late."""
+        deadline = self.deadlines[name]
+        if name in self.inline:
+            start = time.perf_counter()
+            result = self._timed(name, fn, args)
+            if time.perf_counter() - start > deadline:
+                self.overruns[name] += 1
+            return result
+        late = self.late.get(name)
+        if late is not None:
+            if not late.done():
+                self.skipped[name] += 1
+                return None
+            del self.late[name]
+        worker = self.workers.get(name)
+        if worker is None:
+            worker = self.workers[name] = Worker(f"temp-{name}")
+        future = worker.submit(self._timed, name, fn, args)
+        try:
+            return future.result(timeout=deadline)
+        except concurrent.futures.TimeoutError:
+            self.overruns[name] += 1
+            self.late[name] = future
+            print(f"WATCHDOG: {name} stage overran {deadline}s, abandoned", file=sys.stderr)
+            return None
+
+    def record_tick(self, seconds):
+        self.histograms["tick"].record(seconds)
+
+    def report(self):
+        lines = ["Tick stage latency (deadline, overruns, skipped):"]
+        for name, histogram in list(self.histograms.items()):
+            if name == "tick":
+                lines.append(f"  {'tick':<9} {histogram.summary()}")
+            else:
+                lines.append(f"  {name:<9} {histogram.summary()}  "
+                             f"({self.deadlines[name]}s, {self.overruns[name]}, {self.skipped[name]})")
+        return "\n".join(lines) + "\n"
+
+    def dump(self, signum=None, frame=None):
+        """SIGUSR1 handler; os.write so it is safe even mid-print."""
+        os.write(sys.stderr.fileno(), self.report().encode())
+
+    def shutdown(self):
+        for worker in self.workers.values():
+            worker.shutdown()
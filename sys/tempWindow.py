@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+# sel2in.com tgkprog@gmail.com
+"""One long-lived warning window for temperatureWarn.py.
+
+The old show_temp_warning_window built a new tk.Tk() in a new thread on
+every over-threshold tick. Here a single UI thread owns the only Tk root
+for the life of the process; the monitor pushes state over a queue and the
+window updates its text, colour and a mini-graph of the last `history`
+samples in place.
+
+While hidden the UI thread is parked in queue.get() with the root
+withdrawn: no timers, no event polling. add() only appends to a deque in
+the caller's thread, so recording samples costs nothing until a warning
+is shown.
+"""
+import collections
+import queue
+import sys
+import threading
+import time
+
+try:
+    import tkinter as tk
+except ImportError:
+    tk = None  # tkinter not available
+
+HISTORY = 60        # samples in the mini-graph
+HIDE_AFTER = 5.0    # seconds a warning stays up after the last update
+PUMP_INTERVAL = 0.05  # seconds between Tk event pumps while visible
+GRAPH_W, GRAPH_H = 380, 80
+
+
+class WarningWindow:
+    """Single persistent warning window driven from a queue."""
+
+    def __init__(self, warn, critical, history=HISTORY, hide_after=HIDE_AFTER):
+        self.warn = warn
+        self.critical = critical
+        self.hide_after = hide_after
+        self.samples = collections.deque(maxlen=history)
+        self.queue = queue.Queue()
+        self.thread = None
+        self.failed = tk is None
+        if self.failed:
+            print("Warning: tkinter not available, skipping GUI window", file=sys.stderr)
+
+    def add(self, temp):
+        """Record one sample for the graph; cheap, never touches Tk."""
+        self.samples.append(temp)
+
+    def show(self, temp, is_critical):
+        """Show (or refresh) the warning; starts the UI thread on first use."""
+        if self.failed:
+            return
+        if self.thread is None:
+            self.thread = threading.Thread(target=self._run, name="temp-window", daemon=True)
+            self.thread.start()
+        self.queue.put((temp, is_critical, list(self.samples)))
+
+    def close(self):
+        if self.thread is not None:
+            self.queue.put(None)
+            self.thread.join(timeout=2)
+            self.thread = None
+
+    # everything below runs on the UI thread only
+
+    def _build(self):
+        root = tk.Tk()
+        root.withdraw()
+        root.title("temp high")
+        root.geometry("400x200")
+        root.attributes('-topmost', True)
+        root.protocol("WM_DELETE_WINDOW", root.withdraw)
+        self.label = tk.Label(root, font=('Arial', 16, 'bold'), fg='white')
+        self.label.pack(expand=True)
+        self.graph = tk.Canvas(root, width=GRAPH_W, height=GRAPH_H, highlightthickness=0)
+        self.graph.pack(pady=(0, 8))
+        self.line = self.graph.create_line(0, 0, 0, 0, fill='white', width=2)
+        self.marks = [self.graph.create_line(0, 0, GRAPH_W, 0, fill='white', dash=(2, 4)) for _ in range(2)]
+        return root
+
+    def _apply(self, root, temp, is_critical, samples):
+        colour = 'red' if is_critical else 'orange'
+        for widget in (root, self.label, self.graph):
+            widget.configure(bg=colour)
+        self.label.configure(text=f"CPU Temperature: {temp}°C\n{'CRITICAL!' if is_critical else 'High'}")
+        low = min(samples + [self.warn]) - 2
+        high = max(samples + [self.critical]) + 2
+
+        def y(value):
+            return GRAPH_H - (value - low) * GRAPH_H / (high - low)
+
+        for mark, level in zip(self.marks, (self.warn, self.critical)):
+            self.graph.coords(mark, 0, y(level), GRAPH_W, y(level))
+        if len(samples) > 1:
+            step = GRAPH_W / (len(samples) - 1)
+            coords = []
+            for i, value in enumerate(samples):
+                coords += (i * step, y(value))
+            self.graph.coords(self.line, *coords)
+
+    def _run(self):
+        try:
+            root = self._build()
+        except Exception as e:  # no display
+            print(f"Error showing window: {e}", file=sys.stderr)
+            self.failed = True
+            return
+        while True:
+            state = self.queue.get()  # parked here while hidden
+            if state is None:
+                break
+            self._apply(root, *state)
+            root.deiconify()
+            hide_at = time.monotonic() + self.hide_after
+            while time.monotonic() < hide_at:
+                root.update()
+                try:
+                    state = self.queue.get(timeout=PUMP_INTERVAL)
+                except queue.Empty:
+                    continue
+                if state is None:
+                    root.destroy()
+                    return
+                self._apply(root, *state)
+                hide_at = time.monotonic() + self.hide_after
+            root.withdraw()
+            root.update()
+        root.destroy()
@@ -4,350 +4,186 @@ import subprocess
 import time
 import sys
 import argparse
+import asyncio
+import functools
 import signal
-import threading
 import os
-from datetime import datetime, timedelta
-try:
-    import tkinter as tk
-except ImportError:
-    tk = None  # tkinter not available
+from datetime import datetime
+import procHeat
+import procKill
+import tempAlarm
+import tempAsync
+import tempForecast
+import tempHistory
+import tempMetrics
+import tempMitigate
+import tempNotify
+import tempRing
+import tempSchedule
+import tempSensors
+import tempWatchdog
+import tempWindow
 # command to install tkinter: sudo apt install python3-tk
 CRITICAL = 78
 THRESHOLD = 73
-INTERVAL = 30 # seconds
-LOG_FILE = "/tmp/temp.log"  # Default, can be overridden by --log-file argument
+MIN_INTERVAL = 1 # seconds, used near --warn/--critical
+MAX_INTERVAL = 120 # seconds, used when cool
+FORECAST_LEAD = 30 # act when critical is forecast within this many seconds
+FORECAST_ACTION = "throttle" # warn, throttle (ladder up to freq) or pause (ladder up to stop)
+FORECAST_LOG = "/tmp/temp_forecast.log"
+HYSTERESIS = tempMitigate.HYSTERESIS # °C below a ladder rung before it is released
+LOG_FILE = "/tmp/temp.ring"  # Default, can be overridden by --log-file argument
+METRICS_PORT = tempMetrics.PORT # Prometheus endpoint, 0 = off
+LOG_WINDOW_MINUTES = 10  # --dump shows this much history by default
+COMMAND_TIMEOUT = 5 # seconds before a lock/display helper is killed
+HISTORY_DB = tempHistory.DB_PATH  # long-term history, see checkTime.py
 
-def get_detailed_temps():
-    """Get detailed temperature readings from sensors output.
+_READER = None
+_RING = None
+_WINDOW = None
+_NOTIFIER = None
+
+def take_snapshot():
+    """Read every sensor once and return a tempSensors.SensorSnapshot.
+
+    hwmon sysfs first, then one `sensors -j` call, then plain `sensors`.
+    Everything in a tick (threshold, log, window, notification) uses the
+    same snapshot.
+    """
+    global _READER
+    if _READER is None:
+        _READER = tempSensors.SensorReader()
+    return _READER.read()
+
+def get_detailed_temps(snapshot=None):
+    """Get detailed temperature readings.
     Returns: (first_temp1, edge_temp, second_temp1) or (None, None, None)
+    first_temp1 is the iwlwifi temp1, second_temp1 the k10temp temp1.
     """
     try:
-        out = subprocess.check_output(["sensors"], text=True)
-        temp1_values = []
-        edge_temp = None
-        
-        for line in out.splitlines():
-            # Extract temp1 values
-            if "temp1:" in line:
-                for token in line.split():
-                    if token.startswith("+") and token.endswith("°C"):
-                        temp1_values.append(token[1:-2])
-                        break
-            # Extract edge temperature
-            if "edge:" in line:
-                for token in line.split():
-                    if token.startswith("+") and token.endswith("°C"):
-                        edge_temp = token[1:-2]
-                        break
-        
-        first_temp1 = temp1_values[0] if len(temp1_values) > 0 else None
-        second_temp1 = temp1_values[1] if len(temp1_values) > 1 else None
-        
-        return (first_temp1, edge_temp, second_temp1)
+        if snapshot is None:
+            snapshot = take_snapshot()
+        fmt = lambda v: f"{v:.1f}" if v is not None else None
+        return (fmt(snapshot.wifi), fmt(snapshot.edge), fmt(snapshot.cpu))
     except Exception:
         return (None, None, None)
 
-def get_temp():
+def get_temp(snapshot=None):
     """Get a single temperature value for threshold checking."""
     try:
-        out = subprocess.check_output(["sensors"], text=True)
-        # Look for k10temp adapter section
-        lines = out.splitlines()
-        in_k10temp = False
-        for line in lines:
-            # Detect k10temp adapter section header
-            if "k10temp" in line.lower():
-                in_k10temp = True
-                continue
-            # If we're in k10temp section and find temp1, extract it
-            if in_k10temp and "temp1:" in line:
-                for token in line.split():
-                    if token.startswith("+") and token.endswith("°C"):
-                        return float(token[1:-2])
-            # Exit k10temp section when we hit empty line (new section)
-            if in_k10temp and line.strip() == "":
-                in_k10temp = False
-        # Fallback: look for any line with Tctl or CPU
-        for line in lines:
-            if "Tctl" in line or "CPU" in line:
-                for token in line.split():
-                    if token.startswith("+") and token.endswith("°C"):
-                        return float(token[1:-2])
+        if snapshot is None:
+            snapshot = take_snapshot()
+        return snapshot.cpu
     except Exception:
         return None
 
-def clean_old_log_entries():
-    """Remove log entries older than 10 minutes."""
-    global LOG_FILE
-    try:
-        cutoff_time = datetime.now() - timedelta(minutes=10)
-        
-        with open(LOG_FILE, "r") as f:
-            lines = f.readlines()
-        
-        filtered_lines = []
-        i = 0
-        while i < len(lines):
-            line = lines[i]
-            # Extract time from log format: "HH MM temp1: ..."
-            parts = line.strip().split()
-            if len(parts) >= 2:
-                try:
-                    # Parse HH MM format (space-separated)
-                    hour = int(parts[0])
-                    minute = int(parts[1])
-                    log_datetime = datetime.now().replace(
-                        hour=hour, 
-                        minute=minute, 
-                        second=0, 
-                        microsecond=0
-                    )
-                    
-                    # Keep entries within 10 minutes
-                    if log_datetime >= cutoff_time:
-                        # Keep this entry and all its lines until the next "--"
-                        filtered_lines.append(line)
-                        i += 1
-                        while i < len(lines) and not lines[i].strip().startswith("--"):
-                            filtered_lines.append(lines[i])
-                            i += 1
-                        if i < len(lines):  # Add the "--" separator
-                            filtered_lines.append(lines[i])
-                            i += 1
-                        continue
-                    else:
-                        # Skip this entry - move to next entry (after "--")
-                        i += 1
-                        while i < len(lines) and not lines[i].strip().startswith("--"):
-                            i += 1
-                        i += 1  # Skip the "--" line too
-                        continue
-                except (ValueError, IndexError):
-                    # Not a timestamp line, keep it if we're in a valid entry
-                    filtered_lines.append(line)
-            else:
-                # Empty line or separator, keep it
-                filtered_lines.append(line)
-            i += 1
-        
-        # Write back filtered lines
-        with open(LOG_FILE, "w") as f:
-            f.writelines(filtered_lines)
-    except FileNotFoundError:
-        # Log file doesn't exist yet, nothing to clean
-        pass
-    except Exception as e:
-        print(f"Error cleaning log: {e}", file=sys.stderr)
+def _open_ring():
+    """Open (creating if needed) the ring log at LOG_FILE."""
+    global _RING
+    if _RING is None or _RING.path != LOG_FILE:
+        _RING = tempRing.TempRing(LOG_FILE)
+    return _RING
 
-def log_temperature(temp1_first, edge_temp, temp1_second):
-    """Log temperature readings to log file in custom parsed format.
-    Format matches temp_sample.log with full sensors output parsing.
+def format_log_entry(snapshot):
+    """Render one snapshot in the human-readable log format (temp_sample.log)."""
+    fmt = tempSensors.format_value
+    time_str = datetime.fromtimestamp(snapshot.timestamp).strftime("%H %M")  # HH MM format
+    temp1_iwlwifi = fmt(snapshot.wifi, "temp")
+    temp1_k10temp = fmt(snapshot.cpu, "temp")
+    temp1_k10temp_high = fmt(snapshot.cpu_high, "temp")
+    temp1_k10temp_crit = fmt(snapshot.cpu_crit, "temp")
+    temp1_k10temp_hyst = fmt(snapshot.cpu_hyst, "temp")
+    battery_voltage = fmt(snapshot.battery_v, "in")
+    vddgfx = fmt(snapshot.vddgfx, "in")
+    vddnb = fmt(snapshot.vddnb, "in")
+    edge = fmt(snapshot.edge, "temp")
+    cpu_fan = fmt(snapshot.cpu_fan, "fan")
+    gpu_fan = fmt(snapshot.gpu_fan, "fan")
+    power1 = fmt(snapshot.power1, "power")
+    power1_avg = fmt(snapshot.power1_avg, "power")
+    power1_crit = fmt(snapshot.power1_crit, "power")
+    temp1_acpitz = fmt(snapshot.acpitz, "temp")
+
+    log_entry = f"{time_str} temp1: {temp1_iwlwifi or 'N/A'}   PCI adapter {temp1_k10temp or 'N/A'}  (high = {temp1_k10temp_high or 'N/A'})   (crit = {temp1_k10temp_crit or 'N/A'}, hyst = {temp1_k10temp_hyst or 'N/A'})\n"
+    log_entry += "\n"
+    log_entry += f"BAT0-acpi-0   {battery_voltage or 'N/A'}\n"
+    log_entry += "\n"
+    log_entry += f"vddgfx:      {vddgfx or 'N/A'}\n"
+    log_entry += f"vddnb:       {vddnb or 'N/A'}\n"
+    log_entry += f"edge:        {edge or 'N/A'}\n"
+    log_entry += "asus-isa-0000\n"
+    log_entry += "Adapter: ISA adapter\n"
+    log_entry += f"cpu_fan:      {cpu_fan or 'N/A'}\n"
+    log_entry += f"gpu_fan:      {gpu_fan or 'N/A'}\n"
+    log_entry += "\n"
+    log_entry += f"power1:       {power1 or 'N/A'} (avg =  {power1_avg or 'N/A'}, interval =   0.01 s)\n"
+    log_entry += f"                       (crit =  {power1_crit or 'N/A'})\n"
+    log_entry += f"temp1:        {temp1_acpitz or 'N/A'}\n"
+    if snapshot.top and snapshot.cpu is not None and snapshot.cpu >= THRESHOLD:
+        log_entry += f"top:          {procHeat.format_top(snapshot.top)}\n"
+    log_entry += "--\n"
+    return log_entry
+
+def log_temperature(snapshot=None):
+    """Append one snapshot to the ring log at LOG_FILE.
+    Constant-size write, no rewrite; render with --dump.
     """
-    global LOG_FILE
     try:
-        now = datetime.now()
-        time_str = now.strftime("%H %M")  # HH MM format
-        
-        # Clean old entries before adding new one
-        clean_old_log_entries()
-        
-        # Get full sensors output for detailed parsing
-        sensors_output = subprocess.check_output(["sensors"], text=True)
-        
-        # Parse sensors output for specific values
-        lines = sensors_output.splitlines()
-        
-        # Extract key information
-        temp1_iwlwifi = None
-        temp1_k10temp = None
-        temp1_k10temp_high = None
-        temp1_k10temp_crit = None
-        temp1_k10temp_hyst = None
-        battery_voltage = None
-        vddgfx = None
-        vddnb = None
-        edge = None
-        cpu_fan = None
-        gpu_fan = None
-        power1 = None
-        power1_avg = None
-        power1_crit = None
-        temp1_acpitz = None
-        
-        i = 0
-        while i < len(lines):
-            line = lines[i]
-            
-            # iwlwifi temp1
-            if "iwlwifi" in line.lower():
-                if i + 2 < len(lines) and "temp1:" in lines[i + 2]:
-                    parts = lines[i + 2].split()
-                    for j, p in enumerate(parts):
-                        if p.startswith("+") and "°C" in p:
-                            temp1_iwlwifi = p
-                            break
-            
-            # k10temp-pci temp1 with high/crit/hyst
-            if "k10temp" in line.lower():
-                if i + 2 < len(lines) and "temp1:" in lines[i + 2]:
-                    parts = lines[i + 2].split()
-                    for j, p in enumerate(parts):
-                        if p.startswith("+") and "°C" in p:
-                            temp1_k10temp = p
-                            # Look for high/crit/hyst on same or next line
-                            combined = lines[i + 2]
-                            if i + 3 < len(lines):
-                                combined += " " + lines[i + 3]
-                            if "high" in combined:
-                                high_match = combined.split("high")[1].split(")")[0]
-                                for token in high_match.split():
-                                    if "°C" in token:
-                                        temp1_k10temp_high = token
-                                        break
-                            if "crit" in combined:
-                                crit_match = combined.split("crit")[1].split(",")[0]
-                                for token in crit_match.split():
-                                    if "°C" in token:
-                                        temp1_k10temp_crit = token
-                                        break
-                            if "hyst" in combined:
-                                hyst_match = combined.split("hyst")[1].split(")")[0]
-                                for token in hyst_match.split():
-                                    if "°C" in token:
-                                        temp1_k10temp_hyst = token
-                                        break
-                            break
-            
-            # Battery voltage
-            if "BAT0" in line or "in0:" in line:
-                if "in0:" in line:
-                    parts = line.split()
-                    for j, p in enumerate(parts):
-                        if "V" in p:
-                            battery_voltage = " ".join(parts[1:3])
-                            break
-            
-            # GPU voltages
-            if "vddgfx:" in line:
-                parts = line.split()
-                vddgfx = " ".join(parts[1:3])
-            if "vddnb:" in line:
-                parts = line.split()
-                vddnb = " ".join(parts[1:3])
-            
-            # Edge temperature
-            if "edge:" in line:
-                parts = line.split()
-                for p in parts:
-                    if p.startswith("+") and "°C" in p:
-                        edge = p
-                        break
-            
-            # Fan speeds
-            if "cpu_fan:" in line:
-                parts = line.split()
-                cpu_fan = " ".join(parts[1:3])
-            if "gpu_fan:" in line:
-                parts = line.split()
-                gpu_fan = " ".join(parts[1:3])
-            
-            # Power
-            if "power1:" in line and "mW" in line:
-                parts = line.split()
-                power1 = " ".join(parts[1:3])
-                if "avg" in line:
-                    avg_start = line.index("avg")
-                    avg_section = line[avg_start:]
-                    avg_parts = avg_section.split()
-                    if len(avg_parts) >= 3:
-                        power1_avg = " ".join(avg_parts[2:4])
-                if i + 1 < len(lines) and "crit" in lines[i + 1]:
-                    crit_line = lines[i + 1]
-                    crit_parts = crit_line.split()
-                    for j, p in enumerate(crit_parts):
-                        if "W" in p and j > 0:
-                            power1_crit = " ".join(crit_parts[j-1:j+1])
-                            break
-            
-            # acpitz temp1
-            if "acpitz" in line.lower():
-                if i + 2 < len(lines) and "temp1:" in lines[i + 2]:
-                    parts = lines[i + 2].split()
-                    for p in parts:
-                        if p.startswith("+") and "°C" in p:
-                            temp1_acpitz = p
-                            break
-            
-            i += 1
-        
-        # Build log entry in the sample format
-        log_entry = f"{time_str} temp1: {temp1_iwlwifi or 'N/A'}   PCI adapter {temp1_k10temp or 'N/A'}  (high = {temp1_k10temp_high or 'N/A'})   (crit = {temp1_k10temp_crit or 'N/A'}, hyst = {temp1_k10temp_hyst or 'N/A'})\n"
-        log_entry += "\n"
-        log_entry += f"BAT0-acpi-0   {battery_voltage or 'N/A'}\n"
-        log_entry += "\n"
-        log_entry += f"vddgfx:      {vddgfx or 'N/A'}\n"
-        log_entry += f"vddnb:       {vddnb or 'N/A'}\n"
-        log_entry += f"edge:        {edge or 'N/A'}\n"
-        log_entry += "asus-isa-0000\n"
-        log_entry += "Adapter: ISA adapter\n"
-        log_entry += f"cpu_fan:      {cpu_fan or 'N/A'}\n"
-        log_entry += f"gpu_fan:      {gpu_fan or 'N/A'}\n"
-        log_entry += "\n"
-        log_entry += f"power1:       {power1 or 'N/A'} (avg =  {power1_avg or 'N/A'}, interval =   0.01 s)\n"
-        log_entry += f"                       (crit =  {power1_crit or 'N/A'})\n"
-        log_entry += f"temp1:        {temp1_acpitz or 'N/A'}\n"
-        log_entry += "--\n"
-        
-        with open(LOG_FILE, "a") as f:
-            f.write(log_entry)
+        if snapshot is None:
+            snapshot = take_snapshot()
+        _open_ring().append(snapshot)
     except Exception as e:
         print(f"Error logging temperature: {e}", file=sys.stderr)
 
-def show_temp_warning_window(temp, is_critical):
-    """Show a lightweight warning window using tkinter."""
-    if tk is None:
-        print("Warning: tkinter not available, skipping GUI window", file=sys.stderr)
+def dump_log(minutes=LOG_WINDOW_MINUTES, out=sys.stdout):
+    """Print the ring log at LOG_FILE in the human-readable format.
+    minutes=0 prints every stored record.
+    """
+    try:
+        ring = tempRing.TempRing(LOG_FILE, readonly=True)
+    except FileNotFoundError:
+        print(f"No log at {LOG_FILE}", file=sys.stderr)
         return
-    
-    def create_window():
-        try:
-            root = tk.Tk()
-            root.title("temp high")
-            root.configure(bg='red' if is_critical else 'orange')
-            root.geometry("400x200")
-            root.attributes('-topmost', True)
-            
-            # Display temperature
-            label = tk.Label(
-                root, 
-                text=f"CPU Temperature: {temp}°C\n{'CRITICAL!' if is_critical else 'High'}",
-                font=('Arial', 16, 'bold'),
-                bg='red' if is_critical else 'orange',
-                fg='white'
-            )
-            label.pack(expand=True)
-            
-            # Auto-close after 5 seconds
-            root.after(5000, root.destroy)
-            root.mainloop()
-        except Exception as e:
-            print(f"Error showing window: {e}", file=sys.stderr)
-    
-    # Run window in separate thread so it doesn't block
-    thread = threading.Thread(target=create_window, daemon=True)
-    thread.start()
+    except ValueError as e:
+        # empty file, or an old text log not yet replaced by the monitor
+        print(f"Cannot read {LOG_FILE}: {e}", file=sys.stderr)
+        return
+    since = time.time() - minutes * 60 if minutes else None
+    try:
+        for snapshot in ring.snapshots(since):
+            out.write(format_log_entry(snapshot))
+    finally:
+        ring.close()
+
+def _warning_window():
+    """The process-wide tempWindow.WarningWindow (one Tk root, one UI thread)."""
+    global _WINDOW
+    if _WINDOW is None:
+        _WINDOW = tempWindow.WarningWindow(THRESHOLD, CRITICAL)
+    return _WINDOW
 
-def _run_command_silent(cmd):
-    """Run command suppressing stdio; return True on success."""
+def _notifier():
+    """The process-wide tempNotify.Notifier (one D-Bus connection)."""
+    global _NOTIFIER
+    if _NOTIFIER is None:
+        _NOTIFIER = tempNotify.Notifier()
+    return _NOTIFIER
+
+def show_temp_warning_window(temp, is_critical):
+    """Show or refresh the warning window in place; it hides itself after 5 s."""
+    _warning_window().show(temp, is_critical)
+
+def _run_command_silent(cmd, timeout=COMMAND_TIMEOUT):
+    """Run command suppressing stdio; return True on success. A command
+    still running after timeout seconds is killed and counts as failure."""
     try:
-        subprocess.run(cmd, check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        subprocess.run(cmd, check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, timeout=timeout)
         return True
-    except (FileNotFoundError, subprocess.CalledProcessError):
+    except (FileNotFoundError, subprocess.SubprocessError):
         return False
 
-def lock_and_turn_off_display():
-    """Attempt to lock the session (Win+L equivalent) and power off monitors."""
+def _lock_commands():
+    """Ways to lock the session, tried in order until one works."""
     session_id = os.environ.get("XDG_SESSION_ID")
     uid = str(os.getuid())
     lock_commands = [["xdotool", "key", "Super_L+l"]]
@@ -366,143 +202,330 @@ def lock_and_turn_off_display():
             "org.freedesktop.ScreenSaver.Lock",
         ],
     ])
+    return lock_commands
 
-    locked = False
-    for cmd in lock_commands:
-        if _run_command_silent(cmd):
-            locked = True
-            break
-
+def _display_commands():
+    """Ways to power the monitors down; empty without an X display."""
     display = os.environ.get("DISPLAY")
-    if display:
-        display_commands = [
-            ["xset", "-display", display, "dpms", "force", "off"],
-            ["xset", "-display", display, "dpms", "force", "standby"],
-        ]
-        for cmd in display_commands:
-            if _run_command_silent(cmd):
-                print("Display powered down to aid cooling", file=sys.stderr)
-                break
+    if not display:
+        return []
+    return [
+        ["xset", "-display", display, "dpms", "force", "off"],
+        ["xset", "-display", display, "dpms", "force", "standby"],
+    ]
 
+def _report_lock(locked, display_off):
+    if display_off:
+        print("Display powered down to aid cooling", file=sys.stderr)
     if locked:
         print("Session locked due to critical temperature", file=sys.stderr)
 
-def kill_heavy_processes():
-    """Kill processes containing node, java, chrome, and antigravity."""
+def lock_and_turn_off_display():
+    """Attempt to lock the session (Win+L equivalent) and power off monitors."""
+    locked = any(_run_command_silent(cmd) for cmd in _lock_commands())
+    display_off = any(_run_command_silent(cmd) for cmd in _display_commands())
+    _report_lock(locked, display_off)
+
+async def lock_and_turn_off_display_async():
+    """lock_and_turn_off_display for --async: same commands, run on the event loop."""
+    locked = await tempAsync.run_first(_lock_commands(), COMMAND_TIMEOUT)
+    display_off = await tempAsync.run_first(_display_commands(), COMMAND_TIMEOUT)
+    _report_lock(locked, display_off)
+
+KILL_GRACE = 3  # seconds between SIGTERM and SIGKILL for the kill rung
+ANTIGRAVITY = procKill.compile_patterns(["antigravity"], ignore_case=True)
+
+def kill_heavy_processes(targets):
+    """Terminate the given [(pid, starttime, label)] targets, hottest first (see procHeat).
+    SIGTERM, then SIGKILL whatever is still running after KILL_GRACE.
+    Returns how many were terminated.
+    """
     try:
-        # Get all processes
-        result = subprocess.run(['ps', '-aux'], capture_output=True, text=True)
-        processes = result.stdout.splitlines()
-        
-        # Targets to kill
-        targets = ['node', 'java', 'chrome', 'antigravity', 'python']
-        killed = []
-        
-        for line in processes[1:]:  # Skip header
-            parts = line.split()
-            if len(parts) < 11:
-                continue
-            
-            pid = parts[1]
-            command = ' '.join(parts[10:])
-            
-            # Check if process matches any target
-            for target in targets:
-                if target in command.lower():
-                    try:
-                        # Send SIGTERM (graceful termination)
-                        subprocess.run(['kill', '-TERM', pid], check=False)
-                        killed.append(f"{target} (PID {pid})")
-                        print(f"Killed {target} process (PID {pid}): {command[:50]}...", file=sys.stderr)
-                    except Exception as e:
-                        print(f"Error killing PID {pid}: {e}", file=sys.stderr)
-                    break
-        
-        if killed:
-            print(f"CRITICAL TEMP: Killed processes: {', '.join(killed)}", file=sys.stderr)
+        labels = {pid: label for pid, _, label in targets}
+        # the stop rung's paused processes come first; resume lets them handle SIGTERM
+        result = procKill.terminate(procKill.from_pids((pid, start) for pid, start, _ in targets),
+                                    grace=KILL_GRACE, resume=True)
+        for outcome in ("exited", "killed", "failed"):
+            for p in result[outcome]:
+                print(f"{outcome.capitalize()}: {labels[p.pid]} (PID {p.pid})", file=sys.stderr)
+        if labels:
+            print(f"CRITICAL TEMP: heavy processes: {procKill.summary(result)}", file=sys.stderr)
         else:
-            print("CRITICAL TEMP: No matching processes to kill", file=sys.stderr)
-            
+            print("CRITICAL TEMP: No heavy processes to kill", file=sys.stderr)
+        return len(result["exited"]) + len(result["killed"])
     except Exception as e:
         print(f"Error killing processes: {e}", file=sys.stderr)
+        return 0
+
+def terminate_heavy_processes(targets, lock=lock_and_turn_off_display):
+    """Last rung of the mitigation ladder: kill the top heat contributors,
+    then lock the session. Returns how many processes were terminated."""
+    print("CRITICAL TEMPERATURE - Killing heavy processes", file=sys.stderr)
+    count = kill_heavy_processes(targets) + kill_antigravity_processes()
+    lock()
+    return count
 
 
 def kill_antigravity_processes():
-    """Forcefully terminate all running antigravity processes using sudo."""
+    """Forcefully terminate all running antigravity processes, via sudo if needed.
+    Returns how many were terminated."""
     try:
-        result = subprocess.run(['ps', '-eo', 'pid=', 'command='], capture_output=True, text=True, check=True)
-        lines = result.stdout.splitlines()
-        antigravity_procs = []
-        for line in lines:
-            line = line.strip()
-            if not line:
-                continue
-            parts = line.split(maxsplit=1)
-            if len(parts) != 2:
-                continue
-            pid, command = parts
-            if 'antigravity' in command.lower():
-                antigravity_procs.append((pid, command))
-        if not antigravity_procs:
+        procs = procKill.scan(ANTIGRAVITY)
+        if not procs:
             print("No antigravity processes found to terminate", file=sys.stderr)
-            return
-        for pid, command in antigravity_procs:
-            try:
-                subprocess.run(['sudo', 'kill', pid], check=False)
-                print(f"Sent sudo kill to antigravity PID {pid}: {command[:50]}...", file=sys.stderr)
-            except Exception as e:
-                print(f"Failed to send sudo kill to PID {pid}: {e}", file=sys.stderr)
-        time.sleep(1)
-        for pid, _ in antigravity_procs:
-            try:
-                subprocess.run(['sudo', 'kill', '-9', pid], check=False)
-                print(f"Sent sudo kill -9 to antigravity PID {pid}", file=sys.stderr)
-            except Exception as e:
-                print(f"Failed to send sudo kill -9 to PID {pid}: {e}", file=sys.stderr)
+            return 0
+        for p in procs:
+            print(f"Terminating antigravity PID {p.pid}: {p.cmdline[:50]}...", file=sys.stderr)
+        result = procKill.terminate(procs, grace=1, sudo=True)
+        print(f"antigravity: {procKill.summary(result)}", file=sys.stderr)
+        return len(result["exited"]) + len(result["killed"])
     except Exception as e:
-        print(f"Error locating antigravity processes: {e}", file=sys.stderr)
+        print(f"Error terminating antigravity processes: {e}", file=sys.stderr)
+        return 0
 
-def notify(temp):
-    """Send desktop notification using notify-send.
-    notify-send is a Linux command-line utility that displays popup notifications
-    on the desktop. The -u flag sets urgency level (critical = highest priority).
+def notify(temp, snapshot=None):
+    """Send desktop notification over D-Bus (tempNotify, notify-send fallback).
+    The bubble is replaced in place and rate limited, so a long heat event
+    shows one updating popup instead of a stack of them.
     
-    If temp ≥ CRITICAL, also kills heavy processes to reduce CPU load.
+    snapshot is the tick's SensorSnapshot; when called on its own a fresh one
+    is read and logged. Throttling/killing is left to the mitigation ladder.
     """
     is_critical = temp >= CRITICAL
     
-    # Get detailed temperatures for logging
-    temp1_first, edge_temp, temp1_second = get_detailed_temps()
-    
-    # Log to file
-    log_temperature(temp1_first, edge_temp, temp1_second)
+    if snapshot is None:
+        snapshot = take_snapshot()
+        log_temperature(snapshot)
     
     # Show GUI warning window
     show_temp_warning_window(temp, is_critical)
-    
-    # Send desktop notification
-    subprocess.run([
-        "notify-send",
-        "-u", "critical",
+    notify_desktop(temp, snapshot)
+
+def notify_desktop(temp, snapshot):
+    """The desktop notification half of notify()."""
+    is_critical = temp >= CRITICAL
+    edge = f", GPU edge {snapshot.edge:.1f}°C" if snapshot.edge is not None else ""
+    _notifier().notify(
         "CPU OVERHEATING" if is_critical else "CPU Temperature High",
-        f"Temperature {temp}°C ≥ {THRESHOLD}°C\n{'KILLING PROCESSES!' if is_critical else 'Save work NOW'}"
-    ])
-    
-    # If critical, kill heavy processes and lock system
-    if is_critical:
-        print(f"CRITICAL TEMPERATURE {temp}°C ≥ {CRITICAL}°C - Killing heavy processes", file=sys.stderr)
-        kill_heavy_processes()
-        if temp > CRITICAL:
-            kill_antigravity_processes()
-        lock_and_turn_off_display()
+        f"Temperature {temp}°C ≥ {THRESHOLD}°C{edge}\n{'THROTTLING PROCESSES!' if is_critical else 'Save work NOW'}",
+        key="temp",
+    )
+
+class Monitor:
+    """The sampling loop: read one snapshot, rank per-process heat,
+    forecast, climb/descend the mitigation ladder, alert, log, then sleep
+    for however long the scheduler says.
+
+    With a watchdog each of those stages runs against its own deadline
+    (see tempWatchdog.py); without one they simply run in order.
+
+    clock, sleep and read are injectable so the loop can be replayed with a
+    virtual clock and scripted sensor data.
+    """
+
+    def __init__(self, scheduler, read=take_snapshot, clock=time.monotonic, sleep=time.sleep,
+                 forecaster=None, forecast_log=None, ladder=None, heat=None,
+                 metrics=None, metrics_textfile=None, history=None, watchdog=None):
+        self.scheduler = scheduler
+        self.read = read
+        self.clock = clock
+        self.sleep = sleep
+        self.forecaster = forecaster or tempForecast.ThermalForecaster()
+        self.forecast_log = forecast_log
+        self.ladder = ladder
+        self.heat = heat
+        self.metrics = metrics
+        self.metrics_textfile = metrics_textfile
+        self.history = history
+        self.watchdog = watchdog
+        self.pre_empted = False
+        self.forecast_floor = 0
+        self.over_critical = False
+
+    def stage(self, name, fn, *args):
+        """Run one tick stage, under the watchdog's deadline if there is one."""
+        if self.watchdog:
+            return self.watchdog.run(name, fn, *args)
+        return fn(*args)
+
+    def tick(self):
+        """Run one sample; return the delay before the next one."""
+        started = time.perf_counter()
+        # One sensor snapshot per tick, shared by every consumer below
+        sample = self.stage("read", self.sample)
+        if sample is None:
+            # sensors hung past the read deadline: try again soon
+            return self.scheduler.min_interval
+        snapshot, now = sample
+        temp = snapshot.cpu
+        if temp:
+            # decide and act before anything slow, so the critical check is never late
+            self.stage("decide", self.forecast, now, temp, snapshot)
+            self.stage("mitigate", self.mitigate, temp)
+            # Only show notification/window if temp >= THRESHOLD
+            if temp >= THRESHOLD:
+                self.stage("notify", self.alert, temp, snapshot)
+            elif _NOTIFIER and _NOTIFIER.pending:
+                self.stage("notify", _NOTIFIER.flush)  # last update held back by the rate limit
+        self.stage("log", self.record, temp, snapshot)
+        delay = self.scheduler.next_interval(now, temp)
+        if temp:
+            self.forecaster.expect(now + delay, delay)
+        if self.watchdog:
+            self.watchdog.record_tick(time.perf_counter() - started)
+        return delay
+
+    def sample(self):
+        snapshot = self.read()
+        now = self.clock()
+        if self.heat:
+            # Same tick as the temperature, so the ranking lines up with it
+            self.heat.sample(now)
+            snapshot.top = self.heat.top(tempRing.TOP_N)
+        return snapshot, now
+
+    def record(self, temp, snapshot):
+        if temp:
+            # Always log temperature (every sample)
+            log_temperature(snapshot)
+            if self.history:
+                self.history.add(snapshot)
+            _warning_window().add(temp)
+        if self.metrics:
+            # render once here; scrapes only send the cached body
+            self.metrics.update(snapshot, self.ladder)
+            if self.metrics_textfile:
+                self.metrics.write_textfile(self.metrics_textfile)
+
+    def forecast(self, now, temp, snapshot):
+        """Act early when the trend says CRITICAL is less than FORECAST_LEAD away."""
+        error = self.forecaster.add(now, temp)
+        eta = self.forecaster.time_to(CRITICAL)
+        log = self.forecast_log
+        if temp >= CRITICAL:
+            if not self.over_critical and log:
+                log.crossed(now, temp)
+            self.over_critical = True
+            return
+        self.over_critical = False
+        if FORECAST_LEAD > 0 and eta is not None and eta <= FORECAST_LEAD:
+            if log:
+                log.alarm(now, temp, eta)
+                log.sample(now, temp, eta, error)
+            if not self.pre_empted:
+                self.pre_empted = True
+                self.pre_empt(temp, eta, snapshot)
+        elif self.pre_empted and temp < THRESHOLD and (eta is None or eta > 2 * FORECAST_LEAD):
+            if log:
+                log.clear(now, temp)
+            self.pre_empted = False
+            self.release()
+
+    def pre_empt(self, temp, eta, snapshot):
+        print(f"FORECAST: CPU {temp}°C, critical {CRITICAL}°C in ~{eta:.0f}s - {FORECAST_ACTION}", file=sys.stderr)
+        if self.ladder and FORECAST_ACTION != "warn":
+            rung = "freq" if FORECAST_ACTION == "throttle" else "stop"
+            self.forecast_floor = self.ladder.index_of(rung)
+        # stages take positional args only; bind the options by name
+        self.stage(
+            "notify", functools.partial(_notifier().notify, urgency="critical", key="forecast"),
+            "CPU heading to critical",
+            f"Temperature {temp}°C, {CRITICAL}°C expected in ~{eta:.0f}s\nSave work NOW",
+        )
+
+    def release(self):
+        print("FORECAST: trend cleared, releasing early mitigation", file=sys.stderr)
+        self.forecast_floor = 0
+
+    def mitigate(self, temp):
+        if self.ladder:
+            self.ladder.update(temp, self.forecast_floor)
+
+    def alert(self, temp, snapshot):
+        print(f"WARNING: CPU {temp}°C", file=sys.stderr)
+        if snapshot.top:
+            print(f"  top: {procHeat.format_top(snapshot.top)}", file=sys.stderr)
+        notify(temp, snapshot)
+
+    def run(self):
+        try:
+            while True:
+                self.sleep(self.tick())
+        finally:
+            if self.watchdog:
+                self.watchdog.shutdown()
+            if self.ladder:
+                self.ladder.release_all()
+
+
+class AsyncMonitor(Monitor):
+    """Monitor on an asyncio event loop (--async).
+
+    The sampler reads and decides on the scheduler's cadence, measured from
+    the start of each tick. Mitigation, notifications, the window and
+    logging are queued to their own tasks (tempAsync.Stages), so a lock
+    command timing out or a kill waiting out its grace period never delays
+    the next sample.
+    """
+
+    def __init__(self, scheduler, stages=None, **kwargs):
+        super().__init__(scheduler, **kwargs)
+        self.stages = stages or tempAsync.Stages()
+        self.sampled = None
+
+    def stage(self, name, fn, *args):
+        if name == "read":
+            return self.sampled  # read ahead by the sampler
+        if name == "decide":
+            return fn(*args)
+        self.stages.offer(name, fn, *args)
+        return None
+
+    def alert(self, temp, snapshot):
+        print(f"WARNING: CPU {temp}°C", file=sys.stderr)
+        if snapshot.top:
+            print(f"  top: {procHeat.format_top(snapshot.top)}", file=sys.stderr)
+        self.stages.offer("ui", show_temp_warning_window, temp, temp >= CRITICAL)
+        notify_desktop(temp, snapshot)
+
+    async def sample_loop(self):
+        global _NOTIFIER
+        self.stages.start()
+        # notify-send fallback as an async subprocess instead of a blocking one
+        _NOTIFIER = tempNotify.Notifier(sender=lambda summary, body, urgency: self.stages.spawn(
+            tempAsync.run_command, ["notify-send", "-u", urgency, summary, body]))
+        loop = asyncio.get_running_loop()
+        reading = None
+        try:
+            while True:
+                started = loop.time()
+                if reading is None or reading.done():
+                    reading = asyncio.ensure_future(asyncio.to_thread(self.sample))
+                try:
+                    self.sampled = await asyncio.wait_for(asyncio.shield(reading), tempAsync.READ_TIMEOUT)
+                except asyncio.TimeoutError:
+                    # still running: the next tick waits on this read rather than starting another
+                    print(f"Sensor read took over {tempAsync.READ_TIMEOUT}s", file=sys.stderr)
+                    self.sampled = None
+                delay = self.tick()
+                await asyncio.sleep(max(0.0, started + delay - loop.time()))
+        finally:
+            await self.stages.stop()
+
+    def run(self):
+        try:
+            asyncio.run(self.sample_loop())
+        finally:
+            if self.ladder:
+                self.ladder.release_all()
 
 if __name__ == "__main__":
     # Parse command-line arguments
     parser = argparse.ArgumentParser(description="Monitor CPU temperature and send alerts")
     parser.add_argument(
         "--log-file",
-        default="/tmp/temp.log",
-        help="Path to log file (default: /tmp/temp.log)"
+        default=LOG_FILE,
+        help=f"Path to ring log file (default: {LOG_FILE})"
     )
     parser.add_argument(
         "--warn",
@@ -516,55 +539,163 @@ if __name__ == "__main__":
         default=CRITICAL,
         help=f"Temperature threshold for killing/locking (default: {CRITICAL}°C)"
     )
+    parser.add_argument(
+        "--dump",
+        action="store_true",
+        help="Print the ring log in human-readable form and exit"
+    )
+    parser.add_argument(
+        "--dump-minutes",
+        type=float,
+        default=LOG_WINDOW_MINUTES,
+        help=f"With --dump, minutes of history to print, 0 for all (default: {LOG_WINDOW_MINUTES})"
+    )
+    parser.add_argument(
+        "--min-interval",
+        type=float,
+        default=MIN_INTERVAL,
+        help=f"Seconds between samples near --warn/--critical (default: {MIN_INTERVAL})"
+    )
+    parser.add_argument(
+        "--max-interval",
+        type=float,
+        default=MAX_INTERVAL,
+        help=f"Seconds between samples when cool (default: {MAX_INTERVAL})"
+    )
+    parser.add_argument(
+        "--forecast-lead",
+        type=float,
+        default=FORECAST_LEAD,
+        help=f"Act when critical is forecast within this many seconds, 0 disables (default: {FORECAST_LEAD})"
+    )
+    parser.add_argument(
+        "--forecast-action",
+        choices=("warn", "throttle", "pause"),
+        default=FORECAST_ACTION,
+        help=f"Early mitigation when critical is forecast (default: {FORECAST_ACTION})"
+    )
+    parser.add_argument(
+        "--forecast-log",
+        default=FORECAST_LOG,
+        help=f"TSV log of forecast alarms, errors and lead times (default: {FORECAST_LOG})"
+    )
+    parser.add_argument(
+        "--ladder",
+        help="Mitigation rungs as name:level[:arg], e.g. freq:73:70,cgroup:75:50,stop:78:3,kill:80 "
+             "(default: freq at --warn, cgroup halfway, stop at --critical, kill 2°C above)"
+    )
+    parser.add_argument(
+        "--hysteresis",
+        type=float,
+        default=HYSTERESIS,
+        help=f"°C below a rung's level before it is released (default: {HYSTERESIS})"
+    )
+    parser.add_argument(
+        "--metrics-port",
+        type=int,
+        default=METRICS_PORT,
+        help=f"Serve Prometheus metrics on 127.0.0.1:PORT/metrics, 0 to disable (default: {METRICS_PORT})"
+    )
+    parser.add_argument(
+        "--metrics-textfile",
+        help="Also write metrics for the node_exporter textfile collector, "
+             "e.g. /var/lib/prometheus/node-exporter/temperature_warn.prom"
+    )
+    parser.add_argument(
+        "--history",
+        default=HISTORY_DB,
+        help=f"SQLite long-term history, rolled up to minutes and hours; '' to disable (default: {HISTORY_DB})"
+    )
+    parser.add_argument(
+        "--async",
+        dest="async_mode",
+        action="store_true",
+        help="Run on an asyncio event loop: sampling never waits on mitigation, notifications or logging"
+    )
+    parser.add_argument(
+        "--alarm",
+        action="store_true",
+        help="Also wake on hwmon temp*_alarm attributes (limits armed at --warn/--critical when root); "
+             "timed sampling stays as a backstop"
+    )
     args = parser.parse_args()
     
+    if args.dump:
+        LOG_FILE = args.log_file
+        dump_log(args.dump_minutes)
+        sys.exit(0)
+    
     if args.critical <= args.warn:
         parser.error("--critical must be greater than --warn")
+    if args.min_interval <= 0 or args.max_interval < args.min_interval:
+        parser.error("need 0 < --min-interval <= --max-interval")
+    if args.alarm and args.async_mode:
+        parser.error("--alarm blocks in poll() and cannot be combined with --async")
     
     # Override LOG_FILE with command-line argument
     LOG_FILE = args.log_file
     THRESHOLD = args.warn
     CRITICAL = args.critical
+    FORECAST_LEAD = args.forecast_lead
+    FORECAST_ACTION = args.forecast_action
     
     print(
-        f"Starting temperature monitor (warn: {THRESHOLD}°C, critical: {CRITICAL}°C, interval: {INTERVAL}s)",
+        f"Starting temperature monitor (warn: {THRESHOLD}°C, critical: {CRITICAL}°C, "
+        f"interval: {args.min_interval}-{args.max_interval}s)",
         file=sys.stderr,
     )
     print(f"Logging to: {LOG_FILE}", file=sys.stderr)
     
-    while True:
-        temp = get_temp()
-        if temp:
-            # Get detailed temps for logging
-            temp1_first, edge_temp, temp1_second = get_detailed_temps()
-            
-            # Always log temperature (every interval)
-            log_temperature(temp1_first, edge_temp, temp1_second)
-            
-            # Only show notification/window if temp >= THRESHOLD
-            if temp >= THRESHOLD:
-                print(f"WARNING: CPU {temp}°C", file=sys.stderr)
-                
-                # Show GUI warning and desktop notification
-                is_critical = temp >= CRITICAL
-                show_temp_warning_window(temp, is_critical)
-                
-                subprocess.run([
-                    "notify-send",
-                    "-u", "critical",
-                    "CPU OVERHEATING" if is_critical else "CPU Temperature High",
-                    f"Temperature {temp}°C ≥ {THRESHOLD}°C\n{'KILLING PROCESSES!' if is_critical else 'Save work NOW'}"
-                ])
-                
-                # Only kill processes if temp >= CRITICAL
-                if is_critical:
-                    print(f"CRITICAL TEMPERATURE {temp}°C ≥ {CRITICAL}°C - Killing heavy processes", file=sys.stderr)
-                    kill_heavy_processes()
-                    if temp > CRITICAL:
-                        kill_antigravity_processes()
-                    lock_and_turn_off_display()
-        
-        time.sleep(INTERVAL)
+    scheduler = tempSchedule.SampleScheduler(THRESHOLD, CRITICAL, args.min_interval, args.max_interval)
+    kill_action = terminate_heavy_processes
+    if args.async_mode:
+        stages = tempAsync.Stages()
+        kill_action = lambda targets: terminate_heavy_processes(
+            targets, lambda: stages.spawn(lock_and_turn_off_display_async))
+    try:
+        steps = tempMitigate.parse_ladder(
+            args.ladder or tempMitigate.default_ladder(THRESHOLD, CRITICAL),
+            kill_action,
+            # the watchdog's mitigate deadline is far shorter than the kill grace period
+            background_kill=not args.async_mode,
+        )
+    except ValueError as e:
+        parser.error(str(e))
+    heat = procHeat.HeatTracker()
+    ladder = tempMitigate.MitigationLadder(steps, heat.targets, args.hysteresis)
+    print(f"Mitigation ladder: {', '.join(map(repr, ladder.steps))}", file=sys.stderr)
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    
+    metrics = tempMetrics.Metrics(THRESHOLD, CRITICAL)
+    if args.metrics_port:
+        try:
+            metrics.serve(args.metrics_port)
+            print(f"Metrics: http://127.0.0.1:{args.metrics_port}/metrics", file=sys.stderr)
+        except OSError as e:
+            print(f"Error starting metrics server: {e}", file=sys.stderr)
+    
+    options = dict(forecast_log=tempForecast.ForecastLog(args.forecast_log), ladder=ladder, heat=heat,
+                   metrics=metrics, metrics_textfile=args.metrics_textfile,
+                   history=tempHistory.History(args.history) if args.history else None)
+    alarms = None
+    if args.async_mode:
+        print("Mode: asyncio", file=sys.stderr)
+        monitor = AsyncMonitor(scheduler, stages=stages, **options)
+    else:
+        watchdog = tempWatchdog.Watchdog()
+        signal.signal(signal.SIGUSR1, watchdog.dump)
+        alarms = tempAlarm.HwmonAlarms(THRESHOLD, CRITICAL) if args.alarm else None
+        if alarms:
+            print(f"Alarm wakeups: {', '.join(f'{c} {a}' for c, a in alarms.alarms.values())}", file=sys.stderr)
+            options["sleep"] = alarms.wait
+        elif args.alarm:
+            print("No hwmon alarm attributes found, timed sampling only", file=sys.stderr)
+        monitor = Monitor(scheduler, watchdog=watchdog, **options)
+    try:
+        monitor.run()
+    finally:
+        if alarms is not None:
+            alarms.close()
 
 
 # Service commands (after editing this file, you MUST restart the service):
@@ -575,4 +706,19 @@ if __name__ == "__main__":
 # sudo systemctl status temperature-warn
 #
 # To test without conflicting with running service:
-# python3 temperatureWarn.py --log-file /tmp/temp_test.log
\ No newline at end of file
+# python3 temperatureWarn.py --log-file /tmp/temp_test.ring
+#
+# To read the log (binary ring file):
+# python3 temperatureWarn.py --dump [--dump-minutes 0]
+#
+# Event-loop mode (side effects never delay sampling):
+# python3 temperatureWarn.py --async
+#
+# Wake on hwmon alarms as well as the timer (run as root to arm the limits):
+# sudo python3 temperatureWarn.py --alarm
+#
+# Per-stage tick latency histograms (printed to the service's stderr / journal):
+# kill -USR1 $(systemctl show -p MainPID --value temperature-warn)
+#
+# Prometheus metrics (--metrics-port 0 to disable):
+# curl -s http://127.0.0.1:9479/metrics
\ No newline at end of file
@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Test script for the mem_stats.db schema and lookups (memDb.py)
+Migrates a copy of the committed sys/mem_stats.db in place, checks the
+migration is idempotent and that the v2 schema returns every v1 row
+through the memory_log view from a much smaller file, then compares the
+indexed nearest lookup with the old ORDER BY ABS(strftime(...)) scan.
+"""
+import sys
+import os
+import shutil
+import sqlite3
+import tempfile
+import time
+from datetime import datetime
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import memDb
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+SAMPLE_DB = os.path.join(os.path.dirname(HERE), "mem_stats.db")
+
+OLD_NEAREST = """
+    SELECT timestamp FROM memory_log
+    ORDER BY ABS(strftime('%s', timestamp) - strftime('%s', ?)) ASC LIMIT 1
+"""
+
+
+def migrated_copy(tmp):
+    path = os.path.join(tmp, "mem_stats.db")
+    shutil.copy(SAMPLE_DB, path)
+    return path
+
+
+def test_migration():
+    """v1 rows survive the move to v2 unchanged; reruns are no-ops"""
+    print("=" * 60)
+    print("TEST 1: In-place, idempotent migration to the v2 schema")
+    print("=" * 60)
+    columns = "timestamp, pid, user, command, rss_mb, pmem"
+    with tempfile.TemporaryDirectory() as tmp:
+        path = migrated_copy(tmp)
+        conn = sqlite3.connect(path)
+        v1 = conn.execute(f"SELECT {columns} FROM memory_log ORDER BY timestamp, pid").fetchall()
+        start = time.perf_counter()
+        assert memDb.migrate(conn) == memDb.VERSION
+        print(f"Migrated {len(v1)} rows in {(time.perf_counter() - start) * 1000:.0f} ms")
+        assert memDb.migrate(conn) == memDb.VERSION
+        assert conn.execute("PRAGMA user_version").fetchone()[0] == memDb.VERSION
+        v2 = conn.execute(f"SELECT {columns} FROM memory_log ORDER BY timestamp, pid").fetchall()
+        assert v2 == v1, "memory_log view differs from the v1 table"
+        conn.execute("VACUUM")
+        conn.close()
+        size = os.path.getsize(path)
+        print(f"File: {os.path.getsize(SAMPLE_DB) / 1024:.0f} KiB -> {size / 1024:.0f} KiB")
+        assert size * 2 < os.path.getsize(SAMPLE_DB)
+
+        conn = memDb.connect(path)
+        memDb.add_snapshot(conn, memDb.to_epoch(datetime(2026, 3, 1, 10)), [
+            (1, "root", "init", 9336, 0.1), (4242, "ubuntu", "chrome", 524288, 7.0)], 7589115, 312,
+            apps=[("chrome", 31, 2097152, 1048576, 900000, 0), ("init", 1, 9336, 4000, 3000, 0)])
+        conn.commit()
+        assert memDb.top(conn, memDb.to_epoch(datetime(2026, 3, 1, 10))) == [
+            (4242, "ubuntu", "chrome", 512.0, 7.0), (1, "root", "init", 9336 / 1024, 0.1)]
+        assert memDb.top_apps(conn, memDb.to_epoch(datetime(2026, 3, 1, 10))) == [
+            ("chrome", 31, 2048.0, 1024.0), ("init", 1, 9336 / 1024, 4000 / 1024)]
+        conn.close()
+
+
+def test_lookups_match_scan():
+    """nearest / at_or_before agree with the full-scan queries"""
+    print("\n" + "=" * 60)
+    print("TEST 2: Index seeks return the same snapshots as the old scans")
+    print("=" * 60)
+    with tempfile.TemporaryDirectory() as tmp:
+        conn = memDb.connect(migrated_copy(tmp))
+        targets = ["2026-01-14 03:00:00", "2026-01-16 18:15:00", "2026-01-16 17:30:00",
+                   "2026-02-01 12:34:56", "2026-03-01 00:00:00"]
+        scan = index = 0.0
+        for target in targets:
+            dt = datetime.strptime(target, "%Y-%m-%d %H:%M:%S")
+            start = time.perf_counter()
+            old = conn.execute(OLD_NEAREST, (target,)).fetchone()[0]
+            scan += time.perf_counter() - start
+            start = time.perf_counter()
+            ts = memDb.nearest(conn, memDb.to_epoch(dt))
+            index += time.perf_counter() - start
+            new = memDb.from_epoch(ts).strftime("%Y-%m-%d %H:%M:%S")
+            print(f"  {target} -> {new}")
+            assert new == old, (target, old, new)
+            before = memDb.at_or_before(conn, memDb.to_epoch(dt))
+            old_before = conn.execute("SELECT max(timestamp) FROM memory_log WHERE timestamp <= ?",
+                                      (target,)).fetchone()[0]
+            assert (before and memDb.from_epoch(before).strftime("%Y-%m-%d %H:%M:%S")) == old_before
+        assert len(memDb.top(conn, ts, 10)) == 10
+        day = memDb.snapshots(conn, memDb.to_epoch(datetime(2026, 1, 16)), memDb.to_epoch(datetime(2026, 1, 17)))
+        assert day == sorted(set(day)) and day
+        plan = " ".join(row[3] for row in conn.execute(
+            "EXPLAIN QUERY PLAN SELECT pid FROM memory_log WHERE ts = 1"))
+        assert "INDEX snapshots_ts (ts=?)" in plan and "PRIMARY KEY (snapshot_id=?)" in plan, plan
+        print(f"Scan {scan / len(targets) * 1000:.2f} ms, index {index / len(targets) * 1000:.3f} ms per lookup")
+        assert index < scan
+        conn.close()
+
+
+if __name__ == "__main__":
+    test_migration()
+    test_lookups_match_scan()
+    print("\n" + "=" * 60)
+    print("ALL TESTS COMPLETED")
+    print("=" * 60)
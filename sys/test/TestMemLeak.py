@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Test script for the memory growth detector (memLeak.py)
+Builds a history with one steadily leaking process, a noisy flat one and
+a recycled pid, checks only the leak is flagged with the right rate and
+time to OOM, that an incremental run from the watermark matches a full
+run, and times a full pass over the committed sys/mem_stats.db.
+"""
+import sys
+import os
+import random
+import shutil
+import tempfile
+import time
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import memDb
+import memLeak
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+SAMPLE_DB = os.path.join(os.path.dirname(HERE), "mem_stats.db")
+MEM_TOTAL_KIB = 8 * 1024 * 1024
+T0 = 1_790_000_000
+
+
+def add_hours(conn, first, last, rng):
+    """Snapshots every 10 minutes from hour first to hour last."""
+    for step in range(first * 6, last * 6):
+        ts = T0 + step * 600
+        hours = step / 6
+        leak = int((500 + 50 * hours + rng.uniform(-5, 5)) * 1024)        # 50 MiB/h
+        flat = int((800 + rng.uniform(-60, 60)) * 1024)
+        # pid 300 is a big short-lived job, then reused by a small one:
+        # merged into one series it would look like a steep decline
+        reused = (300, "root", "job", 2_000_000, 1.0, None, None, None, 111) if hours < 3 else \
+            (300, "root", "job", 100_000 + step * 100, 1.0, None, None, None, 222)
+        memDb.add_snapshot(conn, ts, [
+            (100, "ubuntu", "leaky", leak, 1.0, None, None, None, 5),
+            (200, "ubuntu", "steady", flat, 1.0, None, None, None, 6),
+            reused,
+        ], MEM_TOTAL_KIB)
+    conn.commit()
+
+
+def leaks(conn):
+    return conn.execute("SELECT pid, start, first_ts, last_ts, rate_kib_h, rss_kib, round(oom_hours, 3) "
+                        "FROM leaks ORDER BY pid, start").fetchall()
+
+
+def test_flags_only_steady_growth():
+    """The linear leak is flagged with its rate; noise and pid reuse are not"""
+    print("=" * 60)
+    print("TEST 1: Steady growth, noise and a recycled pid")
+    print("=" * 60)
+    with tempfile.TemporaryDirectory() as tmp:
+        conn = memDb.connect(os.path.join(tmp, "a.db"), create=True)
+        add_hours(conn, 0, 12, random.Random(1))
+        previous, watermark, flagged = memLeak.analyze(conn)
+        for row in memLeak.report(conn):
+            print(f"  {row}")
+        rows = leaks(conn)
+        assert previous == 0 and watermark == T0 + (12 * 6 - 1) * 600
+        assert [r[0] for r in rows] == [100], rows
+        pid, start, first_ts, last_ts, rate, rss, oom = rows[0]
+        assert start == 5 and last_ts == watermark
+        assert abs(rate / 1024 - 50) < 3, rate / 1024
+        headroom = MEM_TOTAL_KIB - conn.execute(
+            "SELECT SUM(rss_kib) FROM samples WHERE snapshot_id = (SELECT max(id) FROM snapshots)").fetchone()[0]
+        assert abs(oom - headroom / rate) < 0.01, (oom, headroom / rate)
+        assert memLeak.analyze(conn) == (watermark, watermark, 0)
+        conn.close()
+
+
+def test_incremental_matches_full():
+    """Runs from the watermark give the same leaks as one full run"""
+    print("\n" + "=" * 60)
+    print("TEST 2: Incremental runs from the persisted watermark")
+    print("=" * 60)
+    with tempfile.TemporaryDirectory() as tmp:
+        conn = memDb.connect(os.path.join(tmp, "b.db"), create=True)
+        rng = random.Random(2)
+        for first, last in ((0, 4), (4, 5), (5, 9), (9, 12)):
+            add_hours(conn, first, last, rng)
+            conn.close()  # the watermark survives a restart
+            conn = memDb.connect(os.path.join(tmp, "b.db"))
+            print(f"  hours {first}-{last}: {memLeak.analyze(conn)[2]} flagged")
+        incremental = leaks(conn)
+        memLeak.analyze(conn, full=True)
+        assert leaks(conn) == incremental, (leaks(conn), incremental)
+        conn.close()
+
+
+def test_sample_history():
+    """A full pass over the committed history is one SQL statement"""
+    print("\n" + "=" * 60)
+    print("TEST 3: Full and incremental passes over sys/mem_stats.db")
+    print("=" * 60)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "mem_stats.db")
+        shutil.copy(SAMPLE_DB, path)
+        conn = memDb.connect(path)
+        start = time.perf_counter()
+        _, watermark, flagged = memLeak.analyze(conn)
+        full = time.perf_counter() - start
+        memDb.add_snapshot(conn, watermark + 600, [(1, "root", "init", 9336, 0.1)], 7589115)
+        conn.commit()
+        start = time.perf_counter()
+        memLeak.analyze(conn)
+        incremental = time.perf_counter() - start
+        print(f"{flagged} processes flagged; full pass {full * 1000:.0f} ms, "
+              f"one new snapshot {incremental * 1000:.1f} ms")
+        assert flagged > 0
+        assert incremental < full
+        conn.close()
+
+
+if __name__ == "__main__":
+    test_flags_only_steady_growth()
+    test_incremental_matches_full()
+    test_sample_history()
+    print("\n" + "=" * 60)
+    print("ALL TESTS COMPLETED")
+    print("=" * 60)
@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+"""
+Test script for the /proc memory sampler (memProc.py)
+Parses a fake /proc tree (comm with spaces, unreadable smaps_rollup),
+checks the live sampler against `ps` and times both.
+"""
+import sys
+import os
+import subprocess
+import tempfile
+import time
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import memProc
+
+ROLLUP = """55d0c0a00000-7ffc8a5f1000 ---p 00000000 00:00 0                          [rollup]
+Rss:              {rss} kB
+Pss:              {pss} kB
+Shared_Clean:      1000 kB
+Private_Clean:      {clean} kB
+Private_Dirty:      {dirty} kB
+Swap:               {swap} kB
+"""
+
+
+def write_process(root, pid, comm, ppid, rss, pss=None, cgroup=None):
+    d = os.path.join(root, str(pid))
+    os.makedirs(d)
+    with open(os.path.join(d, "stat"), "w") as f:
+        f.write(f"{pid} ({comm}) S {ppid} {pid} {pid} 0 -1 4194560 1 0 0 0 5 3 0 0 20 0 1 0 {pid} "
+                f"123456 {rss // memProc.PAGE_KIB} 18446744073709551615\n")
+    if pss is not None:
+        with open(os.path.join(d, "smaps_rollup"), "w") as f:
+            f.write(ROLLUP.format(rss=rss, pss=pss, clean=pss // 2, dirty=0, swap=0))
+    if cgroup is not None:
+        with open(os.path.join(d, "cgroup"), "w") as f:
+            f.write(f"0::{cgroup}\n")
+
+
+def fake_proc(root):
+    """Three processes; pid 30 shares most of its pages, pid 40 hides its rollup."""
+    procs = {
+        10: ("web content", 100, 50000, 48000, 20000, 26000, 512),
+        30: ("chrome", 200, 90000, 30000, 5000, 20000, 0),
+        40: ("secret) (x", 300, 60000, None, 0, 0, 0),
+    }
+    for pid, (comm, start, rss, pss, clean, dirty, swap) in procs.items():
+        d = os.path.join(root, str(pid))
+        os.makedirs(d)
+        pages = rss // memProc.PAGE_KIB
+        with open(os.path.join(d, "stat"), "w") as f:
+            f.write(f"{pid} ({comm}) S 1 {pid} {pid} 0 -1 4194560 1 0 0 0 5 3 0 0 20 0 1 0 {start} "
+                    f"123456 {pages} 18446744073709551615\n")
+        if pss is not None:
+            with open(os.path.join(d, "smaps_rollup"), "w") as f:
+                f.write(ROLLUP.format(rss=rss, pss=pss, clean=clean, dirty=dirty, swap=swap))
+    with open(os.path.join(root, "meminfo"), "w") as f:
+        f.write("MemTotal:        1000000 kB\nMemFree:          500000 kB\n")
+    os.makedirs(os.path.join(root, "self"))
+
+
+def test_fake_proc():
+    """PSS ranks shared-page-heavy processes below their RSS rank"""
+    print("=" * 60)
+    print("TEST 1: Parsing and PSS ranking on a fake /proc")
+    print("=" * 60)
+    with tempfile.TemporaryDirectory() as tmp:
+        fake_proc(tmp)
+        sampler = memProc.Sampler(tmp)
+        rows = sampler.top(3)
+        for row in rows:
+            print(f"  {row}")
+        assert sampler.count == 3 and sampler.mem_total_kib == 1000000
+        assert [r[0] for r in rows] == [40, 10, 30]  # 40 by RSS (no rollup), then by PSS
+        assert rows[0][2] == "secret) (x" and rows[0][5] is None
+        pid, user, comm, rss, pmem, pss, uss, swap, start = rows[1]
+        assert (comm, rss, pmem, pss, uss, swap, start) == ("web content", 50000, 5.0, 48000, 46000, 512, 100)
+        assert list(sampler.users.values()) == [user]
+
+
+def test_app_rollups():
+    """Processes group by rule, parent, systemd unit, then comm"""
+    print("\n" + "=" * 60)
+    print("TEST 2: Per-application totals on a fake /proc")
+    print("=" * 60)
+    user = "/user.slice/user-1000.slice/user@1000.service"
+    with tempfile.TemporaryDirectory() as tmp:
+        write_process(tmp, 1, "systemd", 0, 12000, 4000, "/init.scope")
+        write_process(tmp, 2, "kthreadd", 0, 0)
+        write_process(tmp, 100, "chrome", 1, 400000, 200000, f"{user}/app.slice/app-gnome-google-chrome-100.scope")
+        for pid in (101, 102, 103):
+            write_process(tmp, pid, "chrome", 100, 150000, 60000)
+        write_process(tmp, 200, "code", 1, 300000, 250000)
+        write_process(tmp, 201, "node", 200, 90000, 80000)   # language server
+        write_process(tmp, 202, "bash", 201, 5000, 2000)     # integrated terminal
+        write_process(tmp, 300, "nautilus", 1, 80000, 50000, f"{user}/app.slice/app-gnome-org.gnome.Nautilus-300.scope")
+        write_process(tmp, 301, "tracker-extract", 300, 20000, 15000, f"{user}/session.slice/tracker.service")
+        write_process(tmp, 400, "bash", 1, 6000, None, f"{user}/app.slice/vte-spawn-1234abcd.scope")
+        write_process(tmp, 401, "python3", 400, 40000, 38000, f"{user}/app.slice/vte-spawn-1234abcd.scope")
+        write_process(tmp, 210, "x265-encode", 1, 70000, 60000)  # not VS Code
+        write_process(tmp, 500, "spotify", 1, 200000, 150000,
+                      f"{user}/app.slice/snap.spotify.spotify-3e2f1a9c-1b2c-4d5e-8f90-123456789abc.scope")
+        with open(os.path.join(tmp, "meminfo"), "w") as f:
+            f.write("MemTotal:        8000000 kB\n")
+        sampler = memProc.Sampler(tmp)
+        sampler.top(3)
+        apps = {row[0]: row for row in sampler.apps()}
+        for row in apps.values():
+            print(f"  {row}")
+        assert apps["chrome"][1:4] == (4, 850000, 380000)
+        assert apps["code"][1:4] == (3, 395000, 332000)
+        assert apps["org.gnome.Nautilus"][1] == 1 and apps["tracker"][1] == 1
+        assert apps["bash"][1:4] == (1, 6000, 6000)  # unreadable rollup: PSS = RSS
+        assert apps["python3"][1] == 1 and apps["spotify"][1] == 1
+        assert apps["x265-encode"][1] == 1, "rule names match whole words, not substrings"
+        assert sampler.app_of("code-insiders") == "code" and sampler.app_of("encoder") is None
+        assert "kthreadd" not in apps
+        assert list(apps) == sorted(apps, key=lambda a: apps[a][3], reverse=True)
+        assert sum(row[1] for row in apps.values()) == sampler.count - 1
+
+
+def test_pressure():
+    """meminfo, PSI and vmstat fields; PSI files may be missing"""
+    print("\n" + "=" * 60)
+    print("TEST 3: System-wide pressure")
+    print("=" * 60)
+    with tempfile.TemporaryDirectory() as tmp:
+        with open(os.path.join(tmp, "meminfo"), "w") as f:
+            f.write("MemTotal: 8000000 kB\nMemFree: 300000 kB\nMemAvailable: 900000 kB\n"
+                    "Cached: 500000 kB\nSwapTotal: 2000000 kB\nSwapFree: 1500000 kB\n")
+        with open(os.path.join(tmp, "vmstat"), "w") as f:
+            f.write("nr_free_pages 75000\npgmajfault 4321\npswpin 77\npswpout 99\noom_kill 1\n")
+        assert memProc.read_pressure(tmp)["mem_some_avg10"] is None  # no /proc/pressure
+        os.makedirs(os.path.join(tmp, "pressure"))
+        with open(os.path.join(tmp, "pressure", "memory"), "w") as f:
+            f.write("some avg10=12.50 avg60=3.25 avg300=1.00 total=987654\n"
+                    "full avg10=4.00 avg60=1.50 avg300=0.50 total=123456\n")
+        with open(os.path.join(tmp, "pressure", "cpu"), "w") as f:
+            f.write("some avg10=30.00 avg60=20.00 avg300=10.00 total=5555\n"
+                    "full avg10=0.00 avg60=0.00 avg300=0.00 total=0\n")
+        p = memProc.read_pressure(tmp)
+        print(f"  {p}")
+        assert (p["mem_available_kib"], p["cached_kib"], p["swap_free_kib"], p["dirty_kib"]) == (900000, 500000, 1500000, None)
+        assert (p["mem_some_avg10"], p["mem_some_avg60"], p["mem_some_total"]) == (12.5, 3.25, 987654)
+        assert (p["mem_full_avg10"], p["cpu_some_avg60"], p["cpu_some_total"]) == (4.0, 20.0, 5555)
+        assert (p["pgmajfault"], p["pswpin"], p["pswpout"], p["oom_kill"]) == (4321, 77, 99, 1)
+        assert "cpu_full_avg10" not in p and "nr_free_pages" not in p
+    assert memProc.read_pressure()["mem_available_kib"] > 0
+
+
+def test_live_against_ps():
+    """The in-process scan sees what ps sees, without the fork"""
+    print("\n" + "=" * 60)
+    print("TEST 4: Live /proc scan against ps, and cost")
+    print("=" * 60)
+    sampler = memProc.Sampler()
+    runs = 20
+    start = time.perf_counter()
+    for _ in range(runs):
+        processes = sampler.scan()
+    ours = (time.perf_counter() - start) / runs
+    start = time.perf_counter()
+    for _ in range(runs):
+        sampler.rollups = {}
+        rows = sampler.top(10, processes)
+    rollup = (time.perf_counter() - start) / runs
+    start = time.perf_counter()
+    for _ in range(runs):
+        out = subprocess.run(["ps", "-eo", "pid,rss", "--sort=-rss"], stdout=subprocess.PIPE, text=True).stdout
+    ps = (time.perf_counter() - start) / runs
+    ps_rss = {int(p): int(r) for p, r in (line.split() for line in out.strip().split("\n")[1:])}
+    print(f"{sampler.count} processes: scan {ours * 1000:.2f} ms, ps fork {ps * 1000:.2f} ms, "
+          f"smaps_rollup of {10 * memProc.CANDIDATES} candidates {rollup * 1000:.2f} ms")
+    assert len(rows) == min(10, sampler.count)
+    for pid, user, comm, rss, *_ in rows:
+        if pid in ps_rss and pid != os.getpid():
+            assert abs(ps_rss[pid] - rss) <= max(1024, rss // 10), (comm, ps_rss[pid], rss)
+    assert ours < ps
+
+
+if __name__ == "__main__":
+    test_fake_proc()
+    test_app_rollups()
+    test_pressure()
+    test_live_against_ps()
+    print("\n" + "=" * 60)
+    print("ALL TESTS COMPLETED")
+    print("=" * 60)
@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+"""
+Test script for the memory query CLI (memQuery.py)
+Runs each query against a migrated copy of the committed sys/mem_stats.db,
+parses the CSV and JSON output back, checks history across the switch from
+snapshots to hourly rollups, and that every query plan starts from an index.
+"""
+import sys
+import os
+import csv
+import io
+import json
+import shutil
+import tempfile
+import time
+from contextlib import redirect_stdout
+from datetime import datetime
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import memDb
+import memQuery
+import memRetain
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+SAMPLE_DB = os.path.join(os.path.dirname(HERE), "mem_stats.db")
+
+
+def run(*argv):
+    out = io.StringIO()
+    with redirect_stdout(out):
+        code = memQuery.main(list(argv))
+    return code, out.getvalue()
+
+
+def test_parse_time():
+    """Absolute local times, now and N[smhd] ago"""
+    print("=" * 60)
+    print("TEST 1: Time arguments")
+    print("=" * 60)
+    now = 1_800_000_000
+    assert memQuery.parse_time("now", now) == now
+    assert memQuery.parse_time("40m", now) == now - 2400
+    assert memQuery.parse_time("-2h", now) == now - 7200
+    assert memQuery.parse_time("1.5d", now) == now - 129600
+    assert memQuery.parse_time("2026-01-16 18:15") == memDb.to_epoch(datetime(2026, 1, 16, 18, 15))
+    assert memQuery.parse_time("2026-01-16") == memDb.to_epoch(datetime(2026, 1, 16))
+    try:
+        memQuery.parse_time("yesterday")
+        assert False, "expected ValueError"
+    except ValueError as e:
+        print(f"  {e}")
+
+
+def test_queries_and_renderers():
+    """Each query in each format, against the sample history"""
+    print("\n" + "=" * 60)
+    print("TEST 2: Queries rendered as table, CSV and JSON")
+    print("=" * 60)
+    with tempfile.TemporaryDirectory() as tmp:
+        db = os.path.join(tmp, "mem_stats.db")
+        shutil.copy(SAMPLE_DB, db)
+
+        code, out = run("nearest", "2026-01-16 18:15", "--db", db)
+        print(out)
+        assert code == 0 and out.startswith("Snapshot: 2026-01-16 18:10:08")
+        assert len(out.strip().split("\n")) == 3 + 10
+
+        code, out = run("--db", db, "--format", "csv", "before", "2026-01-16 18:54:02", "-n", "3")
+        rows = list(csv.DictReader(io.StringIO(out)))
+        assert [r["command"] for r in rows] == ["java", "language_server", "java"], rows
+        assert rows[0]["pss_mb"] == "" and float(rows[0]["rss_mb"]) > float(rows[1]["rss_mb"])
+
+        code, out = run("range", "2026-01-16 17:00", "2026-01-16 19:00", "--db", db, "--format", "json")
+        snapshots = json.loads(out)
+        conn = memDb.connect(db)
+        expected = memDb.snapshots(conn, memQuery.parse_time("2026-01-16 17:00"), memQuery.parse_time("2026-01-16 19:00"))
+        conn.close()
+        assert [s["timestamp"] for s in snapshots] == [str(memDb.from_epoch(ts)) for ts in expected]
+        assert snapshots[0]["timestamp"] == "2026-01-16 17:00:09", snapshots[0]
+        assert all(s["top_rss_mb"] <= s["mem_total_mb"] for s in snapshots)
+
+        code, out = run("history", "chrome", "--since", "2026-01-16 16:00", "--until", "2026-01-16 17:59:59",
+                        "--db", db, "--format", "json")
+        detail = json.loads(out)
+        assert detail and {h["resolution"] for h in detail} == {"snapshot"}
+
+        # once retained away, the same window comes back as hourly rows
+        conn = memDb.connect(db)
+        memRetain.retain(conn, 30, now=memDb.to_epoch(datetime(2026, 2, 17)))
+        conn.close()
+        code, out = run("history", "chrome", "--since", "2026-01-16 16:00", "--until", "2026-01-16 17:59:59",
+                        "--db", db, "--format", "json")
+        hourly = json.loads(out)
+        print(f"chrome 16:00-17:59: {len(detail)} snapshots -> {len(hourly)} hourly rows")
+        assert {h["resolution"] for h in hourly} == {"hour"}
+        assert sum(h["snapshots"] for h in hourly) == len(detail)
+        assert max(h["rss_max_mb"] for h in hourly) == max(d["rss_mb"] for d in detail)
+
+        code, out = run("top", "--apps", "--db", db)
+        assert code == 0 and "No rows" in out
+        out = io.StringIO()
+        with redirect_stdout(out):
+            code = memQuery.main(["before", "2020-01-01", "--db", db])
+        assert code == 1
+
+
+def test_pressure():
+    """Pressure is stored per snapshot; counters become deltas, reset on reboot"""
+    print("\n" + "=" * 60)
+    print("TEST 3: Pressure per snapshot")
+    print("=" * 60)
+    with tempfile.TemporaryDirectory() as tmp:
+        conn = memDb.connect(os.path.join(tmp, "p.db"), create=True)
+        base = {"mem_available_kib": 1048576, "mem_some_avg10": 12.34, "mem_some_avg60": 5.0,
+                "mem_some_total": 999, "pgmajfault": 1000, "pswpin": 10, "oom_kill": 0}
+        memDb.add_snapshot(conn, 1000, [(1, "root", "init", 100, 0.1)], 8388608)
+        memDb.add_snapshot(conn, 1600, [(1, "root", "init", 100, 0.1)], 8388608, pressure=base)
+        memDb.add_snapshot(conn, 2200, [(1, "root", "init", 100, 0.1)], 8388608,
+                           pressure=dict(base, pgmajfault=1500, pswpin=25, oom_kill=1))
+        memDb.add_snapshot(conn, 2800, [(1, "root", "init", 100, 0.1)], 8388608,
+                           pressure=dict(base, pgmajfault=40, pswpin=0, oom_kill=0))  # rebooted
+        conn.commit()
+        rows = {}
+        for ts in (1000, 1600, 2200, 2800):
+            cursor = memQuery.pressure(conn, ts)
+            row = cursor.fetchone()
+            rows[ts] = row and dict(zip([d[0] for d in cursor.description], row))
+        print(f"  {rows[2200]}")
+        assert rows[1000] is None
+        assert rows[1600]["mem_available_mb"] == 1024.0 and rows[1600]["mem_some_avg10"] == 12.34
+        assert rows[1600]["pgmajfault_delta"] is None and rows[1600]["mem_full_avg10"] is None
+        assert (rows[2200]["pgmajfault_delta"], rows[2200]["pswpin_delta"], rows[2200]["oom_kill_delta"]) == (500, 15, 1)
+        assert (rows[2800]["pgmajfault_delta"], rows[2800]["oom_kill_delta"]) == (40, 0)
+        code, out = run("range", "1970-01-01", "now", "--db", os.path.join(tmp, "p.db"), "--format", "json")
+        assert [s["available_mb"] for s in json.loads(out)] == [None, 1024.0, 1024.0, 1024.0]
+        conn.close()
+
+
+def test_index_plans():
+    """No query scans samples or snapshots, and each returns in milliseconds"""
+    print("\n" + "=" * 60)
+    print("TEST 4: Query plans and timings")
+    print("=" * 60)
+    with tempfile.TemporaryDirectory() as tmp:
+        db = os.path.join(tmp, "mem_stats.db")
+        shutil.copy(SAMPLE_DB, db)
+        conn = memDb.connect(db)
+        ts = memQuery.find(conn, memDb.to_epoch(datetime(2026, 1, 16, 18, 15)))
+        day = memDb.to_epoch(datetime(2026, 1, 16))
+        queries = {
+            "top": lambda: memQuery.top(conn, ts),
+            "top_apps": lambda: memQuery.top_apps(conn, ts),
+            "range": lambda: memQuery.snapshot_range(conn, day, day + 86400),
+            "history": lambda: memQuery.history(conn, "chrome", day, day + 86400),
+            "pressure": lambda: memQuery.pressure(conn, ts),
+        }
+        statements = []
+        conn.set_trace_callback(statements.append)
+        for name, query in queries.items():
+            start = time.perf_counter()
+            rows = query().fetchall()
+            elapsed = (time.perf_counter() - start) * 1000
+            plan = " | ".join(row[3] for row in conn.execute("EXPLAIN QUERY PLAN " + statements[-1]))
+            print(f"  {name:<9} {len(rows):>4} rows {elapsed:6.2f} ms  {plan}")
+            assert "SCAN samples" not in plan and "SCAN sn" not in plan and "SCAN sa" not in plan, plan
+            assert elapsed < 50, (name, elapsed)
+        conn.close()
+
+
+if __name__ == "__main__":
+    test_parse_time()
+    test_queries_and_renderers()
+    test_pressure()
+    test_index_plans()
+    print("\n" + "=" * 60)
+    print("ALL TESTS COMPLETED")
+    print("=" * 60)
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Test script for mem_stats.db retention (memRetain.py)
+Rolls a migrated copy of the committed sys/mem_stats.db up into hourly
+rows, checks them against the detail they replace, that batch size does
+not change the result, that late rows merge into an existing hour, and
+that incremental vacuum shrinks the file.
+"""
+import sys
+import os
+import shutil
+import tempfile
+import time
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import memDb
+import memRetain
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+SAMPLE_DB = os.path.join(os.path.dirname(HERE), "mem_stats.db")
+
+EXPECTED = f"""
+    SELECT hour, c.name, count(*), min(rss), max(rss), CAST(round(avg(rss)) AS INTEGER)
+    FROM (SELECT {memRetain.HOUR_SQL} AS hour, sa.command_id, SUM(sa.rss_kib) AS rss
+          FROM snapshots sn JOIN samples sa ON sa.snapshot_id = sn.id
+          WHERE sn.ts < ? GROUP BY sn.id, sa.command_id)
+    JOIN commands c ON c.id = command_id
+    GROUP BY hour, command_id ORDER BY hour, c.name
+"""
+HOURLY = """
+    SELECT ts, command, snapshots, CAST(round(rss_min_mb * 1024) AS INTEGER),
+           CAST(round(rss_max_mb * 1024) AS INTEGER), CAST(round(rss_avg_mb * 1024) AS INTEGER)
+    FROM hourly_log ORDER BY ts, command
+"""
+
+
+def copy(tmp, name):
+    """The sample history at schema 5, compacted with auto_vacuum=INCREMENTAL."""
+    path = os.path.join(tmp, name)
+    shutil.copy(SAMPLE_DB, path)
+    conn = memDb.connect(path)
+    conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+    conn.execute("VACUUM")
+    return conn, path
+
+
+def test_rollup_matches_detail():
+    """hourly rows equal the aggregates of the snapshots they replace"""
+    print("=" * 60)
+    print("TEST 1: Hourly rollups, batches and incremental vacuum")
+    print("=" * 60)
+    with tempfile.TemporaryDirectory() as tmp:
+        conn, path = copy(tmp, "a.db")
+        newest = conn.execute("SELECT max(ts) FROM snapshots").fetchone()[0]
+        # keep the last 20 days of the sample
+        cutoff = memRetain._hour_start(newest - 86400 * 20)
+        now = cutoff + 86400 * 30
+        expected = conn.execute(EXPECTED, (cutoff,)).fetchall()
+        kept = conn.execute("SELECT count(*) FROM snapshots WHERE ts >= ?", (cutoff,)).fetchone()[0]
+        size = os.path.getsize(path)
+
+        batches, deleted, freed = memRetain.retain(conn, 30, batch_hours=24, max_batches=3, now=now)
+        assert batches == 3 and deleted > 0
+        start = time.perf_counter()
+        more, rest, freed_rest = memRetain.retain(conn, 30, batch_hours=24, now=now)
+        print(f"{deleted + rest} snapshots in {batches + more} batches, {kept} kept, "
+              f"{freed + freed_rest} pages freed ({(time.perf_counter() - start) * 1000:.0f} ms)")
+        assert conn.execute("SELECT count(*) FROM snapshots").fetchone()[0] == kept
+        assert conn.execute("SELECT min(ts) FROM snapshots").fetchone()[0] >= cutoff
+        assert conn.execute("SELECT count(*) FROM samples WHERE snapshot_id NOT IN (SELECT id FROM snapshots)"
+                            ).fetchone()[0] == 0
+        hourly = conn.execute(HOURLY).fetchall()
+        assert hourly == expected, "hourly rollups differ from the detail rows"
+        assert memRetain.retain(conn, 30, now=now) == (0, 0, 0)
+        conn.close()
+        print(f"File: {size / 1024:.0f} KiB -> {os.path.getsize(path) / 1024:.0f} KiB")
+        assert os.path.getsize(path) < size
+
+        conn, _ = copy(tmp, "b.db")  # one hour per batch gives the same rows
+        memRetain.retain(conn, 30, batch_hours=1, now=now)
+        assert conn.execute(HOURLY).fetchall() == hourly
+        conn.close()
+
+
+def test_late_rows_merge():
+    """A snapshot arriving for an hour that is already rolled up merges into it"""
+    print("\n" + "=" * 60)
+    print("TEST 2: Late snapshots merge into an existing hourly row")
+    print("=" * 60)
+    with tempfile.TemporaryDirectory() as tmp:
+        conn = memDb.connect(os.path.join(tmp, "c.db"), create=True)
+        hour = memRetain._hour_start(int(time.time()) - 86400 * 40)
+        memDb.add_snapshot(conn, hour + 60, [(1, "root", "chrome", 1000, 1.0, 800, 700, 0, 5)])
+        memDb.add_snapshot(conn, hour + 120, [(1, "root", "chrome", 3000, 1.0, 1200, 700, 0, 5),
+                                              (2, "root", "chrome", 1000, 1.0, None, None, None, 6)])
+        conn.commit()
+        memRetain.retain(conn, 30)
+        memDb.add_snapshot(conn, hour + 180, [(1, "root", "chrome", 8000, 1.0, 2000, 700, 0, 5)])
+        conn.commit()
+        memRetain.retain(conn, 30)
+        row = conn.execute("SELECT snapshots, rss_min_kib, rss_avg_kib, rss_max_kib, pss_min_kib, pss_max_kib "
+                           "FROM hourly").fetchall()
+        print(f"  {row}")
+        assert row == [(3, 1000, (1000 + 4000 + 8000) // 3, 8000, 800, 2000)]
+        assert memRetain.retain(conn, 0) == (0, 0, 0)
+        conn.close()
+
+
+if __name__ == "__main__":
+    test_rollup_matches_detail()
+    test_late_rows_merge()
+    print("\n" + "=" * 60)
+    print("ALL TESTS COMPLETED")
+    print("=" * 60)
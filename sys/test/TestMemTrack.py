@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Test script for the memTrack.py --daemon mode
+Runs the daemon against a temp database with a short interval and commit
+window, reads it concurrently (WAL), writes to it while a window is
+buffered, then stops it with SIGTERM and checks the batch was flushed.
+"""
+import sys
+import os
+import signal
+import sqlite3
+import subprocess
+import tempfile
+import time
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+SCRIPT = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "memTrack.py")
+
+
+def count(path):
+    conn = sqlite3.connect(path)
+    try:
+        return conn.execute("SELECT count(*) FROM snapshots").fetchone()[0]
+    finally:
+        conn.close()
+
+
+def test_daemon_batches_and_flushes():
+    """Snapshots are committed per window and the last batch on SIGTERM"""
+    print("=" * 60)
+    print("TEST 1: --daemon with batched commits and clean SIGTERM")
+    print("=" * 60)
+    with tempfile.TemporaryDirectory() as tmp:
+        db = os.path.join(tmp, "mem_stats.db")
+        daemon = subprocess.Popen([sys.executable, SCRIPT, "--daemon", "--db", db,
+                                   "--interval", "0.1", "--commit-every", "0.5"],
+                                  stdout=subprocess.PIPE, text=True)
+        try:
+            time.sleep(1.3)
+            mode = sqlite3.connect(db).execute("PRAGMA journal_mode").fetchone()[0]
+            visible = count(db)  # read while the daemon buffers a window
+        finally:
+            daemon.send_signal(signal.SIGTERM)
+            out, _ = daemon.communicate(timeout=10)
+        total = count(db)
+        print(out.strip())
+        print(f"journal_mode={mode}, committed while running: {visible}, after SIGTERM: {total}")
+        assert daemon.returncode == 0
+        assert mode == "wal"
+        assert 0 < visible < total, (visible, total)
+        assert total >= 8
+        conn = sqlite3.connect(db)
+        rows = conn.execute("SELECT count(*) FROM memory_log").fetchone()[0]
+        assert rows >= total, "every snapshot should have process rows"
+        conn.close()
+
+
+def test_daemon_leaves_db_writable():
+    """Buffered snapshots hold no write lock between commits"""
+    print("\n" + "=" * 60)
+    print("TEST 2: other writers are not locked out during a window")
+    print("=" * 60)
+    with tempfile.TemporaryDirectory() as tmp:
+        db = os.path.join(tmp, "mem_stats.db")
+        daemon = subprocess.Popen([sys.executable, SCRIPT, "--daemon", "--db", db,
+                                   "--interval", "0.1", "--commit-every", "60"],
+                                  stdout=subprocess.PIPE, text=True)
+        try:
+            time.sleep(1.0)
+            conn = sqlite3.connect(db, timeout=0.5)
+            start = time.perf_counter()
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute("INSERT INTO meta (key, value) VALUES ('test', 1)")
+            conn.commit()
+            waited = time.perf_counter() - start
+            conn.close()
+            buffered = count(db)
+        finally:
+            daemon.send_signal(signal.SIGTERM)
+            out, _ = daemon.communicate(timeout=10)
+        total = count(db)
+        print(out.strip())
+        print(f"write took {waited * 1000:.1f} ms, snapshots before SIGTERM: {buffered}, after: {total}")
+        assert daemon.returncode == 0
+        assert buffered == 0 and total >= 5, (buffered, total)
+
+
+if __name__ == "__main__":
+    test_daemon_batches_and_flushes()
+    test_daemon_leaves_db_writable()
+    print("\n" + "=" * 60)
+    print("ALL TESTS COMPLETED")
+    print("=" * 60)
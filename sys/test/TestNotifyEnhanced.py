@@ -28,10 +28,10 @@ print()
 # Test with critical temperature
 print("Test 2: Temperature above CRITICAL")
 print(f"Testing with {CRITICAL + 1}°C...")
-print("Should show RED window, notification, AND kill processes")
+print("Should show RED window and notification (throttling/killing is done by the mitigation ladder)")
 print()
 
-# Uncomment to test critical behavior (WARNING: will kill processes!)
+# Uncomment to test critical behavior
 # notify(CRITICAL + 1)
 # import time
 # time.sleep(6)
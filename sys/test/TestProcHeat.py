@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+Test script for per-process heat attribution (procHeat.py)
+Spins a CPU-busy child and checks it tops the ranking, that the monitor's
+own process tree and kernel threads (on a fake /proc) are never targets,
+and that the ranking survives the ring log next to an over-threshold sample.
+"""
+import sys
+import os
+import subprocess
+import tempfile
+import time
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import procHeat
+import temperatureWarn
+import tempRing
+from tempSensors import SensorSnapshot
+
+BUSY = [sys.executable, "-c", "while True: pass"]
+
+
+def test_busy_child_ranks_top():
+    """A spinning child is the hottest process and a mitigation target"""
+    print("=" * 60)
+    print("TEST 1: Busy child tops the heat ranking")
+    print("=" * 60)
+    child = subprocess.Popen(BUSY)
+    try:
+        tracker = procHeat.HeatTracker(tau=1.0)
+        start = time.monotonic()
+        tracker.sample(start)
+        for _ in range(5):
+            time.sleep(0.2)
+            tracker.sample(time.monotonic())
+        top = tracker.top(3)
+        print(f"Top: {procHeat.format_top(top)}")
+        assert top and top[0][0] == child.pid, top
+        assert top[0][2] > 0.5, "busy loop should use most of a core"
+        targets = tracker.targets()
+        print(f"Targets: {targets}")
+        assert targets[0][:2] == (child.pid, procHeat.read_stat(child.pid)[3]), "targets carry (pid, starttime)"
+        assert os.getpid() not in [pid for pid, _, _ in targets], "monitor must never target itself"
+    finally:
+        child.kill()
+        child.wait()
+
+
+def test_allowlist():
+    """Allowlisted names are ranked but never targeted"""
+    print("\n" + "=" * 60)
+    print("TEST 2: Allowlist excludes names from targets")
+    print("=" * 60)
+    child = subprocess.Popen(BUSY)
+    try:
+        comm = procHeat.read_stat(child.pid)[0]
+        tracker = procHeat.HeatTracker(tau=1.0, allow_names={comm})
+        tracker.sample(time.monotonic())
+        time.sleep(0.5)
+        tracker.sample(time.monotonic())
+        assert child.pid in [pid for pid, _, _ in tracker.top(3)]
+        assert child.pid not in [pid for pid, _, _ in tracker.targets()], f"{comm} is allowlisted"
+        print(f"{comm}({child.pid}) ranked but not targeted")
+    finally:
+        child.kill()
+        child.wait()
+
+
+def write_stat(proc, pid, comm, ppid, cpu_ticks, cmdline=b""):
+    os.makedirs(os.path.join(proc, str(pid)), exist_ok=True)
+    with open(os.path.join(proc, str(pid), "stat"), "w") as f:
+        f.write(f"{pid} ({comm}) R {ppid} 0 0 0 -1 0 0 0 0 0 {cpu_ticks} 0 0 0 20 0 1 0 {1000 + pid} 0 0\n")
+    with open(os.path.join(proc, str(pid), "cmdline"), "wb") as f:
+        f.write(cmdline)
+
+
+def test_kernel_threads_never_targeted():
+    """Hot kthreadd children and cmdline-less processes are ranked but not targeted"""
+    print("\n" + "=" * 60)
+    print("TEST 4: Kernel threads excluded from targets (fake /proc)")
+    print("=" * 60)
+    with tempfile.TemporaryDirectory() as proc:
+        procs = [(2, "kthreadd", 0, b""), (90, "kworker/3:1-events", 2, b""),
+                 (91, "ksoftirqd/0", 2, b""), (500, "stress", 1, b"stress\0--cpu\0")]
+        for pid, comm, ppid, cmdline in procs:
+            write_stat(proc, pid, comm, ppid, 0, cmdline)
+        tracker = procHeat.HeatTracker(proc=proc, tau=1.0)
+        tracker.sample(0.0)
+        for pid, comm, ppid, cmdline in procs:
+            write_stat(proc, pid, comm, ppid, procHeat.CLK_TCK, cmdline)  # one core each
+        tracker.sample(1.0)
+        ranked = [pid for pid, _, _ in tracker.top(4)]
+        targets = [pid for pid, _, _ in tracker.targets()]
+        print(f"Ranked {ranked}, targets {targets}")
+        assert sorted(ranked) == [2, 90, 91, 500]
+        assert targets == [500], targets
+
+
+def test_ranking_logged():
+    """The ranking is stored in the ring and rendered for hot samples"""
+    print("\n" + "=" * 60)
+    print("TEST 3: Ranking logged next to over-threshold samples")
+    print("=" * 60)
+    top = [(4242, "stress-ng-cpu", 3.5), (17, "chrome", 0.8)]
+    with tempfile.TemporaryDirectory() as tmp:
+        ring = tempRing.TempRing(os.path.join(tmp, "temp.ring"), capacity=4)
+        ring.append(SensorSnapshot(cpu=temperatureWarn.THRESHOLD + 2, top=top))
+        ring.append(SensorSnapshot(cpu=temperatureWarn.THRESHOLD - 20, top=top))
+        hot, cool = list(ring.snapshots())
+        ring.close()
+    assert hot.top == top, hot.top
+    entry = temperatureWarn.format_log_entry(hot)
+    print(entry)
+    assert "top:          stress-ng-cpu(4242) 350%, chrome(17) 80%" in entry
+    assert "top:" not in temperatureWarn.format_log_entry(cool)
+
+
+if __name__ == "__main__":
+    test_busy_child_ranks_top()
+    test_allowlist()
+    test_ranking_logged()
+    test_kernel_threads_never_targeted()
+    print("\n" + "=" * 60)
+    print("ALL TESTS COMPLETED")
+    print("=" * 60)
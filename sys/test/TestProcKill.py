@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+Test script for the /proc matcher and pidfd termination engine (procKill.py)
+Spawns throwaway children tagged with a unique marker, so only they match.
+"""
+import sys
+import os
+import signal
+import subprocess
+import time
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import procKill
+
+MARKER = f"procKillTest{os.getpid()}"
+IGNORE_TERM = "import signal, time; signal.signal(signal.SIGTERM, signal.SIG_IGN); time.sleep(60)"
+HANDLE_TERM = "import signal, sys, time; signal.signal(signal.SIGTERM, lambda *a: sys.exit(0)); time.sleep(60)"
+
+
+def spawn(count, code="import time; time.sleep(60)"):
+    children = [subprocess.Popen([sys.executable, "-c", code, MARKER]) for _ in range(count)]
+    time.sleep(0.3)  # let the interpreters install their handlers
+    return children
+
+
+def key(child):
+    """(pid, starttime) of a child, as the heat ranking captures it."""
+    with open(f"/proc/{child.pid}/stat") as f:
+        return child.pid, int(f.read().rsplit(")", 1)[1].split()[19])
+
+
+def reap(children):
+    for child in children:
+        child.kill()
+        child.wait()
+
+
+def test_scan_and_terminate_many():
+    """One scan finds every child; TERM exits them without waiting the grace"""
+    print("=" * 60)
+    print("TEST 1: Scan and terminate 50 processes")
+    print("=" * 60)
+    children = spawn(50)
+    try:
+        procs = procKill.scan(procKill.compile_patterns([MARKER]))
+        assert sorted(p.pid for p in procs) == sorted(c.pid for c in children)
+        assert os.getpid() not in [p.pid for p in procs], "must not match itself"
+        start = time.monotonic()
+        result = procKill.terminate(procs, grace=10)
+        took = time.monotonic() - start
+        print(f"{procKill.summary(result)} in {took:.2f}s")
+        assert len(result["exited"]) == 50
+        assert took < 5, "should return as soon as all exited, not after the grace"
+    finally:
+        reap(children)
+
+
+def test_escalation():
+    """A child ignoring SIGTERM gets SIGKILL right after the grace period"""
+    print("\n" + "=" * 60)
+    print("TEST 2: SIGKILL escalation after the grace period")
+    print("=" * 60)
+    children = spawn(1, IGNORE_TERM) + spawn(1)
+    try:
+        procs = procKill.scan(procKill.compile_patterns([MARKER]))
+        start = time.monotonic()
+        result = procKill.terminate(procs, grace=0.5)
+        took = time.monotonic() - start
+        print(f"{procKill.summary(result)} in {took:.2f}s")
+        assert [p.pid for p in result["killed"]] == [children[0].pid]
+        assert [p.pid for p in result["exited"]] == [children[1].pid]
+        assert 0.5 <= took < 2.0, took
+    finally:
+        reap(children)
+
+
+def test_pid_reuse_and_fallback():
+    """A stale starttime is never signalled; /proc polling works without pidfds"""
+    print("\n" + "=" * 60)
+    print("TEST 3: PID reuse guard and no-pidfd fallback")
+    print("=" * 60)
+    children = spawn(2, IGNORE_TERM)
+    try:
+        pid, start = key(children[0])
+        assert procKill.from_pids([(pid, start - 1)]) == [], "from_pids must drop a reused PID"
+        real = procKill.from_pids([(pid, start)])[0]
+        stale = procKill.Proc(real.pid, real.start - 1)
+        result = procKill.terminate([stale], grace=0.2)
+        assert result["gone"] == [stale] and children[0].poll() is None, "reused PID was signalled"
+        print(f"Stale (pid, starttime) skipped: {procKill.summary(result)}")
+
+        pidfd_open = getattr(os, "pidfd_open", None)
+        if pidfd_open:
+            del os.pidfd_open
+        try:
+            result = procKill.terminate(procKill.from_pids([key(children[1])]), grace=0.3)
+        finally:
+            if pidfd_open:
+                os.pidfd_open = pidfd_open
+        print(f"Without pidfds: {procKill.summary(result)}")
+        assert [p.pid for p in result["killed"]] == [children[1].pid]
+    finally:
+        reap(children)
+    assert procKill.parse_signal("-kill") == signal.SIGKILL
+    assert procKill.parse_signal("15") == signal.SIGTERM
+
+
+def test_resume_stopped():
+    """A SIGSTOPped process with a TERM handler exits gracefully when resumed"""
+    print("\n" + "=" * 60)
+    print("TEST 4: resume=True lets paused processes handle SIGTERM")
+    print("=" * 60)
+    children = spawn(2, HANDLE_TERM)
+    try:
+        for child in children:
+            os.kill(child.pid, signal.SIGSTOP)
+        start = time.monotonic()
+        result = procKill.terminate(procKill.from_pids([key(children[0])]), grace=2, resume=True)
+        took = time.monotonic() - start
+        print(f"Resumed: {procKill.summary(result)} in {took:.2f}s")
+        assert [p.pid for p in result["exited"]] == [children[0].pid] and took < 1.0, (result, took)
+        result = procKill.terminate(procKill.from_pids([key(children[1])]), grace=0.3)
+        print(f"Still stopped: {procKill.summary(result)}")
+        assert [p.pid for p in result["killed"]] == [children[1].pid], "without resume the handler never runs"
+    finally:
+        reap(children)
+
+
+if __name__ == "__main__":
+    test_scan_and_terminate_many()
+    test_escalation()
+    test_pid_reuse_and_fallback()
+    test_resume_stopped()
+    print("\n" + "=" * 60)
+    print("ALL TESTS COMPLETED")
+    print("=" * 60)
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Test script for hwmon alarm wakeups (tempAlarm.py)
+Builds a fake hwmon tree whose *_alarm files are FIFOs, so a write from a
+"driver" thread stands in for sysfs_notify(). Checks limits are armed and
+restored, that wait() returns as soon as an alarm fires, and that it
+falls back to a plain timed sleep without alarms.
+"""
+import sys
+import os
+import select
+import tempfile
+import threading
+import time
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import tempAlarm
+
+
+def fake_hwmon(root):
+    """k10temp-like chip with max/crit limits and FIFO alarm files."""
+    chip = os.path.join(root, "hwmon0")
+    os.makedirs(chip)
+    for attr, value in (("name", "k10temp"), ("temp1_input", "45000"),
+                        ("temp1_max", "70000"), ("temp1_crit", "100000")):
+        with open(os.path.join(chip, attr), "w") as f:
+            f.write(value + "\n")
+    for attr in ("temp1_max_alarm", "temp1_crit_alarm"):
+        os.mkfifo(os.path.join(chip, attr))
+    return chip
+
+
+def read(path):
+    with open(path) as f:
+        return f.read().strip()
+
+
+def test_arm_wait_restore():
+    """Limits follow --warn/--critical, a crossing wakes wait() at once"""
+    print("=" * 60)
+    print("TEST 1: Arm limits, wake on alarm, restore on close")
+    print("=" * 60)
+    with tempfile.TemporaryDirectory() as tmp:
+        chip = fake_hwmon(tmp)
+        alarms = tempAlarm.HwmonAlarms(73, 78, root=tmp, events=select.POLLIN)
+        # the "driver" end of each FIFO
+        writers = {a: os.open(os.path.join(chip, a), os.O_WRONLY | os.O_NONBLOCK)
+                   for a in ("temp1_max_alarm", "temp1_crit_alarm")}
+        try:
+            assert alarms
+            assert read(os.path.join(chip, "temp1_max")) == "73000"
+            assert read(os.path.join(chip, "temp1_crit")) == "78000"
+
+            start = time.monotonic()
+            assert alarms.wait(0.2) == []
+            print(f"No alarm: slept {time.monotonic() - start:.2f}s (backstop timeout)")
+            assert time.monotonic() - start >= 0.19
+
+            # alarm cleared (0) does not wake the monitor, raised (1) does
+            threading.Timer(0.05, os.write, (writers["temp1_max_alarm"], b"0\n")).start()
+            threading.Timer(0.15, os.write, (writers["temp1_max_alarm"], b"1\n")).start()
+            start = time.monotonic()
+            fired = alarms.wait(10)
+            woke = time.monotonic() - start
+            print(f"Alarm: woke after {woke * 1000:.0f} ms with {fired}")
+            assert fired == [("k10temp/hwmon0", "temp1_max_alarm", 1)]
+            assert 0.14 <= woke < 1
+        finally:
+            for fd in writers.values():
+                os.close(fd)
+            alarms.close()
+        assert read(os.path.join(chip, "temp1_max")) == "70000"
+        assert read(os.path.join(chip, "temp1_crit")) == "100000"
+
+
+def test_no_alarms():
+    """Without alarm attributes the object is falsy and wait() just sleeps"""
+    print("\n" + "=" * 60)
+    print("TEST 2: Chip without alarm attributes")
+    print("=" * 60)
+    with tempfile.TemporaryDirectory() as tmp:
+        os.makedirs(os.path.join(tmp, "hwmon0"))
+        with open(os.path.join(tmp, "hwmon0", "name"), "w") as f:
+            f.write("amdgpu\n")
+        alarms = tempAlarm.HwmonAlarms(73, 78, root=tmp)
+        assert not alarms
+        start = time.monotonic()
+        assert alarms.wait(0.1) == []
+        assert time.monotonic() - start >= 0.09
+        alarms.close()
+        print("No alarms found: timed sampling only")
+
+
+if __name__ == "__main__":
+    test_arm_wait_restore()
+    test_no_alarms()
+    print("\n" + "=" * 60)
+    print("ALL TESTS COMPLETED")
+    print("=" * 60)
@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+Test script for the asyncio monitor (tempAsync.py, temperatureWarn --async)
+Checks subprocess timeouts, drop-oldest bounded queues, and that the
+sampling cadence holds while mitigation and notifications block.
+"""
+import sys
+import os
+import asyncio
+import tempfile
+import threading
+import time
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import tempAsync
+import tempSchedule
+import temperatureWarn
+from tempSensors import SensorSnapshot
+
+
+def test_run_command():
+    """Commands run without blocking the loop and are killed at the timeout"""
+    print("=" * 60)
+    print("TEST 1: create_subprocess_exec with timeouts")
+    print("=" * 60)
+
+    async def main():
+        start = time.perf_counter()
+        ok = await tempAsync.run_command(["sleep", "10"], timeout=0.2)
+        waited = time.perf_counter() - start
+        first = await tempAsync.run_first([["no-such-command"], ["false"], ["true"], ["sleep", "10"]])
+        return ok, waited, first
+
+    ok, waited, first = asyncio.run(main())
+    print(f"sleep 10 killed after {waited:.2f}s, first success: {first}")
+    assert ok is False and waited < 1
+    assert first == ["true"]
+
+
+def test_bounded_queues():
+    """A full queue drops its oldest entry instead of blocking the producer"""
+    print("\n" + "=" * 60)
+    print("TEST 2: Bounded stage queues")
+    print("=" * 60)
+    done = []
+
+    async def main():
+        stages = tempAsync.Stages({"mitigate": 1, "log": 3})
+        stages.start()
+        for i in range(5):
+            stages.offer("mitigate", done.append, ("mitigate", i))
+        for i in range(5):
+            stages.offer("log", done.append, ("log", i))
+        # from a worker thread too
+        await asyncio.to_thread(stages.offer, "log", done.append, ("log", 5))
+        await asyncio.sleep(0.2)
+        await stages.stop()
+        return stages.dropped
+
+    dropped = asyncio.run(main())
+    print(f"Ran: {done}, dropped: {dropped}")
+    assert ("mitigate", 4) in done and ("mitigate", 0) not in done
+    assert ("log", 4) in done and ("log", 5) in done
+    assert dropped["mitigate"] == 4 and dropped["log"] == 2
+
+
+def test_cadence_with_slow_side_effects():
+    """Samples stay on schedule while mitigation and alerts block for seconds"""
+    print("\n" + "=" * 60)
+    print("TEST 3: Sampling cadence under blocking side effects")
+    print("=" * 60)
+    release = threading.Event()
+    samples = []
+
+    def read():
+        samples.append(time.perf_counter())
+        return SensorSnapshot(cpu=85.0, timestamp=time.time(), source="test")
+
+    class Slow(temperatureWarn.AsyncMonitor):
+        def mitigate(self, temp):
+            release.wait(2)
+
+        def alert(self, temp, snapshot):
+            release.wait(2)
+
+    scheduler = tempSchedule.SampleScheduler(temperatureWarn.THRESHOLD, temperatureWarn.CRITICAL, 0.05, 0.05)
+    monitor = Slow(scheduler, read=read)
+    saved = temperatureWarn.LOG_FILE
+    with tempfile.TemporaryDirectory() as tmp:
+        temperatureWarn.LOG_FILE = os.path.join(tmp, "temp.ring")
+
+        async def main():
+            try:
+                await asyncio.wait_for(monitor.sample_loop(), 0.6)
+            except asyncio.TimeoutError:
+                pass
+            release.set()
+
+        try:
+            asyncio.run(main())
+        finally:
+            temperatureWarn.LOG_FILE = saved
+    gaps = [b - a for a, b in zip(samples, samples[1:])]
+    print(f"{len(samples)} samples in 0.6s, largest gap {max(gaps) * 1000:.0f} ms, "
+          f"dropped {monitor.stages.dropped}")
+    assert len(samples) >= 10, len(samples)
+    assert max(gaps) < 0.15
+    assert monitor.stages.dropped["mitigate"] > 0
+
+
+if __name__ == "__main__":
+    test_run_command()
+    test_bounded_queues()
+    test_cadence_with_slow_side_effects()
+    print("\n" + "=" * 60)
+    print("ALL TESTS COMPLETED")
+    print("=" * 60)
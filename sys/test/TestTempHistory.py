@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Test script for the long-term history store (tempHistory.py)
+Feeds two hours of 1 s snapshots with an overheating spike and checks the
+rollups, retention, size cap and the range query checkTime.py uses.
+"""
+import sys
+import os
+import tempfile
+from datetime import datetime
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import checkTime
+import tempHistory
+from tempSensors import SensorSnapshot
+
+START = 1700000000 - 1700000000 % 3600  # on an hour boundary
+SPIKE = START + 1800                     # 30 minutes in: 2 minutes at 85°C
+
+
+def trace(t):
+    return 85.0 if SPIKE <= t < SPIKE + 120 else 50.0 + (t % 60) / 10
+
+
+def fill(history, seconds):
+    for t in range(START, START + seconds):
+        history.add(SensorSnapshot(timestamp=float(t), cpu=trace(t), cpu_fan=2000.0))
+
+
+def test_rollups_and_retention():
+    """Raw keeps an hour, minutes and hours roll up; checkTime prints the context"""
+    print("=" * 60)
+    print("TEST 1: Rollups and retention")
+    print("=" * 60)
+    with tempfile.TemporaryDirectory() as tmp:
+        history = tempHistory.History(os.path.join(tmp, "history.db"))
+        fill(history, 7200 + 30)
+        db = history.db
+        raw, minutes, hours = (db.execute(f"SELECT count(*) FROM {t}").fetchone()[0] for t in ("raw", "minute", "hour"))
+        print(f"raw {raw}, minute {minutes}, hour {hours}, {history.size() // 1024} KiB")
+        assert raw <= tempHistory.RAW_KEEP + 60
+        assert minutes == 120 and hours == 2
+        spike = history.range(SPIKE, SPIKE + 120)
+        print(f"Spike from minute rows: {spike}")
+        assert [values["cpu"] for _, values in spike] == [(85.0, 85.0, 85.0)] * 2
+        ts, values = history.range(START, START + 3600)[0]
+        assert ts == START and values["cpu"][0] == 50.0 and abs(values["cpu"][1] - 52.95) < 0.01
+        hour = history.db.execute("SELECT n, cpu_min, cpu_max FROM hour WHERE ts = ?", (START,)).fetchone()
+        assert hour == (3600, 50.0, 85.0), hour
+        recent = history.range(START + 7100, START + 7110)
+        assert len(recent) == 10, "recent range should come from raw rows"
+        history.close()
+
+        tempHistory.DB_PATH = history.path
+        target = datetime.fromtimestamp(SPIKE + 60)
+        checkTime.print_thermal_context(target, datetime.fromtimestamp(SPIKE - 180), datetime.fromtimestamp(SPIKE + 180))
+
+
+def test_size_cap():
+    """Oldest minute rows go first when over the cap"""
+    print("\n" + "=" * 60)
+    print("TEST 2: Size cap")
+    print("=" * 60)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "history.db")
+        history = tempHistory.History(path)
+        fill(history, 6 * 3600 + 10)
+        full = history.size()
+        history.max_bytes = full - 4096
+        with history.db:
+            history._cap()
+        minutes, hours = (history.db.execute(f"SELECT count(*) FROM {t}").fetchone()[0] for t in ("minute", "hour"))
+        oldest = history.db.execute("SELECT min(ts) FROM minute").fetchone()[0]
+        print(f"{full // 1024} KiB -> {history.size() // 1024} KiB: {minutes} minute rows, {hours} hour rows")
+        assert history.size() <= history.max_bytes
+        assert 0 < minutes < 360 and oldest > START, "oldest minutes go first"
+        assert hours == 6, "hour rows are kept"
+        history.close()
+
+
+if __name__ == "__main__":
+    test_rollups_and_retention()
+    test_size_cap()
+    print("\n" + "=" * 60)
+    print("ALL TESTS COMPLETED")
+    print("=" * 60)
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Test script for the Prometheus exporter (tempMetrics.py)
+Feeds the sample `sensors -j` output through Metrics.update(), scrapes the
+HTTP endpoint and the textfile, and times a tick's render.
+"""
+import sys
+import os
+import json
+import tempfile
+import time
+import urllib.request
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import tempMetrics
+import tempMitigate
+from tempSensors import SensorSnapshot
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+def sample_snapshot(cpu=None):
+    with open(os.path.join(HERE, "sampleSensors.output.json")) as f:
+        chips = json.load(f)
+    snapshot = SensorSnapshot.from_chips(chips, "sensors -j", 1700000000.0)
+    if cpu is not None:
+        snapshot.cpu = cpu
+    return snapshot
+
+
+def test_exposition():
+    """Every sensor, threshold, rung and counter is exported"""
+    print("=" * 60)
+    print("TEST 1: Exposition content and event counters")
+    print("=" * 60)
+    ladder = tempMitigate.MitigationLadder([tempMitigate.StopStep(78)], lambda: [])
+    metrics = tempMetrics.Metrics(73, 78)
+    for cpu in (60, 74, 79, 80, 74, 60, 75):
+        metrics.update(sample_snapshot(cpu), ladder)
+    text = metrics.body.decode()
+    print(text)
+    for line in (
+        'temperature_warn_temp_celsius{chip="k10temp-pci-00c3",sensor="temp1"} 73.0',
+        'temperature_warn_temp_limit_celsius{chip="k10temp-pci-00c3",sensor="temp1",limit="crit"} 100.0',
+        'temperature_warn_fan_rpm{chip="asus-isa-0000",sensor="cpu_fan"} 500.0',
+        'temperature_warn_voltage_volts{chip="amdgpu-pci-0008",sensor="vddgfx"} 0.975',
+        'temperature_warn_power_average_watts{chip="fam15h_power-pci-00c4",sensor="power1"} 0.053',
+        'temperature_warn_power_crit_watts{chip="fam15h_power-pci-00c4",sensor="power1"} 15.0',
+        'temperature_warn_mitigation_active{step="stop"} 0',
+        'temperature_warn_processes_signalled_total{step="stop"} 0',
+        'temperature_warn_events_total{level="warn"} 2',
+        'temperature_warn_events_total{level="critical"} 1',
+        '# TYPE temperature_warn_events_total counter',
+    ):
+        assert line in text, line
+
+
+def test_scrape_and_cost():
+    """HTTP and textfile serve the cached body; a tick renders quickly"""
+    print("\n" + "=" * 60)
+    print("TEST 2: HTTP scrape, textfile and render cost")
+    print("=" * 60)
+    metrics = tempMetrics.Metrics(73, 78)
+    snapshot = sample_snapshot()
+    metrics.update(snapshot)
+    server = metrics.serve(0)
+    try:
+        url = f"http://127.0.0.1:{server.server_address[1]}/metrics"
+        with urllib.request.urlopen(url) as response:
+            assert response.headers["Content-Type"] == tempMetrics.CONTENT_TYPE
+            assert response.read() == metrics.body
+    finally:
+        server.shutdown()
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "temperature_warn.prom")
+        metrics.write_textfile(path)
+        with open(path, "rb") as f:
+            assert f.read() == metrics.body
+        assert os.listdir(tmp) == ["temperature_warn.prom"], "temp file left behind"
+    start = time.perf_counter()
+    for _ in range(1000):
+        metrics.update(snapshot)
+    per_tick = (time.perf_counter() - start) / 1000 * 1e6
+    print(f"Render: {per_tick:.0f} µs per tick, {len(metrics.body)} bytes, scrape = cached body")
+    assert per_tick < 2000
+
+
+if __name__ == "__main__":
+    test_exposition()
+    test_scrape_and_cost()
+    print("\n" + "=" * 60)
+    print("ALL TESTS COMPLETED")
+    print("=" * 60)
@@ -0,0 +1,223 @@
+#!/usr/bin/env python3
+"""
+Test script for the mitigation ladder (tempMitigate.py)
+Uses a fake cpufreq tree, a fake cgroup root and a throwaway `sleep`
+child as the "heavy" process, so nothing real is throttled or killed.
+"""
+import sys
+import os
+import signal
+import subprocess
+import tempfile
+import time
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import tempMitigate
+
+CGROUP_NAME = tempMitigate.CGROUP_NAME
+
+
+def make_fake_cpufreq(root, cpus=2, max_khz=3000000):
+    for n in range(cpus):
+        policy = os.path.join(root, f"cpu{n}", "cpufreq")
+        os.makedirs(policy)
+        with open(os.path.join(policy, "cpuinfo_max_freq"), "w") as f:
+            f.write(f"{max_khz}\n")
+        with open(os.path.join(policy, "scaling_max_freq"), "w") as f:
+            f.write(f"{max_khz}\n")
+    return os.path.join(root, "cpu[0-9]*", "cpufreq")
+
+
+def read(path):
+    with open(path) as f:
+        return f.read().strip()
+
+
+def process_state(pid):
+    with open(f"/proc/{pid}/stat") as f:
+        return f.read().rsplit(")", 1)[1].split()[0]
+
+
+def target(child, label="sleep"):
+    """(pid, starttime, label) as procHeat.HeatTracker.targets returns it."""
+    with open(f"/proc/{child.pid}/stat") as f:
+        return child.pid, int(f.read().rsplit(")", 1)[1].split()[19]), label
+
+
+def test_ladder_climbs_and_releases():
+    """Rungs engage in order as temp rises and release below the hysteresis band"""
+    print("=" * 60)
+    print("TEST 1: Ladder climbs and releases with hysteresis")
+    print("=" * 60)
+    child = subprocess.Popen(["sleep", "60"])
+    killed = []
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            cpufreq_glob = make_fake_cpufreq(os.path.join(tmp, "cpu"))
+            cg_root = os.path.join(tmp, "cgroup")
+            os.makedirs(cg_root)
+            open(os.path.join(cg_root, "cgroup.subtree_control"), "w").close()
+
+            steps = [
+                tempMitigate.CpuFreqStep(73, 70, cpufreq_glob),
+                tempMitigate.CgroupStep(75, 50, root=cg_root),
+                tempMitigate.StopStep(78, 1),
+                tempMitigate.KillStep(80, lambda targets: killed.append(targets)),
+            ]
+            ladder = tempMitigate.MitigationLadder(steps, lambda: [target(child)], hysteresis=3)
+            policy = os.path.join(tmp, "cpu", "cpu0", "cpufreq", "scaling_max_freq")
+
+            for temp, expect in (
+                (70, []),
+                (73.5, ["freq"]),
+                (76, ["freq", "cgroup"]),
+                (79, ["freq", "cgroup", "stop"]),
+                (81, ["freq", "cgroup", "stop", "kill"]),
+                (81, ["freq", "cgroup", "stop", "kill"]),
+                (77.5, ["freq", "cgroup", "stop", "kill"]),  # inside hysteresis
+                (74, ["freq", "cgroup"]),
+                (71, ["freq"]),
+                (69, []),
+            ):
+                ladder.update(temp)
+                print(f"  {temp:5.1f}°C -> {ladder.active()}")
+                assert ladder.active() == expect, (temp, ladder.active())
+                if "freq" in expect:
+                    assert read(policy) == "2100000"
+                if "stop" in expect:
+                    time.sleep(0.05)
+                    assert process_state(child.pid) == "T", "child should be stopped"
+                if temp == 74:
+                    time.sleep(0.05)
+                    assert process_state(child.pid) != "T", "child should be resumed"
+            assert read(policy) == "3000000", "frequency cap not restored"
+            assert read(os.path.join(cg_root, CGROUP_NAME, "cpu.max")).endswith(" 100000")
+            assert killed == [[target(child)]], "kill rung must fire exactly once per excursion"
+    finally:
+        child.send_signal(signal.SIGCONT)
+        child.kill()
+        child.wait()
+
+
+def test_forecast_floor_and_parse():
+    """A forecast floor holds low rungs; ladder specs parse"""
+    print("\n" + "=" * 60)
+    print("TEST 2: Forecast floor and --ladder parsing")
+    print("=" * 60)
+    with tempfile.TemporaryDirectory() as tmp:
+        cpufreq_glob = make_fake_cpufreq(tmp)
+        ladder = tempMitigate.MitigationLadder(
+            [tempMitigate.CpuFreqStep(73, 60, cpufreq_glob)], lambda: [])
+        ladder.update(65, floor=ladder.index_of("freq"))
+        assert ladder.active() == ["freq"]
+        ladder.update(65, floor=0)
+        assert ladder.active() == []
+    spec = tempMitigate.default_ladder(73, 78)
+    steps = tempMitigate.parse_ladder(spec, lambda targets: None)
+    print(f"Default ladder: {spec} -> {steps}")
+    assert [s.name for s in steps] == ["freq", "cgroup", "stop", "kill"]
+    try:
+        tempMitigate.parse_ladder("melt:90", lambda targets: None)
+    except ValueError as e:
+        print(f"Rejected bad spec: {e}")
+    else:
+        raise AssertionError("unknown rung accepted")
+
+
+def test_stop_count_and_pid_reuse():
+    """The stop rung pauses at most `count` per excursion and only continues its own processes"""
+    print("\n" + "=" * 60)
+    print("TEST 3: Stop rung total cap and (pid, starttime) release")
+    print("=" * 60)
+    children = [subprocess.Popen(["sleep", "60"]) for _ in range(6)]
+    try:
+        step = tempMitigate.StopStep(78, 3)
+        for tick in range(3):
+            # paused processes cool off, so the ranking shifts every tick
+            step.engage([target(c) for c in children[tick * 2:]])
+        time.sleep(0.05)
+        paused = [c.pid for c in children if process_state(c.pid) == "T"]
+        print(f"Paused after 3 shifting ticks: {paused}")
+        assert paused == [c.pid for c in children[:3]], paused
+
+        pid, start, label = step.stopped[0]
+        step.stopped[0] = (pid, start - 1, label)  # as if the PID had been reused
+        step.release()
+        time.sleep(0.05)
+        assert process_state(pid) == "T", "a reused PID must not be continued"
+        assert all(process_state(c.pid) != "T" for c in children[1:3]), "own processes are continued"
+    finally:
+        for c in children:
+            c.send_signal(signal.SIGCONT)
+            c.kill()
+            c.wait()
+
+
+def test_kill_gets_paused_processes():
+    """The kill rung targets what the stop rung paused, not just the current ranking"""
+    print("\n" + "=" * 60)
+    print("TEST 4: Kill rung is handed the paused processes first")
+    print("=" * 60)
+    children = [subprocess.Popen(["sleep", "60"]) for _ in range(3)]
+    killed = []
+    ranking = [target(children[0]), target(children[1])]
+    try:
+        steps = tempMitigate.parse_ladder("stop:78:1,kill:80", lambda targets: killed.append(targets))
+        ladder = tempMitigate.MitigationLadder(steps, lambda: ranking, hysteresis=3)
+        ladder.update(79)
+        ranking[:] = [target(children[1]), target(children[2])]  # the paused one cooled off
+        ladder.update(81)
+        print(f"Kill targets: {killed}")
+        assert killed == [[target(children[0]), target(children[1]), target(children[2])]], killed
+    finally:
+        for c in children:
+            c.send_signal(signal.SIGCONT)
+            c.kill()
+            c.wait()
+
+
+def test_cgroup_errors():
+    """One unmovable pid is skipped; a refused rung is undone before it is dropped"""
+    print("\n" + "=" * 60)
+    print("TEST 5: Cgroup rung skips bad targets and releases when refused")
+    print("=" * 60)
+    children = [subprocess.Popen(["sleep", "60"]) for _ in range(3)]
+    refused = set()
+
+    class FakeCgroup(tempMitigate.CgroupStep):
+        def _move(self, pid, group):
+            if pid in refused:
+                raise PermissionError(13, "Permission denied")
+            if pid == children[0].pid and group == self.path:
+                raise ProcessLookupError(3, "No such process")  # exited since ranked
+            moves.append((pid, group))
+
+    moves = []
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            open(os.path.join(tmp, "cgroup.subtree_control"), "w").close()
+            step = FakeCgroup(75, 50, root=tmp)
+            ladder = tempMitigate.MitigationLadder([step], lambda: [target(c) for c in children])
+            ladder.update(76)
+            print(f"Moved: {step.moved}")
+            assert sorted(step.moved) == sorted(c.pid for c in children[1:]), "bad pid must not stop the rest"
+            refused.add(children[0].pid)
+            ladder.update(76)
+            assert not step.available and ladder.active() == []
+            assert step.moved == {}, "processes already capped must be moved back"
+            assert [pid for pid, group in moves if group != step.path] == [c.pid for c in children[1:]]
+    finally:
+        for c in children:
+            c.kill()
+            c.wait()
+
+
+if __name__ == "__main__":
+    test_ladder_climbs_and_releases()
+    test_forecast_floor_and_parse()
+    test_stop_count_and_pid_reuse()
+    test_kill_gets_paused_processes()
+    test_cgroup_errors()
+    print("\n" + "=" * 60)
+    print("ALL TESTS COMPLETED")
+    print("=" * 60)
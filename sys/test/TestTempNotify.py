@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Test script for the D-Bus notification backend (tempNotify.py)
+The rate limiter runs on a virtual clock. The D-Bus test starts a private
+dbus-daemon plus a stand-in org.freedesktop.Notifications service (this
+file with --serve) and checks bubbles are replaced in place; it is skipped
+when python3-gi is missing.
+"""
+import sys
+import os
+import subprocess
+import tempfile
+import time
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import tempNotify
+
+INTROSPECTION = """
+<node>
+  <interface name="org.freedesktop.Notifications">
+    <method name="Notify">
+      <arg type="s" direction="in"/><arg type="u" direction="in"/><arg type="s" direction="in"/>
+      <arg type="s" direction="in"/><arg type="s" direction="in"/><arg type="as" direction="in"/>
+      <arg type="a{sv}" direction="in"/><arg type="i" direction="in"/><arg type="u" direction="out"/>
+    </method>
+  </interface>
+</node>
+"""
+
+
+def serve(address, calls_path):
+    """Stand-in notification daemon: logs each Notify, hands out ids."""
+    from gi.repository import Gio, GLib
+    flags = Gio.DBusConnectionFlags.AUTHENTICATION_CLIENT | Gio.DBusConnectionFlags.MESSAGE_BUS_CONNECTION
+    bus = Gio.DBusConnection.new_for_address_sync(address, flags, None, None)
+    next_id = [1]
+
+    def on_call(conn, sender, path, iface, method, params, invocation):
+        app, replaces_id, icon, summary, body, actions, hints, timeout = params.unpack()
+        nid = replaces_id or next_id[0]
+        next_id[0] += replaces_id == 0
+        with open(calls_path, "a") as f:
+            f.write(f"{replaces_id}\t{nid}\t{hints['urgency']}\t{summary}\n")
+        invocation.return_value(GLib.Variant("(u)", (nid,)))
+
+    node = Gio.DBusNodeInfo.new_for_xml(INTROSPECTION)
+    bus.register_object(tempNotify.OBJECT_PATH, node.interfaces[0], on_call, None, None)
+    bus.call_sync("org.freedesktop.DBus", "/org/freedesktop/DBus", "org.freedesktop.DBus", "RequestName",
+                  GLib.Variant("(su)", (tempNotify.BUS_NAME, 4)), None, Gio.DBusCallFlags.NONE, -1, None)
+    open(calls_path + ".ready", "w").close()
+    GLib.MainLoop().run()
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_rate_limit():
+    """Repeats are dropped, bursts are held, held updates go out later"""
+    print("=" * 60)
+    print("TEST 1: Token bucket coalesces repeated notifications")
+    print("=" * 60)
+    clock = FakeClock()
+    sent = []
+    notifier = tempNotify.Notifier(rate=0.2, burst=2, clock=clock,
+                                   sender=lambda summary, body, urgency: sent.append(body))
+    notifier._connect = lambda: None
+    results = [notifier.notify("CPU Temperature High", f"Temperature {t}°C") for t in (74, 74, 75, 76, 77)]
+    print(f"Results: {results}")
+    assert results == ["sent", "repeat", "sent", "held", "held"]
+    clock.now = 5.0
+    notifier.flush()
+    assert sent == ["Temperature 74°C", "Temperature 75°C", "Temperature 77°C"], sent
+    assert not notifier.pending
+    print(f"Delivered: {sent}")
+
+
+def test_dbus_replace_in_place():
+    """One bubble id is reused for every update of the same key"""
+    print("\n" + "=" * 60)
+    print("TEST 2: D-Bus Notify with replaces_id against a stand-in daemon")
+    print("=" * 60)
+    if tempNotify.Gio is None:
+        print("SKIPPED: python3-gi not available")
+        return
+    with tempfile.TemporaryDirectory() as tmp:
+        daemon = subprocess.Popen(["dbus-daemon", "--session", "--nofork", "--print-address=1"],
+                                  stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True)
+        address = daemon.stdout.readline().strip()
+        calls = os.path.join(tmp, "calls")
+        server = subprocess.Popen([sys.executable, __file__, "--serve", address, calls])
+        try:
+            for _ in range(100):
+                if os.path.exists(calls + ".ready"):
+                    break
+                time.sleep(0.05)
+            notifier = tempNotify.Notifier(rate=100, burst=100, address=address)
+            for t in (74, 75, 76):
+                assert notifier.notify("CPU Temperature High", f"Temperature {t}°C") == "sent"
+            notifier.notify("CPU heading to critical", "soon", key="forecast")
+            with open(calls) as f:
+                rows = [line.rstrip("\n").split("\t") for line in f]
+            for row in rows:
+                print(f"  replaces_id={row[0]} -> id={row[1]} urgency={row[2]} {row[3]}")
+            assert [r[:2] for r in rows] == [["0", "1"], ["1", "1"], ["1", "1"], ["0", "2"]], rows
+            assert notifier.ids == {"temp": 1, "forecast": 2}
+        finally:
+            server.kill()
+            daemon.kill()
+            server.wait()
+            daemon.wait()
+
+
+if __name__ == "__main__":
+    if len(sys.argv) == 4 and sys.argv[1] == "--serve":
+        serve(sys.argv[2], sys.argv[3])
+        sys.exit(0)
+    test_rate_limit()
+    test_dbus_replace_in_place()
+    print("\n" + "=" * 60)
+    print("ALL TESTS COMPLETED")
+    print("=" * 60)
@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Test script for the record-and-replay harness (tempReplay.py)
+Every captured fixture in test/fixtures must parse to its expected
+snapshot through all three sources, and each threshold path must decide
+within its latency budget on a replayed trace. Ends with the benchmark.
+"""
+import sys
+import os
+import tempfile
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import tempReplay
+import temperatureWarn
+
+
+def test_fixtures_parse():
+    """hwmon, sensors -j and sensors text agree with each fixture's expected values"""
+    print("=" * 60)
+    print("TEST 1: Captured fixtures through every parser")
+    print("=" * 60)
+    paths = tempReplay.fixture_paths()
+    assert len(paths) >= 2, "fixtures missing"
+    for path in paths:
+        fixture = tempReplay.load_fixture(path)
+        for source in tempReplay.SOURCES:
+            bad = tempReplay.mismatches(fixture, tempReplay.parse(fixture, source))
+            print(f"  {fixture['name']:<20} {source:<13} {'ok' if not bad else bad}")
+            assert not bad, (fixture["name"], source, bad)
+
+
+def test_decision_latency():
+    """warn and critical react within a tick; forecast acts before critical"""
+    print("\n" + "=" * 60)
+    print("TEST 2: Decision latency per threshold path")
+    print("=" * 60)
+    base = tempReplay.parse(tempReplay.load_fixture(tempReplay.fixture_paths()[0]), "sensors-json")
+    monitor = tempReplay.replay(tempReplay.heat_event, 900, base=base)
+    latency = tempReplay.decision_latency(monitor, tempReplay.heat_event)
+    print(f"  {latency}")
+    assert 0 <= latency["warn"] <= 2.0
+    assert 0 <= latency["critical"] <= 2.0
+    assert -temperatureWarn.FORECAST_LEAD * 2 <= latency["forecast"] < 0
+
+
+def test_trace_file():
+    """A TSV trace replays like the function it samples"""
+    print("\n" + "=" * 60)
+    print("TEST 3: Trace loaded from TSV")
+    print("=" * 60)
+    with tempfile.NamedTemporaryFile("w", suffix=".tsv", delete=False) as f:
+        f.write("# seconds\ttemp\n0\t45\n600\t45\n760\t85\n900\t85\n")
+    try:
+        trace = tempReplay.load_trace(f.name)
+    finally:
+        os.unlink(f.name)
+    for t in (0, 300, 650, 700, 800):
+        assert abs(trace(t) - tempReplay.heat_event(t)) < 1e-9, t
+    monitor = tempReplay.replay(trace, 900)
+    assert set(tempReplay.decision_latency(monitor, trace)) == {"warn", "critical", "forecast"}
+    print("  TSV trace matches heat_event")
+
+
+if __name__ == "__main__":
+    test_fixtures_parse()
+    test_decision_latency()
+    test_trace_file()
+    print("\n" + "=" * 60)
+    print("BENCHMARK")
+    print("=" * 60)
+    tempReplay.bench(tempReplay.fixture_paths(), iterations=500)
+    print("\n" + "=" * 60)
+    print("ALL TESTS COMPLETED")
+    print("=" * 60)
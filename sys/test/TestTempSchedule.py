@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+Replay test for the adaptive sampling scheduler (tempSchedule.py) and the
+thermal forecast (tempForecast.py)
+Drives temperatureWarn.Monitor with a virtual clock and a scripted
+temperature trace (tempReplay), then measures how long after the trace
+crosses --critical the monitor reacts, and how long before it the
+forecast acts.
+"""
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import temperatureWarn
+from tempReplay import heat_event, crossing_time, replay
+from tempSchedule import SampleScheduler
+
+WARN = 73.0
+CRITICAL = 78.0
+
+
+def run_replay(min_interval, max_interval):
+    monitor = replay(heat_event, 900, min_interval, max_interval)
+    crossed = crossing_time(heat_event, CRITICAL)
+    reacted = next(t for t, temp in monitor.alerts if temp >= CRITICAL)
+    idle_wakeups = sum(1 for t in monitor.samples if t < 600)
+    return reacted - crossed, idle_wakeups, monitor
+
+
+def test_critical_latency():
+    """Reaction latency at --critical, adaptive vs the old fixed 30 s"""
+    print("=" * 60)
+    print("TEST 1: Reaction latency at the critical threshold")
+    print("=" * 60)
+    fixed_latency, fixed_idle, _ = run_replay(30, 30)
+    latency, idle, _ = run_replay(1, 120)
+    print(f"Fixed 30 s:     latency {fixed_latency:5.1f}s, {fixed_idle} wakeups while idle")
+    print(f"Adaptive 1-120: latency {latency:5.1f}s, {idle} wakeups while idle")
+    assert latency <= 2.0, f"critical reaction took {latency:.1f}s"
+    assert idle < fixed_idle, "adaptive mode should wake less often when cool"
+
+
+def test_no_flapping():
+    """Readings wobbling around the warn band must not flap the cadence"""
+    print("\n" + "=" * 60)
+    print("TEST 2: Hysteresis around the warn band")
+    print("=" * 60)
+    scheduler = SampleScheduler(WARN, CRITICAL, 1, 120)
+    band = WARN - 5.0
+    intervals = []
+    now = 0.0
+    for i in range(60):
+        temp = band + (0.6 if i % 2 == 0 else -0.6)
+        delay = scheduler.next_interval(now, temp)
+        intervals.append(delay)
+        now += delay
+    print(f"Intervals: {sorted(set(intervals))}")
+    assert max(intervals) <= 2.0, "fast sampling dropped while wobbling at the band"
+
+
+def test_forecast_lead():
+    """The forecast must act before the trace reaches --critical"""
+    print("\n" + "=" * 60)
+    print("TEST 3: Forecast lead time before critical")
+    print("=" * 60)
+    _, _, monitor = run_replay(1, 120)
+    crossed = crossing_time(heat_event, CRITICAL)
+    assert monitor.pre_empts, "forecast never fired"
+    when, temp, eta = monitor.pre_empts[0]
+    print(f"Pre-empted at {temp:.1f}°C, forecast eta {eta:.0f}s, actual lead {crossed - when:.0f}s")
+    assert 0 < crossed - when <= temperatureWarn.FORECAST_LEAD * 2
+
+
+if __name__ == "__main__":
+    test_critical_latency()
+    test_no_flapping()
+    test_forecast_lead()
+    print("\n" + "=" * 60)
+    print("ALL TESTS COMPLETED")
+    print("=" * 60)
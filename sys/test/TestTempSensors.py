@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+Test script for tempSensors.py
+Runs against a fake /sys/class/hwmon tree and the captured sensors output,
+so no real hardware or lm-sensors install is needed.
+"""
+import sys
+import os
+import json
+import tempfile
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import tempSensors
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+# hwmonN -> (name, {attribute: contents})
+FAKE_HWMON = {
+    "hwmon0": ("iwlwifi_1", {"temp1_input": "46000"}),
+    "hwmon1": ("k10temp", {
+        "temp1_input": "73000",
+        "temp1_max": "70000",
+        "temp1_crit": "100000",
+        "temp1_crit_hyst": "99000",
+    }),
+    "hwmon2": ("BAT0", {"in0_input": "11550"}),
+    "hwmon3": ("amdgpu", {
+        "in0_input": "975",
+        "in0_label": "vddgfx",
+        "in1_input": "1010",
+        "in1_label": "vddnb",
+        "temp1_input": "73000",
+        "temp1_label": "edge",
+    }),
+    "hwmon4": ("asus", {
+        "fan1_input": "500",
+        "fan1_label": "cpu_fan",
+        "fan2_input": "0",
+        "fan2_label": "gpu_fan",
+    }),
+    "hwmon5": ("fam15h_power", {
+        "power1_input": "75830",
+        "power1_average": "52690",
+        "power1_crit": "15000000",
+    }),
+    "hwmon6": ("acpitz", {"temp1_input": "63000"}),
+    "hwmon7": ("nvme", {"temp1_input": "40000"}),
+}
+
+
+def make_fake_hwmon(root, tree=FAKE_HWMON):
+    """Write a fake hwmon class directory under root."""
+    for entry, (name, attrs) in tree.items():
+        chip_dir = os.path.join(root, entry)
+        os.makedirs(chip_dir, exist_ok=True)
+        with open(os.path.join(chip_dir, "name"), "w") as f:
+            f.write(name + "\n")
+        for attr, value in attrs.items():
+            with open(os.path.join(chip_dir, attr), "w") as f:
+                f.write(value + "\n")
+
+
+def test_hwmon_backend():
+    """Discover a fake tree and re-read a changed value through the open fd"""
+    print("=" * 60)
+    print("TEST 1: hwmon backend against fake sysfs")
+    print("=" * 60)
+    with tempfile.TemporaryDirectory() as root:
+        make_fake_hwmon(root)
+        backend = tempSensors.HwmonBackend(root)
+        chips = backend.read()
+        print(f"Chips: {sorted(chips)}")
+        assert not any(c.startswith("nvme") for c in chips), "unwanted chip discovered"
+        assert tempSensors.feature_value(chips, "k10temp") == 73.0
+        assert tempSensors.feature_value(chips, "k10temp", sub="crit") == 100.0
+        assert tempSensors.feature_value(chips, "amdgpu", "edge") == 73.0
+        assert tempSensors.feature_value(chips, "amdgpu", "vddgfx", kind="in") == 0.975
+        assert tempSensors.feature_value(chips, "asus", "cpu_fan", kind="fan") == 500
+        assert abs(tempSensors.feature_value(chips, "fam15h_power", kind="power", sub="average") - 0.05269) < 1e-9
+
+        # rewrite in place: the kept-open descriptor must see the new value
+        with open(os.path.join(root, "hwmon1", "temp1_input"), "r+") as f:
+            f.write("81500\n")
+        chips = backend.read()
+        assert tempSensors.feature_value(chips, "k10temp") == 81.5
+        print(f"k10temp after update: {tempSensors.feature_value(chips, 'k10temp')}")
+        backend.close()
+
+
+def test_sensors_text_fallback():
+    """Parse the captured `sensors` output into the same shape"""
+    print("\n" + "=" * 60)
+    print("TEST 2: sensors text fallback parser")
+    print("=" * 60)
+    with open(os.path.join(HERE, "sampleSensors.output.txt")) as f:
+        chips = tempSensors.parse_sensors_text(f.read())
+    print(f"Chips: {sorted(chips)}")
+    assert tempSensors.feature_value(chips, "k10temp") == 73.0
+    assert tempSensors.feature_value(chips, "k10temp", sub="max") == 70.0
+    assert tempSensors.feature_value(chips, "k10temp", sub="crit_hyst") == 99.0
+    assert tempSensors.feature_value(chips, "BAT0", kind="in") == 11.55
+    assert abs(tempSensors.feature_value(chips, "amdgpu", "vddgfx", kind="in") - 0.975) < 1e-9
+    assert tempSensors.feature_value(chips, "fam15h_power", kind="power", sub="crit") == 15.0
+    assert tempSensors.feature_value(chips, "acpitz") == 63.0
+    assert tempSensors.format_value(0.07583, "power") == "75.83 mW"
+    assert tempSensors.format_value(73.0, "temp") == "+73.0°C"
+
+
+def test_snapshot_sources_agree():
+    """hwmon, sensors -j and sensors text must give the same snapshot"""
+    print("\n" + "=" * 60)
+    print("TEST 3: SensorSnapshot from every source")
+    print("=" * 60)
+    with open(os.path.join(HERE, "sampleSensors.output.json")) as f:
+        from_json = tempSensors.SensorSnapshot.from_chips(json.load(f), "sensors-json")
+    with open(os.path.join(HERE, "sampleSensors.output.txt")) as f:
+        from_text = tempSensors.SensorSnapshot.from_chips(
+            tempSensors.parse_sensors_text(f.read()), "sensors")
+    with tempfile.TemporaryDirectory() as root:
+        make_fake_hwmon(root)
+        reader = tempSensors.SensorReader(root)
+        from_hwmon = reader.read()
+        reader.close()
+    assert from_hwmon.source == "hwmon"
+    for name in tempSensors.SensorSnapshot.FIELDS:
+        a, b, c = (getattr(s, name) for s in (from_json, from_text, from_hwmon))
+        print(f"  {name:<12} json={a}  text={b}  hwmon={c}")
+        for other in (b, c):
+            assert (a is None) == (other is None), name
+            if a is not None:
+                assert abs(a - other) < 0.01, name
+    try:
+        from_json.extra = 1
+    except AttributeError:
+        pass
+    else:
+        raise AssertionError("SensorSnapshot should use __slots__")
+
+
+if __name__ == "__main__":
+    test_hwmon_backend()
+    test_sensors_text_fallback()
+    test_snapshot_sources_agree()
+    print("\n" + "=" * 60)
+    print("ALL TESTS COMPLETED")
+    print("=" * 60)
@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+Test script for the per-stage tick watchdog (tempWatchdog.py)
+Checks histogram accuracy, that a hung stage is abandoned at its deadline
+and skipped until it finishes, and that a monitor with a hanging notifier
+still runs the mitigation ladder on every tick. A stage hung at exit must
+not keep the process alive, and the kill rung must fit the mitigate
+deadline.
+"""
+import sys
+import os
+import subprocess
+import tempfile
+import threading
+import time
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import tempMitigate
+import tempWatchdog
+import temperatureWarn
+import tempReplay
+import tempSchedule
+
+
+def test_histogram():
+    """Percentiles come back within the bucket precision"""
+    print("=" * 60)
+    print("TEST 1: HDR-style histogram")
+    print("=" * 60)
+    h = tempWatchdog.Histogram()
+    for us in range(1, 10001):
+        h.record(us / 1e6)
+    print(h.summary())
+    for q, exact in ((50, 0.005), (90, 0.009), (99, 0.0099)):
+        got = h.percentile(q)
+        assert exact <= got <= exact * 1.07, (q, got)
+    assert h.percentile(100) == h.max == 0.01
+    assert len(h.counts) < 200, "buckets should grow with log(range), not range"
+
+
+def test_abandon_and_skip():
+    """A hung stage returns at its deadline and is skipped while still running"""
+    print("\n" + "=" * 60)
+    print("TEST 2: Overrunning stage is abandoned, not waited for")
+    print("=" * 60)
+    release = threading.Event()
+    watchdog = tempWatchdog.Watchdog({"notify": 0.1})
+    start = time.perf_counter()
+    assert watchdog.run("notify", release.wait) is None
+    assert watchdog.run("notify", release.wait) is None
+    waited = time.perf_counter() - start
+    print(f"Two ticks with a hung stage took {waited:.2f}s")
+    assert waited < 0.3, waited
+    assert watchdog.overruns["notify"] == 1 and watchdog.skipped["notify"] == 1
+    release.set()
+    time.sleep(0.05)
+    assert watchdog.run("notify", lambda: "ok") == "ok"
+    assert watchdog.histograms["notify"].max >= 0.1, "late finish still recorded"
+    print(watchdog.report())
+    watchdog.shutdown()
+
+
+def test_monitor_with_hung_notifier():
+    """Mitigation runs every tick even when notifications hang"""
+    print("\n" + "=" * 60)
+    print("TEST 3: Monitor ticks stay on time with a hanging notify stage")
+    print("=" * 60)
+    release = threading.Event()
+    watchdog = tempWatchdog.Watchdog({"notify": 0.05})
+    mitigated = []
+
+    class Hung(tempReplay.VirtualMonitor):
+        def alert(self, temp, snapshot):
+            release.wait()
+
+        def mitigate(self, temp):
+            mitigated.append(temp)
+
+    scheduler = tempSchedule.SampleScheduler(temperatureWarn.THRESHOLD, temperatureWarn.CRITICAL)
+    monitor = Hung(scheduler, lambda t: 85.0, watchdog=watchdog)
+    durations = []
+    saved = temperatureWarn.LOG_FILE
+    with tempfile.TemporaryDirectory() as tmp:
+        temperatureWarn.LOG_FILE = os.path.join(tmp, "temp.ring")
+        try:
+            for _ in range(20):
+                start = time.perf_counter()
+                monitor.sleep(monitor.tick())
+                durations.append(time.perf_counter() - start)
+        finally:
+            temperatureWarn.LOG_FILE = saved
+            release.set()
+            watchdog.shutdown()
+    print(f"Slowest tick {max(durations) * 1000:.0f} ms, mitigate ran {len(mitigated)} times")
+    print(watchdog.report())
+    assert len(mitigated) == 20
+    assert max(durations) < 0.5
+    assert watchdog.overruns["notify"] + watchdog.skipped["notify"] > 0
+    assert watchdog.histograms["tick"].count == 20
+
+
+def test_exit_and_kill_rung():
+    """A hung stage does not block exit; the background kill rung returns at once"""
+    print("\n" + "=" * 60)
+    print("TEST 4: Daemon workers and the kill rung against the mitigate deadline")
+    print("=" * 60)
+    code = ("import sys, threading, tempWatchdog; w = tempWatchdog.Watchdog({'notify': 0.05}); "
+            "w.run('notify', threading.Event().wait); w.shutdown(); print('exiting')")
+    here = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    start = time.perf_counter()
+    result = subprocess.run([sys.executable, "-c", code], cwd=here, capture_output=True, text=True, timeout=10)
+    print(f"Exit with a hung stage took {time.perf_counter() - start:.2f}s")
+    assert result.returncode == 0 and "exiting" in result.stdout, result.stderr
+
+    release = threading.Event()
+    watchdog = tempWatchdog.Watchdog()
+    kill = tempMitigate.parse_ladder("kill:80", lambda targets: release.wait(5) and len(targets),
+                                     background_kill=True)[0]
+    try:
+        watchdog.run("mitigate", kill.engage, [(1, 1, "slow")])
+        assert watchdog.overruns["mitigate"] == 0, "kill grace period must not count against mitigate"
+        release.set()
+        time.sleep(0.05)
+        assert kill.signalled == 1, kill.signalled
+    finally:
+        release.set()
+        watchdog.shutdown()
+
+
+if __name__ == "__main__":
+    test_histogram()
+    test_abandon_and_skip()
+    test_monitor_with_hung_notifier()
+    test_exit_and_kill_rung()
+    print("\n" + "=" * 60)
+    print("ALL TESTS COMPLETED")
+    print("=" * 60)
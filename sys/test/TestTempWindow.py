@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+"""
+Test script for the persistent warning window (tempWindow.py)
+Repeated warnings must reuse one UI thread and one Tk root. Without a
+display the window must fail once, quietly, and stay out of the way.
+"""
+import sys
+import os
+import threading
+import time
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import tempWindow
+
+
+def ui_threads():
+    return [t for t in threading.enumerate() if t.name == "temp-window"]
+
+
+def test_one_thread_for_many_warnings():
+    """A sustained heat event reuses the same window thread"""
+    print("=" * 60)
+    print("TEST 1: One UI thread for repeated warnings")
+    print("=" * 60)
+    window = tempWindow.WarningWindow(73, 78, history=10, hide_after=0.3)
+    for i in range(25):
+        window.add(70 + i * 0.4)
+    assert len(window.samples) == 10, "history must stay bounded"
+    for i in range(20):
+        window.show(74 + i * 0.2, i > 15)
+        time.sleep(0.01)
+    time.sleep(0.5)
+    if window.failed:
+        print("No display available: window disabled after one attempt")
+        assert not ui_threads(), "UI thread should exit when Tk cannot start"
+        window.show(80, True)
+        assert window.thread is not None and not window.thread.is_alive()
+    else:
+        assert len(ui_threads()) == 1, ui_threads()
+        print(f"20 warnings, {len(ui_threads())} UI thread, window hidden again")
+    window.close()
+    assert not ui_threads()
+
+
+if __name__ == "__main__":
+    test_one_thread_for_many_warnings()
+    print("\n" + "=" * 60)
+    print("ALL TESTS COMPLETED")
+    print("=" * 60)
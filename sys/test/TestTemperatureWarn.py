@@ -7,24 +7,28 @@ import sys
 import os
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from temperatureWarn import get_detailed_temps, log_temperature, clean_old_log_entries
+from temperatureWarn import take_snapshot, get_detailed_temps, log_temperature, dump_log
+from tempRing import TempRing
+from tempSensors import SensorSnapshot
 from datetime import datetime, timedelta
 
 # Use a test log file to avoid conflicts
-TEST_LOG = "/tmp/temp_test.log"
+TEST_LOG = "/tmp/temp_test.ring"
 
 def test_get_temperatures():
     """Test reading temperature values from sensors"""
     print("=" * 60)
     print("TEST 1: Get Temperature Readings")
     print("=" * 60)
-    temp1_first, edge_temp, temp1_second = get_detailed_temps()
+    snapshot = take_snapshot()
+    temp1_first, edge_temp, temp1_second = get_detailed_temps(snapshot)
+    print(f"Source:       {snapshot.source}")
     print(f"First temp1:  {temp1_first}°C")
     print(f"Edge temp:    {edge_temp}°C")
     print(f"Second temp1: {temp1_second}°C")
-    return temp1_first, edge_temp, temp1_second
+    return snapshot
 
-def test_logging(temp1_first, edge_temp, temp1_second):
+def test_logging(snapshot):
     """Test logging functionality"""
     print("\n" + "=" * 60)
     print("TEST 2: Log Temperature to File")
@@ -39,52 +43,54 @@ def test_logging(temp1_first, edge_temp, temp1_second):
         os.remove(TEST_LOG)
     
     # Log temperatures
-    log_temperature(temp1_first, edge_temp, temp1_second)
+    log_temperature(snapshot)
     
     print(f"Log file: {TEST_LOG}")
     if os.path.exists(TEST_LOG):
-        with open(TEST_LOG, "r") as f:
-            content = f.read()
-            print(f"Log entry: {content.strip()}")
+        print("Log entry:")
+        dump_log()
     else:
         print("ERROR: Log file not created!")
 
-def test_cleanup():
-    """Test cleanup of old log entries"""
+def test_ring_window():
+    """Test ring wraparound and the --dump time window"""
     print("\n" + "=" * 60)
-    print("TEST 3: Cleanup Old Log Entries (>10 minutes)")
+    print("TEST 3: Ring Log Wraparound and 10 Minute Window")
     print("=" * 60)
     
-    # Override LOG_FILE for testing
     import temperatureWarn
     temperatureWarn.LOG_FILE = TEST_LOG
+    if os.path.exists(TEST_LOG):
+        os.remove(TEST_LOG)
     
-    # Create test entries with different timestamps
-    with open(TEST_LOG, "w") as f:
-        # Old entry (11 minutes ago - should be removed)
-        old_time = datetime.now() - timedelta(minutes=11)
-        f.write(f"{old_time.strftime('%H:%M')} temp1 50.0 critical edge : 60.0 2nd temp1 : 65.0\n")
-        
-        # Recent entry (5 minutes ago - should be kept)
-        recent_time = datetime.now() - timedelta(minutes=5)
-        f.write(f"{recent_time.strftime('%H:%M')} temp1 48.0 critical edge : 62.0 2nd temp1 : 66.0\n")
-        
-        # Current entry (should be kept)
-        current_time = datetime.now()
-        f.write(f"{current_time.strftime('%H:%M')} temp1 46.0 critical edge : 66.0 2nd temp1 : 66.6\n")
-    
-    print("Before cleanup:")
-    with open(TEST_LOG, "r") as f:
-        for line in f:
-            print(f"  {line.strip()}")
+    # Entries either side of midnight; the old "HH MM" cleanup broke here
+    midnight = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+    ring = TempRing(TEST_LOG, capacity=4)
+    for minutes_ago, cpu in ((11, 50.0), (9, 48.0), (5, 47.0), (2, 46.0), (1, 45.0)):
+        when = midnight + timedelta(minutes=4) - timedelta(minutes=minutes_ago)
+        ring.append(SensorSnapshot(timestamp=when.timestamp(), cpu=cpu))
+    stored = [s.cpu for s in ring.snapshots()]
+    print(f"Stored (capacity 4, 5 appends): {stored}")
+    assert stored == [48.0, 47.0, 46.0, 45.0], "oldest record should be overwritten"
     
-    # Run cleanup
-    clean_old_log_entries()
+    since = (midnight + timedelta(minutes=4) - timedelta(minutes=10)).timestamp()
+    recent = [s.cpu for s in ring.snapshots(since)]
+    print(f"Within 10 minutes of 00:04: {recent}")
+    assert recent == [48.0, 47.0, 46.0, 45.0]
+    ring.close()
     
-    print("\nAfter cleanup (entries >10 min removed):")
-    with open(TEST_LOG, "r") as f:
-        for line in f:
-            print(f"  {line.strip()}")
+    size = os.path.getsize(TEST_LOG)
+    ring = TempRing(TEST_LOG, capacity=4)
+    ring.append(SensorSnapshot(cpu=44.0))
+    ring.close()
+    assert os.path.getsize(TEST_LOG) == size, "ring file must not grow"
+    print(f"File size stays {size} bytes")
+
+    # --dump on an empty file or a leftover text log prints one line, no traceback
+    for content in (b"", b"14 01 24 CPU: 55.0C\n" * 3):
+        with open(TEST_LOG, "wb") as f:
+            f.write(content)
+        dump_log()
 
 def test_custom_log_file():
     """Test running script with custom log file argument"""
@@ -93,7 +99,6 @@ def test_custom_log_file():
     print("=" * 60)
     
     import subprocess
-    import time
     
     # Run with --help to show usage
     result = subprocess.run([
@@ -110,13 +115,13 @@ if __name__ == "__main__":
     print("TEMPERATURE WARN TEST SUITE")
     print("=" * 60)
     print(f"Test log file: {TEST_LOG}")
-    print(f"Service log file: /tmp/temp.log (untouched)")
+    print(f"Service log file: /tmp/temp.ring (untouched)")
     print()
     
     # Run tests
-    temps = test_get_temperatures()
-    test_logging(*temps)
-    test_cleanup()
+    snapshot = test_get_temperatures()
+    test_logging(snapshot)
+    test_ring_window()
     test_custom_log_file()
     
     print("\n" + "=" * 60)
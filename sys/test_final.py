@@ -11,28 +11,31 @@ def timeout_handler(signum, frame):
 signal.signal(signal.SIGALRM, timeout_handler)
 signal.alarm(10)  # 10 second timeout
 
-from temperatureWarn import get_detailed_temps, log_temperature
+from temperatureWarn import take_snapshot, get_detailed_temps, log_temperature
 import temperatureWarn
 
-temperatureWarn.LOG_FILE = '/tmp/temp_final_test.log'
+temperatureWarn.LOG_FILE = '/tmp/temp_final_test.ring'
 
 print("Getting temps...")
-temp1, edge, temp2 = get_detailed_temps()
+snapshot = take_snapshot()
+temp1, edge, temp2 = get_detailed_temps(snapshot)
 print(f'Got temps: temp1={temp1}, edge={edge}, temp2={temp2}')
 
 print('Calling log_temperature()...')
-log_temperature(temp1, edge, temp2)
+log_temperature(snapshot)
 print('✓ log_temperature() completed!')
 
 signal.alarm(0)  # Cancel alarm
 
 import os
-if os.path.exists('/tmp/temp_final_test.log'):
+if os.path.exists('/tmp/temp_final_test.ring'):
     print(f'✓ Log file created!')
-    with open('/tmp/temp_final_test.log') as f:
-        content = f.read()
-        print(f'Log contains {len(content)} bytes, {len(content.splitlines())} lines')
-        print('First 200 chars:')
-        print(content[:200])
+    import io
+    out = io.StringIO()
+    temperatureWarn.dump_log(0, out)
+    content = out.getvalue()
+    print(f'Log renders to {len(content)} bytes, {len(content.splitlines())} lines')
+    print('First 200 chars:')
+    print(content[:200])
 else:
     print('✗ Log file NOT created')